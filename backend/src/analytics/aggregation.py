@@ -0,0 +1,392 @@
+from collections import defaultdict
+
+from analytics.histograms import empty_histogram
+from django.db import connection
+from django.db.models import (
+    Aggregate,
+    Avg,
+    Count,
+    F,
+    Max,
+    Min,
+    Q,
+    StdDev,
+)
+from django.db.models.functions import Length
+from surveys.models.answer import Answer
+from surveys.models.question import FieldType, Question
+from surveys.models.survey import SurveyResponse
+
+NUMERIC_FIELD_TYPES = (FieldType.NUMBER, FieldType.RATING)
+TEXT_FIELD_TYPES = (FieldType.TEXT,)
+CHOICE_FIELD_TYPES = (FieldType.SINGLE_CHOICE, FieldType.MULTIPLE_CHOICE)
+
+EMPTY_QUESTION_STATS = {
+    "total_answers": 0,
+    "text_answers": 0,
+    "avg_length": None,
+    "min_length": None,
+    "max_length": None,
+    "number_answers": 0,
+    "min_value": None,
+    "max_value": None,
+    "avg_value": None,
+    "std_dev": None,
+}
+
+# An answer with a value in any of its columns
+ANSWERED_SQL = """(
+    a.text_answer <> ''
+    OR a.number_answer IS NOT NULL
+    OR a.date_answer IS NOT NULL
+    OR a.datetime_answer IS NOT NULL
+    OR COALESCE(a.file_answer, '') <> ''
+    OR a.json_answer NOT IN ('{}', '[]', 'null', '""')
+)"""
+
+# Response totals of a survey joined to the answered count of each of its
+# questions, most answered first. A survey without questions gives a single
+# row with null question columns.
+SUBMISSION_REPORT_SQL = """
+WITH responses AS (
+    SELECT
+        COUNT(*) AS total_responses,
+        COUNT(*) FILTER (WHERE is_complete) AS total_submission,
+        COUNT(*) FILTER (WHERE user_id IS NULL) AS anonymous_user
+    FROM {response_table}
+    WHERE survey_id = %(survey_id)s::uuid
+),
+questions AS (
+    SELECT
+        q.id,
+        q.title,
+        q."order",
+        COUNT(a.id) FILTER (WHERE {answered}) AS answered
+    FROM {question_table} AS q
+    LEFT JOIN {answer_table} AS a ON a.question_id = q.id
+    WHERE q.survey_id = %(survey_id)s::uuid
+    GROUP BY q.id
+)
+SELECT r.total_responses, r.total_submission, r.anonymous_user, q.title, q.answered
+FROM responses AS r
+LEFT JOIN questions AS q ON TRUE
+ORDER BY q.answered DESC, q."order", q.id
+"""
+
+# Selection count of every option chosen in the choice questions of a survey.
+# Choice answers store the selected values as a JSON array, unnested in place
+# with jsonb_array_elements_text; a plain text_answer counts as one selection
+# (see Answer.choice_values).
+CHOICE_COUNTS_SQL = """
+SELECT a.question_id, choice.value, COUNT(*)
+FROM {answer_table} AS a
+INNER JOIN {question_table} AS q ON q.id = a.question_id
+CROSS JOIN LATERAL jsonb_array_elements_text(
+    CASE
+        WHEN jsonb_typeof(a.json_answer) = 'array' THEN a.json_answer
+        WHEN a.text_answer <> '' THEN jsonb_build_array(a.text_answer)
+        ELSE '[]'::jsonb
+    END
+) AS choice(value)
+WHERE q.survey_id = %(survey_id)s::uuid AND q.field_type = ANY(%(field_types)s)
+GROUP BY a.question_id, choice.value
+"""
+
+# The value histograms bucket: number answers and non-blank text lengths, of
+# the given questions and optionally of answers created in [start, end)
+ANSWER_VALUES_SQL = """
+SELECT
+    a.question_id,
+    CASE
+        WHEN q.field_type = ANY(%(numeric_types)s) THEN a.number_answer
+        WHEN a.text_answer <> '' THEN length(a.text_answer)
+    END AS value
+FROM {answer_table} AS a
+INNER JOIN {question_table} AS q ON q.id = a.question_id
+WHERE a.question_id = ANY(%(question_ids)s::uuid[])
+    AND (%(start)s::timestamptz IS NULL OR a.created_at >= %(start)s)
+    AND (%(end)s::timestamptz IS NULL OR a.created_at < %(end)s)
+"""
+
+# Equal-width bucket counts of every question against its own edges in one
+# pass. Values outside the edges (the edges may come from slightly stale
+# bounds) are counted in the first or last bucket.
+WIDTH_HISTOGRAM_SQL = """
+WITH answer_values AS ({answer_values}),
+bounds AS (
+    SELECT *
+    FROM unnest(
+        %(question_ids)s::uuid[], %(lows)s::float8[], %(highs)s::float8[],
+        %(buckets)s::int[]
+    ) AS b(question_id, low, high, buckets)
+)
+SELECT
+    v.question_id,
+    LEAST(GREATEST(width_bucket(v.value, b.low, b.high, b.buckets), 1), b.buckets),
+    COUNT(*)
+FROM answer_values AS v
+INNER JOIN bounds AS b ON b.question_id = v.question_id
+WHERE v.value IS NOT NULL
+GROUP BY 1, 2
+"""
+
+# Equal-count (quantile) buckets of every question in one pass
+QUANTILE_HISTOGRAM_SQL = """
+WITH answer_values AS ({answer_values}),
+tiles AS (
+    SELECT
+        question_id,
+        value,
+        ntile(%(tiles)s) OVER (PARTITION BY question_id ORDER BY value) AS tile
+    FROM answer_values
+    WHERE value IS NOT NULL
+)
+SELECT question_id, tile, MIN(value), MAX(value), COUNT(*)
+FROM tiles
+GROUP BY question_id, tile
+ORDER BY question_id, tile
+"""
+
+
+class Percentile(Aggregate):
+    """
+    Continuous percentile (``percentile_cont``) of a numeric or interval
+    expression, interpolated between the two nearest values
+    """
+
+    function = "PERCENTILE_CONT"
+    name = "Percentile"
+    template = "%(function)s(%(percentile)s) WITHIN GROUP (ORDER BY %(expressions)s)"
+
+    def __init__(self, expression, percentile, **extra):
+        if not 0 <= percentile <= 1:
+            raise ValueError("percentile must be between 0 and 1")
+        super().__init__(expression, percentile=float(percentile), **extra)
+
+
+# Completion time percentiles reported for surveys and time buckets
+COMPLETION_PERCENTILES = {"median": 0.5, "p90": 0.9, "p99": 0.99}
+
+
+def completion_time_percentiles(condition=None):
+    """
+    ``percentile_cont`` aggregates of ``time_taken`` by COMPLETION_PERCENTILES
+    name, to be used on SurveyResponse querysets
+    """
+    return {
+        name: Percentile("time_taken", percentile, filter=condition)
+        for name, percentile in COMPLETION_PERCENTILES.items()
+    }
+
+
+class SurveyAggregation:
+    """
+    Computes per-question answer statistics for a whole survey using grouped
+    queries, instead of issuing a set of queries for every question.
+    """
+
+    def __init__(self, survey):
+        self.survey = survey
+
+    def get_answers(self):
+        # order_by() clears the default ordering so it does not leak into GROUP BY
+        return Answer.objects.filter(question__survey=self.survey).order_by()
+
+    def question_stats(self):
+        """
+        Answer counts, text lengths and numeric statistics for every question,
+        computed in a single GROUP BY question_id pass.
+        """
+        non_blank_text = ~Q(text_answer="")
+
+        rows = (
+            self.get_answers()
+            .values("question_id")
+            .annotate(
+                total_answers=Count("id"),
+                text_answers=Count("id", filter=non_blank_text),
+                avg_length=Avg(Length("text_answer"), filter=non_blank_text),
+                min_length=Min(Length("text_answer"), filter=non_blank_text),
+                max_length=Max(Length("text_answer"), filter=non_blank_text),
+                number_answers=Count("number_answer"),
+                min_value=Min("number_answer"),
+                max_value=Max("number_answer"),
+                avg_value=Avg("number_answer"),
+                std_dev=StdDev("number_answer"),
+            )
+        )
+
+        return {row.pop("question_id"): row for row in rows}
+
+    def value_distributions(self):
+        """
+        Value counts of rating answers, whose values are the few points of
+        their scale, grouped by question in a single pass. Returns
+        ``{question_id: [(value, count), ...]}`` ordered by value. Number
+        answers and text lengths are bucketed by ``histograms`` instead.
+        """
+        rows = (
+            self.get_answers()
+            .filter(question__field_type=FieldType.RATING, number_answer__isnull=False)
+            .values("question_id", value=F("number_answer"))
+            .annotate(count=Count("id"))
+            .order_by("question_id", "value")
+        )
+
+        distributions = defaultdict(list)
+        for row in rows:
+            distributions[row["question_id"]].append((row["value"], row["count"]))
+
+        return distributions
+
+    def query_answer_values(self, sql, params, start=None, end=None):
+        answer_values = ANSWER_VALUES_SQL.format(
+            answer_table=Answer._meta.db_table,
+            question_table=Question._meta.db_table,
+        )
+        params = {
+            **params,
+            "numeric_types": list(NUMERIC_FIELD_TYPES),
+            "start": start,
+            "end": end,
+        }
+        with connection.cursor() as cursor:
+            cursor.execute(sql.format(answer_values=answer_values), params)
+            return cursor.fetchall()
+
+    def histograms(self, edges, start=None, end=None):
+        """
+        Equal-width histograms of number answers and text lengths in one
+        ``width_bucket`` pass, each question against its own ``edges`` (see
+        histograms.get_edges). Returns ``{question_id: {"edges", "counts"}}``.
+        ``start`` and ``end`` restrict the answers to a creation time range,
+        and histograms of the same edges over several ranges can be merged.
+        """
+        edges = {
+            question_id: question_edges
+            for question_id, question_edges in edges.items()
+            if len(question_edges) > 1
+        }
+        if not edges:
+            return {}
+
+        question_ids = list(edges)
+        rows = self.query_answer_values(
+            WIDTH_HISTOGRAM_SQL,
+            {
+                "question_ids": [str(question_id) for question_id in question_ids],
+                "lows": [edges[question_id][0] for question_id in question_ids],
+                "highs": [edges[question_id][-1] for question_id in question_ids],
+                "buckets": [
+                    len(edges[question_id]) - 1 for question_id in question_ids
+                ],
+            },
+            start,
+            end,
+        )
+
+        histograms = {
+            question_id: empty_histogram(question_edges)
+            for question_id, question_edges in edges.items()
+        }
+        # Rows carry UUIDs, the edges may be keyed by their strings
+        keys = {str(question_id): question_id for question_id in question_ids}
+        for question_id, bucket, count in rows:
+            histograms[keys[str(question_id)]]["counts"][bucket - 1] = count
+        return histograms
+
+    def quantile_histograms(self, question_ids, buckets, start=None, end=None):
+        """
+        Number answers and text lengths of the questions split into at most
+        ``buckets`` buckets of equal counts with ``ntile``, in one pass.
+        Returns ``{question_id: [{"start", "end", "count"}, ...]}``, each
+        bucket spanning the smallest to the largest value it holds.
+        """
+        if not question_ids:
+            return {}
+
+        rows = self.query_answer_values(
+            QUANTILE_HISTOGRAM_SQL,
+            {
+                "question_ids": [str(question_id) for question_id in question_ids],
+                "tiles": buckets,
+            },
+            start,
+            end,
+        )
+
+        histograms = defaultdict(list)
+        keys = {str(question_id): question_id for question_id in question_ids}
+        for question_id, _tile, minimum, maximum, count in rows:
+            histograms[keys[str(question_id)]].append(
+                {"start": minimum, "end": maximum, "count": count}
+            )
+        return histograms
+
+    def choice_counts(self):
+        """
+        Selection counts of the choice questions of the survey, in one query
+        grouped by question and option. Returns ``{question_id: {value:
+        count}}``.
+        """
+        sql = CHOICE_COUNTS_SQL.format(
+            answer_table=Answer._meta.db_table,
+            question_table=Question._meta.db_table,
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                sql,
+                {
+                    "survey_id": str(self.survey.id),
+                    "field_types": list(CHOICE_FIELD_TYPES),
+                },
+            )
+            rows = cursor.fetchall()
+
+        counts = defaultdict(dict)
+        for question_id, value, count in rows:
+            counts[question_id][value] = count
+        return counts
+
+    def submission_report(self):
+        """
+        Response totals, answered and unanswered counts and the most and least
+        answered questions of the survey, in a single query. A question counts
+        as unanswered for every response without a non-empty answer to it.
+        """
+        sql = SUBMISSION_REPORT_SQL.format(
+            response_table=SurveyResponse._meta.db_table,
+            question_table=Question._meta.db_table,
+            answer_table=Answer._meta.db_table,
+            answered=ANSWERED_SQL,
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, {"survey_id": str(self.survey.id)})
+            rows = cursor.fetchall()
+
+        total_responses, total_submission, anonymous_user = rows[0][:3]
+        questions = [
+            (title, answered, max(total_responses - answered, 0))
+            for *_totals, title, answered in rows
+            if title is not None
+        ]
+
+        report = {
+            "total_responses": total_responses,
+            "total_submission": total_submission,
+            "anonymous_user": anonymous_user,
+            "registered_user": total_responses - anonymous_user,
+            "total_answer": sum(answered for _t, answered, _u in questions),
+            "total_unanswer": sum(unanswered for _t, _a, unanswered in questions),
+            "popular_answer": {"total": 0, "question": ""},
+            "unpopular_answer": {"total": 0, "question": ""},
+        }
+
+        if report["total_answer"]:
+            title, answered, _unanswered = questions[0]
+            report["popular_answer"] = {"total": answered, "question": title}
+        if report["total_unanswer"]:
+            title, _answered, unanswered = questions[-1]
+            report["unpopular_answer"] = {"total": unanswered, "question": title}
+
+        return report
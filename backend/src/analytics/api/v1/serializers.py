@@ -10,6 +10,8 @@ class SurveyAnalyticsSerializer(serializers.ModelSerializer):
 
 
 class QuestionAnalyticsSerializer(serializers.ModelSerializer):
+    skip_count = serializers.IntegerField(read_only=True)
+
     class Meta:
         model = QuestionAnalytics
         fields = "__all__"
@@ -1,8 +1,13 @@
 from analytics.tests.factories import QuestionAnalyticsFactory, SurveyAnalyticsFactory
+from django.core.cache import cache
 from django.urls import reverse
 from rest_framework.test import APITestCase
 from surveys.tests.factories.question_factory import QuestionFactory
-from surveys.tests.factories.survey_factory import SurveyFactory
+from surveys.tests.factories.survey_factory import (
+    SurveyFactory,
+    SurveyResponseFactory,
+    UserFactory,
+)
 
 
 class SurveyAnalyticsViewSetTest(APITestCase):
@@ -58,3 +63,47 @@ class QuestionAnalyticsViewSetTest(APITestCase):
         response = self.client.get(self.detail_url)
         self.assertEqual(response.status_code, 200)
         self.assertEqual(str(response.data["id"]), str(self.analytics.id))
+
+
+class SurveyTimeseriesViewTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = UserFactory()
+        self.survey = SurveyFactory(created_by=self.user)
+        SurveyResponseFactory(survey=self.survey, is_complete=True)
+        self.url = reverse(
+            "analytics:survey-timeseries", kwargs={"survey_pk": self.survey.pk}
+        )
+
+    def test_timeseries(self):
+        self.client.force_authenticate(user=self.user)
+
+        response = self.client.get(self.url, {"bucket": "hour"})
+
+        self.assertEqual(response.status_code, 200)
+        data = response.data["data"]
+        self.assertEqual(data["bucket"], "hour")
+        self.assertEqual(sum(point["starts"] for point in data["series"]), 1)
+        self.assertEqual(data["series"][-1]["completions"], 1)
+
+    def test_invalid_parameters(self):
+        self.client.force_authenticate(user=self.user)
+
+        for params in [
+            {"bucket": "month"},
+            {"from": "yesterday"},
+            {"from": "2025-02-01", "to": "2025-01-01"},
+            {"from": "2000-01-01", "to": "2025-01-01", "bucket": "hour"},
+            # Ranges past the first or last representable date
+            {"to": "0001-01-05"},
+            {"from": "9999-12-31", "to": "9999-12-31T23:00:00", "bucket": "week"},
+        ]:
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, 400, params)
+
+    def test_only_the_survey_creator_can_read(self):
+        self.client.force_authenticate(user=UserFactory())
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+        self.client.force_authenticate(user=None)
+        self.assertEqual(self.client.get(self.url).status_code, 401)
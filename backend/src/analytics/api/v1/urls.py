@@ -1,4 +1,9 @@
-from analytics.api.v1.viewsets import QuestionAnalyticsViewSet, SurveyAnalyticsViewSet
+from analytics.api.v1.viewsets import (
+    QuestionAnalyticsViewSet,
+    SurveyAnalyticsViewSet,
+    SurveyTimeseriesView,
+)
+from django.urls import path
 from rest_framework.routers import DefaultRouter
 
 router = DefaultRouter()
@@ -11,4 +16,10 @@ router.register(
     basename="question-analytics",
 )
 
-urlpatterns = router.urls
+urlpatterns = [
+    path(
+        "api/v1/analytics/surveys/<uuid:survey_pk>/timeseries/",
+        SurveyTimeseriesView.as_view(),
+        name="survey-timeseries",
+    ),
+] + router.urls
@@ -1,9 +1,32 @@
+from datetime import datetime, time, timedelta
+
 from analytics.api.v1.serializers import (
     QuestionAnalyticsSerializer,
     SurveyAnalyticsSerializer,
 )
 from analytics.models import QuestionAnalytics, SurveyAnalytics
-from rest_framework import permissions, viewsets
+from analytics.timeseries import (
+    MAX_BUCKETS,
+    Bucket,
+    ceil_bucket,
+    count_buckets,
+    get_survey_timeseries,
+)
+from core.api_message import (
+    INVALID_TIMESERIES_BUCKET,
+    INVALID_TIMESERIES_RANGE,
+    NOT_FOUND_SURVEY_ERROR,
+    REQUEST_QUERY_PARAM,
+)
+from core.http_ import Http404, HttpError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework import permissions, status, viewsets
+from rest_framework.generics import GenericAPIView
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from surveys.models.survey import Survey
+from surveys.permissions import IsSurveyCreator
 
 
 class SurveyAnalyticsViewSet(viewsets.ReadOnlyModelViewSet):
@@ -13,6 +36,105 @@ class SurveyAnalyticsViewSet(viewsets.ReadOnlyModelViewSet):
 
 
 class QuestionAnalyticsViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = QuestionAnalytics.objects.all()
+    queryset = QuestionAnalytics.objects.select_related("question__survey__analytics")
     serializer_class = QuestionAnalyticsSerializer
     permission_classes = [permissions.AllowAny]
+
+
+class SurveyTimeseriesView(GenericAPIView):
+    """
+    Starts, completions, abandonment and median completion time of a survey's
+    responses per hour, day or week:
+    ``?from=&to=&bucket=hour|day|week``, with ISO 8601 dates or datetimes.
+    """
+
+    queryset = Survey.objects.all()
+    lookup_url_kwarg = "survey_pk"
+
+    # Range covered when ``from`` is not given
+    default_ranges = {
+        Bucket.HOUR: timedelta(days=2),
+        Bucket.DAY: timedelta(days=30),
+        Bucket.WEEK: timedelta(weeks=12),
+    }
+
+    def get_permissions(self):
+        # Only the survey creator (or admin/staff) can see its analytics
+        if self.request.user and (
+            self.request.user.is_staff or self.request.user.is_superuser
+        ):
+            return [IsAuthenticated()]
+        return [IsAuthenticated(), IsSurveyCreator()]
+
+    def get_object(self):
+        survey_pk = self.kwargs[self.lookup_url_kwarg]
+        try:
+            obj = self.get_queryset().get(pk=survey_pk)
+        except Survey.DoesNotExist as err:
+            raise Http404(
+                message=NOT_FOUND_SURVEY_ERROR.format(survey_pk),
+                error_code=status.HTTP_404_NOT_FOUND,
+            ) from err
+
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+    @staticmethod
+    def parse_moment(value):
+        """An aware datetime from an ISO 8601 datetime or date (midnight)"""
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            if day is None:
+                raise ValueError(value)
+            moment = datetime.combine(day, time())
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+        return moment
+
+    def get(self, request, *args, **kwargs):
+        survey = self.get_object()
+        params = request.query_params
+
+        bucket = params.get("bucket", Bucket.DAY)
+        if bucket not in Bucket.CHOICES:
+            raise HttpError(
+                message=INVALID_TIMESERIES_BUCKET.format(
+                    bucket, ", ".join(Bucket.CHOICES)
+                )
+            )
+
+        try:
+            end = self.parse_moment(params["to"]) if params.get("to") else None
+            start = self.parse_moment(params["from"]) if params.get("from") else None
+        except (ValueError, OverflowError) as err:
+            raise HttpError(message=REQUEST_QUERY_PARAM) from err
+
+        end = end or timezone.now()
+        try:
+            start = start or end - self.default_ranges[bucket]
+            buckets = count_buckets(start, end, bucket)
+            # The series is widened to whole buckets, which must be dates too
+            ceil_bucket(end, bucket)
+        except OverflowError as err:
+            # Past the first or last representable date
+            raise HttpError(
+                message=INVALID_TIMESERIES_RANGE.format(MAX_BUCKETS)
+            ) from err
+        if start >= end or buckets > MAX_BUCKETS:
+            raise HttpError(message=INVALID_TIMESERIES_RANGE.format(MAX_BUCKETS))
+
+        series = get_survey_timeseries(survey.id, start, end, bucket)
+        return Response(
+            {
+                "data": {
+                    "survey": survey.id,
+                    "bucket": bucket,
+                    "from": start,
+                    "to": end,
+                    "series": series,
+                },
+                "status": "success",
+                "code": status.HTTP_200_OK,
+            }
+        )
@@ -0,0 +1,342 @@
+import json
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from analytics.aggregation import (
+    CHOICE_FIELD_TYPES,
+    SurveyAggregation,
+    completion_time_percentiles,
+)
+from analytics.models import QuestionAnalytics, SurveyAnalytics
+from django.db import connection, transaction
+from django.db.models import (
+    Avg,
+    Count,
+    DurationField,
+    ExpressionWrapper,
+    F,
+    FloatField,
+    Q,
+    Value,
+)
+from django.db.models.functions import Cast, Coalesce, Greatest
+from surveys.models.answer import Answer
+from surveys.models.question import Question
+from surveys.models.survey import SurveyResponse
+
+# Merges the per-question deltas of a batch of answers into the
+# QuestionAnalytics rows in one statement. choice_distribution is merged by
+# summing the counts of both JSON objects key by key.
+QUESTION_DELTA_SQL = """
+UPDATE {table} AS qa SET
+    total_answers = qa.total_answers + v.answers,
+    value_count = qa.value_count + v.value_count,
+    min_value = LEAST(qa.min_value, v.min_value),
+    max_value = GREATEST(qa.max_value, v.max_value),
+    average_value = CASE
+        WHEN v.value_count > 0 THEN
+            (COALESCE(qa.average_value, 0) * qa.value_count + v.value_sum)
+            / (qa.value_count + v.value_count)
+        ELSE qa.average_value
+    END,
+    choice_distribution = COALESCE(
+        (
+            SELECT jsonb_object_agg(merged.key, merged.total)
+            FROM (
+                SELECT choices.key, SUM(choices.value::integer) AS total
+                FROM (
+                    SELECT * FROM jsonb_each_text(qa.choice_distribution)
+                    UNION ALL
+                    SELECT * FROM jsonb_each_text(v.choices)
+                ) AS choices
+                GROUP BY choices.key
+            ) AS merged
+        ),
+        '{{}}'::jsonb
+    ),
+    updated_at = NOW()
+FROM (VALUES {values}) AS v(
+    question_id, answers, value_count, value_sum, min_value, max_value, choices
+)
+WHERE qa.question_id = v.question_id
+RETURNING qa.question_id
+"""
+
+QUESTION_DELTA_VALUES = (
+    "(%s::uuid, %s::integer, %s::integer, %s::double precision, "
+    "%s::double precision, %s::double precision, %s::jsonb)"
+)
+
+
+def completion_rate(completions, starts):
+    """Percentage expression of completions over starts, safe for zero starts"""
+    return Cast(completions, FloatField()) * 100 / Greatest(starts, Value(1))
+
+
+class AnalyticsCounter:
+    """
+    Keeps SurveyAnalytics and QuestionAnalytics up to date with atomic
+    F()-expression deltas as responses and answers are written, so the cost
+    of an update does not grow with the number of stored responses.
+    """
+
+    @staticmethod
+    def update_survey_analytics(survey_id, **expressions):
+        """Apply update expressions to the survey analytics row, creating it if needed"""
+        queryset = SurveyAnalytics.objects.filter(survey_id=survey_id)
+
+        if not queryset.update(**expressions):
+            SurveyAnalytics.objects.get_or_create(survey_id=survey_id)
+            queryset.update(**expressions)
+
+    @staticmethod
+    def completion_time_deltas(times):
+        """
+        Update expressions folding completion durations into the running
+        mean, which only counts completions with a known duration
+        """
+        timed = F("timed_completions") + len(times)
+        return {
+            "timed_completions": timed,
+            "average_completion_time": ExpressionWrapper(
+                (
+                    Coalesce(F("average_completion_time"), Value(timedelta(0)))
+                    * F("timed_completions")
+                    + Value(sum(times, timedelta(0)))
+                )
+                / timed,
+                output_field=DurationField(),
+            ),
+        }
+
+    @staticmethod
+    def record_response_started(survey_response):
+        starts = F("total_starts") + 1
+        rate = completion_rate(F("total_completions"), starts)
+
+        AnalyticsCounter.update_survey_analytics(
+            survey_response.survey_id,
+            total_starts=starts,
+            completion_rate=rate,
+            bounce_rate=100 - rate,
+        )
+
+    @staticmethod
+    def record_response_completed(survey_response):
+        completions = F("total_completions") + 1
+        rate = completion_rate(completions, F("total_starts"))
+        expressions = {
+            "total_completions": completions,
+            "completion_rate": rate,
+            "bounce_rate": 100 - rate,
+            "percentiles_stale": True,
+        }
+
+        if survey_response.time_taken is not None:
+            expressions.update(
+                AnalyticsCounter.completion_time_deltas([survey_response.time_taken])
+            )
+
+        AnalyticsCounter.update_survey_analytics(
+            survey_response.survey_id, **expressions
+        )
+
+    @staticmethod
+    def record_responses(responses):
+        """Fold a batch of newly created responses into their survey analytics"""
+        by_survey = defaultdict(list)
+        for survey_response in responses:
+            by_survey[survey_response.survey_id].append(survey_response)
+
+        for survey_id, batch in by_survey.items():
+            completed = [response for response in batch if response.is_complete]
+            times = [
+                response.time_taken
+                for response in completed
+                if response.time_taken is not None
+            ]
+
+            starts = F("total_starts") + len(batch)
+            completions = F("total_completions") + len(completed)
+            rate = completion_rate(completions, starts)
+            expressions = {
+                "total_starts": starts,
+                "total_completions": completions,
+                "completion_rate": rate,
+                "bounce_rate": 100 - rate,
+            }
+            if completed:
+                expressions["percentiles_stale"] = True
+
+            if times:
+                expressions.update(AnalyticsCounter.completion_time_deltas(times))
+
+            AnalyticsCounter.update_survey_analytics(survey_id, **expressions)
+
+    @staticmethod
+    def record_answers(answers):
+        """Fold a batch of newly created answers into their question analytics"""
+        deltas = defaultdict(
+            lambda: {
+                "answers": 0,
+                "value_count": 0,
+                "value_sum": 0.0,
+                "min_value": None,
+                "max_value": None,
+                "choices": Counter(),
+            }
+        )
+
+        for answer in answers:
+            delta = deltas[answer.question_id]
+            delta["answers"] += 1
+
+            if answer.number_answer is not None:
+                value = float(answer.number_answer)
+                delta["value_count"] += 1
+                delta["value_sum"] += value
+                if delta["min_value"] is None or value < delta["min_value"]:
+                    delta["min_value"] = value
+                if delta["max_value"] is None or value > delta["max_value"]:
+                    delta["max_value"] = value
+
+            # Choice answers are stored as a list in json_answer; the question
+            # is only consulted for legacy text choices when already loaded
+            if answer.json_answer or (
+                Answer.question.is_cached(answer)
+                and answer.question.field_type in CHOICE_FIELD_TYPES
+            ):
+                delta["choices"].update(answer.choice_values)
+
+        if not deltas:
+            return
+
+        updated = AnalyticsCounter._apply_question_deltas(deltas)
+        missing = {
+            question_id: delta
+            for question_id, delta in deltas.items()
+            if str(question_id) not in updated
+        }
+
+        if missing:
+            AnalyticsCounter._create_question_analytics(missing)
+            AnalyticsCounter._apply_question_deltas(missing)
+
+    @staticmethod
+    def _apply_question_deltas(deltas):
+        params = []
+        for question_id, delta in deltas.items():
+            params.extend(
+                [
+                    str(question_id),
+                    delta["answers"],
+                    delta["value_count"],
+                    delta["value_sum"],
+                    delta["min_value"],
+                    delta["max_value"],
+                    json.dumps(delta["choices"]),
+                ]
+            )
+
+        sql = QUESTION_DELTA_SQL.format(
+            table=QuestionAnalytics._meta.db_table,
+            values=", ".join([QUESTION_DELTA_VALUES] * len(deltas)),
+        )
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return {str(row[0]) for row in cursor.fetchall()}
+
+    @staticmethod
+    def _create_question_analytics(question_ids):
+        QuestionAnalytics.objects.bulk_create(
+            [
+                QuestionAnalytics(question_id=question_id)
+                for question_id in Question.objects.filter(
+                    id__in=list(question_ids)
+                ).values_list("id", flat=True)
+            ],
+            ignore_conflicts=True,
+        )
+
+    @staticmethod
+    def get_completion_percentiles(survey_id):
+        """Median, p90 and p99 completion times of a survey, in one query"""
+        return (
+            SurveyResponse.objects.filter(survey_id=survey_id, is_complete=True)
+            .order_by()
+            .aggregate(
+                **{
+                    f"{name}_completion_time": aggregate
+                    for name, aggregate in completion_time_percentiles().items()
+                }
+            )
+        )
+
+    @staticmethod
+    def refresh_completion_percentiles(survey_id):
+        queryset = SurveyAnalytics.objects.filter(survey_id=survey_id)
+        # Cleared first: completions recorded meanwhile mark it stale again
+        queryset.update(percentiles_stale=False)
+        queryset.update(**AnalyticsCounter.get_completion_percentiles(survey_id))
+
+    @staticmethod
+    def refresh_stale_percentiles(batch_size=100):
+        """
+        Recompute the completion time percentiles of the surveys which had
+        completions since they were last computed. Returns how many.
+        """
+        survey_ids = list(
+            SurveyAnalytics.objects.filter(percentiles_stale=True)
+            .order_by()
+            .values_list("survey_id", flat=True)[:batch_size]
+        )
+        for survey_id in survey_ids:
+            AnalyticsCounter.refresh_completion_percentiles(survey_id)
+        return len(survey_ids)
+
+    @staticmethod
+    @transaction.atomic
+    def rebuild(survey):
+        """Recompute every analytics counter of a survey from scratch"""
+        responses = survey.responses.aggregate(
+            total_starts=Count("id"),
+            total_completions=Count("id", filter=Q(is_complete=True)),
+            timed_completions=Count("time_taken", filter=Q(is_complete=True)),
+            average_completion_time=Avg("time_taken", filter=Q(is_complete=True)),
+        )
+        total_starts = responses["total_starts"]
+        completion = (
+            responses["total_completions"] / total_starts * 100 if total_starts else 0
+        )
+
+        SurveyAnalytics.objects.update_or_create(
+            survey=survey,
+            defaults={
+                **responses,
+                **AnalyticsCounter.get_completion_percentiles(survey.id),
+                "percentiles_stale": False,
+                "completion_rate": completion,
+                "bounce_rate": 100 - completion if total_starts else 0,
+            },
+        )
+
+        aggregation = SurveyAggregation(survey)
+        question_stats = aggregation.question_stats()
+        choice_distributions = aggregation.choice_counts()
+
+        for question in survey.questions.all():
+            stats = question_stats.get(question.id, {})
+            QuestionAnalytics.objects.update_or_create(
+                question=question,
+                defaults={
+                    "total_answers": stats.get("total_answers", 0),
+                    "value_count": stats.get("number_answers", 0),
+                    "average_value": stats.get("avg_value"),
+                    "min_value": stats.get("min_value"),
+                    "max_value": stats.get("max_value"),
+                    "choice_distribution": dict(
+                        choice_distributions.get(question.id, {})
+                    ),
+                },
+            )
@@ -0,0 +1,153 @@
+from collections import Counter, defaultdict
+
+from analytics.rollups import MOBILE_PATTERN, TABLET_PATTERN
+from django.db import connection
+from surveys.models.answer import Answer
+from surveys.models.question import Question
+from surveys.models.survey import SurveyResponse
+
+
+class FunnelSegment:
+    DEVICE = "device"
+    COUNTRY = "country"
+
+    CHOICES = (DEVICE, COUNTRY)
+
+
+# Segment of a response, the same device buckets as rollups.get_device_type
+SEGMENT_SQL = {
+    None: "NULL::text",
+    FunnelSegment.DEVICE: """CASE
+        WHEN r.user_agent ~* %(tablet_pattern)s
+            OR (r.user_agent ~* 'android' AND r.user_agent !~* 'mobi')
+            THEN 'tablet'
+        WHEN r.user_agent ~* %(mobile_pattern)s THEN 'mobile'
+        ELSE 'desktop'
+    END""",
+    FunnelSegment.COUNTRY: "NULLIF(r.country, '')",
+}
+
+# The furthest question order each response answered, counted by segment,
+# completion and order (NULL for responses without answers), and the answers
+# to each question by segment, in one round trip
+FUNNEL_SQL = """
+WITH responses AS (
+    SELECT r.id, r.is_complete, {segment} AS segment
+    FROM {response_table} AS r
+    WHERE r.survey_id = %(survey_id)s::uuid
+),
+answered AS (
+    SELECT a.response_id, q."order"
+    FROM {answer_table} AS a
+    INNER JOIN {question_table} AS q ON q.id = a.question_id
+    WHERE q.survey_id = %(survey_id)s::uuid
+),
+furthest AS (
+    SELECT r.segment, r.is_complete, MAX(a."order") AS step
+    FROM responses AS r
+    LEFT JOIN answered AS a ON a.response_id = r.id
+    GROUP BY r.id, r.segment, r.is_complete
+)
+SELECT 'furthest', segment, step, is_complete, COUNT(*)
+FROM furthest
+GROUP BY segment, step, is_complete
+UNION ALL
+SELECT 'answered', r.segment, a."order", NULL, COUNT(*)
+FROM answered AS a
+INNER JOIN responses AS r ON r.id = a.response_id
+GROUP BY r.segment, a."order"
+"""
+
+
+def empty_totals():
+    return {
+        "responses": 0,
+        "completed": 0,
+        "furthest": Counter(),
+        "dropped": Counter(),
+        "answered": Counter(),
+    }
+
+
+def get_funnel(survey, segment=None):
+    """
+    Drop-off funnel of a survey, one per ``segment`` value (device or
+    country) or a single one, largest first, in two queries however many
+    questions and responses it has. For every question, in order:
+
+    - ``reached``: responses which answered it or a later question,
+    - ``answered``: responses which answered it,
+    - ``dropped``: incomplete responses whose last answer was to it.
+
+    ``no_answers`` counts the responses which answered no question at all.
+    """
+    questions = list(survey.questions.order_by("order").values("id", "order", "title"))
+
+    sql = FUNNEL_SQL.format(
+        segment=SEGMENT_SQL[segment],
+        response_table=SurveyResponse._meta.db_table,
+        answer_table=Answer._meta.db_table,
+        question_table=Question._meta.db_table,
+    )
+    params = {"survey_id": str(survey.id)}
+    if segment == FunnelSegment.DEVICE:
+        params.update(tablet_pattern=TABLET_PATTERN, mobile_pattern=MOBILE_PATTERN)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    totals = defaultdict(empty_totals)
+    if segment is None:
+        totals[None] = empty_totals()
+    for kind, value, step, is_complete, count in rows:
+        segment_totals = totals[value]
+        if kind == "answered":
+            segment_totals["answered"][step] += count
+            continue
+
+        segment_totals["responses"] += count
+        segment_totals["furthest"][step] += count
+        if is_complete:
+            segment_totals["completed"] += count
+        else:
+            segment_totals["dropped"][step] += count
+
+    funnels = [
+        build_funnel(value, segment_totals, questions)
+        for value, segment_totals in totals.items()
+    ]
+    funnels.sort(key=lambda funnel: -funnel["responses"])
+    return funnels
+
+
+def build_funnel(segment, totals, questions):
+    # Responses reaching a question: the cumulative sum of the furthest
+    # question answered, from the last question back
+    reached = 0
+    steps = []
+    for question in reversed(questions):
+        order = question["order"]
+        reached += totals["furthest"][order]
+        dropped = totals["dropped"][order]
+        steps.append(
+            {
+                "question_id": question["id"],
+                "question_order": order,
+                "question_title": question["title"],
+                "reached": reached,
+                "answered": totals["answered"][order],
+                "dropped": dropped,
+                "abandonment_rate": (
+                    round(dropped / reached * 100, 2) if reached > 0 else 0
+                ),
+            }
+        )
+    steps.reverse()
+
+    return {
+        "segment": segment,
+        "responses": totals["responses"],
+        "completed": totals["completed"],
+        "no_answers": totals["furthest"][None],
+        "steps": steps,
+    }
@@ -0,0 +1,68 @@
+import math
+
+
+class HistogramMode:
+    WIDTH = "width"
+    QUANTILE = "quantile"
+
+    CHOICES = (WIDTH, QUANTILE)
+
+
+DEFAULT_HISTOGRAM_BUCKETS = 10
+
+
+def get_edges(minimum, maximum, buckets=DEFAULT_HISTOGRAM_BUCKETS, integer=False):
+    """
+    Edges of at most ``buckets`` equal-width buckets covering ``[minimum,
+    maximum]``, ``buckets + 1`` values at most. Integer domains (such as text
+    lengths) get whole-number widths so no bucket is empty by construction.
+    """
+    if minimum is None or maximum is None:
+        return []
+    minimum, maximum = float(minimum), float(maximum)
+
+    if integer:
+        minimum, maximum = math.floor(minimum), math.floor(maximum) + 1
+        width = max(math.ceil((maximum - minimum) / buckets), 1)
+        count = math.ceil((maximum - minimum) / width)
+        return [minimum + width * n for n in range(count + 1)]
+
+    if maximum <= minimum:
+        return [minimum, minimum + 1]
+    width = (maximum - minimum) / buckets
+    return [minimum + width * n for n in range(buckets)] + [maximum]
+
+
+def empty_histogram(edges):
+    return {"edges": list(edges), "counts": [0] * max(len(edges) - 1, 0)}
+
+
+def merge_histograms(histograms):
+    """
+    Sum equal-width histograms with the same edges, e.g. ones computed and
+    cached per time partition
+    """
+    histograms = list(histograms)
+    if not histograms:
+        return None
+
+    merged = empty_histogram(histograms[0]["edges"])
+    for histogram in histograms:
+        if histogram["edges"] != merged["edges"]:
+            raise ValueError("Only histograms with the same edges can be merged")
+        merged["counts"] = [
+            total + count
+            for total, count in zip(merged["counts"], histogram["counts"], strict=True)
+        ]
+    return merged
+
+
+def to_buckets(histogram):
+    """A histogram as a list of ``{"start", "end", "count"}`` buckets"""
+    edges = histogram["edges"]
+    return [
+        {"start": start, "end": end, "count": count}
+        for start, end, count in zip(
+            edges, edges[1:], histogram["counts"], strict=False
+        )
+    ]
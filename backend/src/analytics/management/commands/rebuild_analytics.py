@@ -0,0 +1,31 @@
+from analytics.counters import AnalyticsCounter
+from analytics.sentiment import SentimentScorer
+from analytics.text import rebuild_word_frequencies
+from django.core.management.base import BaseCommand
+from surveys.models.survey import Survey
+
+
+class Command(BaseCommand):
+    help = "Rebuild survey and question analytics counters from stored responses"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--survey",
+            action="append",
+            dest="surveys",
+            help="Survey id to rebuild (may be repeated). Defaults to all surveys.",
+        )
+
+    def handle(self, *args, **options):
+        surveys = Survey.objects.all().order_by("created_at")
+        if options["surveys"]:
+            surveys = surveys.filter(id__in=options["surveys"])
+
+        count = 0
+        for survey in surveys.iterator():
+            AnalyticsCounter.rebuild(survey)
+            SentimentScorer.rebuild(survey)
+            rebuild_word_frequencies(survey)
+            count += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt analytics for {count} surveys"))
@@ -0,0 +1,34 @@
+from analytics.distinct import DistinctCounter
+from analytics.rollups import ResponseRollup
+from django.core.management.base import BaseCommand
+from surveys.models.survey import Survey
+
+
+class Command(BaseCommand):
+    help = (
+        "Backfill the daily response rollups and distinct respondent counters "
+        "of surveys from stored responses"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--survey",
+            action="append",
+            dest="surveys",
+            help="Survey id to rebuild (may be repeated). Defaults to all surveys.",
+        )
+
+    def handle(self, *args, **options):
+        surveys = Survey.objects.all().order_by("created_at")
+        if options["surveys"]:
+            surveys = surveys.filter(id__in=options["surveys"])
+
+        count = days = 0
+        for survey in surveys.iterator():
+            days += ResponseRollup.rebuild(survey)
+            DistinctCounter.rebuild(survey)
+            count += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt {days} daily rollups for {count} surveys")
+        )
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-18 15:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="questionanalytics",
+            name="value_count",
+            field=models.IntegerField(default=0),
+        ),
+    ]
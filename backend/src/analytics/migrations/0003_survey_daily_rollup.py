@@ -0,0 +1,55 @@
+# Generated by Django 5.2.3 on 2026-10-18 16:54
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0002_questionanalytics_value_count"),
+        ("surveys", "0003_keyset_pagination_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SurveyDailyRollup",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("starts", models.IntegerField(default=0)),
+                ("completions", models.IntegerField(default=0)),
+                ("timed_completions", models.IntegerField(default=0)),
+                ("completion_seconds", models.FloatField(default=0.0)),
+                ("mobile_responses", models.IntegerField(default=0)),
+                ("desktop_responses", models.IntegerField(default=0)),
+                ("tablet_responses", models.IntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "survey",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_rollups",
+                        to="surveys.survey",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["day", "id"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("survey", "day"), name="unique_survey_daily_rollup"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.3 on 2026-10-18 17:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0003_survey_daily_rollup"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="surveyanalytics",
+            name="p90_completion_time",
+            field=models.DurationField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="surveyanalytics",
+            name="p99_completion_time",
+            field=models.DurationField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="surveyanalytics",
+            name="percentiles_stale",
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.3 on 2026-10-18 17:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0004_completion_time_percentiles"),
+        ("surveys", "0003_keyset_pagination_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="questionanalytics",
+            name="sentiment_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name="AnswerSentiment",
+            fields=[
+                (
+                    "answer",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="sentiment",
+                        serialize=False,
+                        to="surveys.answer",
+                    ),
+                ),
+                ("score", models.FloatField()),
+                ("answer_created_at", models.DateTimeField(db_index=True)),
+                (
+                    "question",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="sentiments",
+                        to="surveys.question",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["answer_created_at", "answer"],
+            },
+        ),
+    ]
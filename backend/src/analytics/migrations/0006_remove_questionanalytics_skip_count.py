@@ -0,0 +1,17 @@
+# Generated by Django 5.2.3 on 2026-10-18 18:22
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0005_answer_sentiment"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="questionanalytics",
+            name="skip_count",
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.3 on 2026-10-18 19:20
+
+from django.db import migrations, models
+from django.db.models import Avg, Count, Q
+
+
+def backfill_timed_completions(apps, schema_editor):
+    # Averages kept before the count existed also counted untimed completions
+    SurveyAnalytics = apps.get_model("analytics", "SurveyAnalytics")
+    SurveyResponse = apps.get_model("surveys", "SurveyResponse")
+    timed = Q(is_complete=True, time_taken__isnull=False)
+
+    for analytics in SurveyAnalytics.objects.all().iterator():
+        totals = SurveyResponse.objects.filter(survey_id=analytics.survey_id).aggregate(
+            timed_completions=Count("id", filter=timed),
+            average_completion_time=Avg("time_taken", filter=timed),
+        )
+        SurveyAnalytics.objects.filter(pk=analytics.pk).update(**totals)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0006_remove_questionanalytics_skip_count"),
+        ("surveys", "0004_response_completion_timing"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="surveyanalytics",
+            name="timed_completions",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_timed_completions, migrations.RunPython.noop),
+    ]
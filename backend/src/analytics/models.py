@@ -1,5 +1,6 @@
 import uuid
 
+from django.core.exceptions import ObjectDoesNotExist
 from django.db import models
 
 
@@ -13,10 +14,16 @@ class SurveyAnalytics(models.Model):
     total_views = models.IntegerField(default=0)
     total_starts = models.IntegerField(default=0)
     total_completions = models.IntegerField(default=0)
+    # Completions with a known duration, behind the average completion time
+    timed_completions = models.IntegerField(default=0)
 
     # Time metrics
     average_completion_time = models.DurationField(null=True, blank=True)
     median_completion_time = models.DurationField(null=True, blank=True)
+    p90_completion_time = models.DurationField(null=True, blank=True)
+    p99_completion_time = models.DurationField(null=True, blank=True)
+    # Completions were recorded since the percentiles were last computed
+    percentiles_stale = models.BooleanField(default=False)
 
     # Engagement metrics
     bounce_rate = models.FloatField(default=0.0)  # Started but didn't complete
@@ -51,16 +58,17 @@ class QuestionAnalytics(models.Model):
 
     # Response metrics
     total_answers = models.IntegerField(default=0)
-    skip_count = models.IntegerField(default=0)
 
     # Text analysis (for text questions)
     word_cloud_data = models.JSONField(default=dict)
     sentiment_score = models.FloatField(null=True, blank=True)
+    sentiment_count = models.IntegerField(default=0)  # Answers behind the score
 
     # Choice analysis (for multiple choice)
     choice_distribution = models.JSONField(default=dict)
 
     # Numeric analysis
+    value_count = models.IntegerField(default=0)  # Answers behind the numeric stats
     average_value = models.FloatField(null=True, blank=True)
     median_value = models.FloatField(null=True, blank=True)
     min_value = models.FloatField(null=True, blank=True)
@@ -71,5 +79,82 @@ class QuestionAnalytics(models.Model):
     def __str__(self):
         return f"Analytics for {self.question.title[:50]}"
 
+    @property
+    def skip_count(self):
+        """
+        Responses to the survey without an answer to the question, derived
+        from the survey starts rather than counted per response
+        """
+        try:
+            total_starts = self.question.survey.analytics.total_starts
+        except ObjectDoesNotExist:
+            return 0
+        return max(total_starts - self.total_answers, 0)
+
     class Meta:
         ordering = ["-updated_at", "-id"]
+
+
+class SurveyDailyRollup(models.Model):
+    """
+    Response counts of a survey for one day, kept up to date as responses are
+    written so timelines and rates are read in O(days). Starts are bucketed by
+    the day a response was started, completions by the day it was completed.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    survey = models.ForeignKey(
+        "surveys.Survey", on_delete=models.CASCADE, related_name="daily_rollups"
+    )
+    day = models.DateField()
+
+    starts = models.IntegerField(default=0)
+    completions = models.IntegerField(default=0)
+
+    # Completions with a known duration, and the sum of those durations
+    timed_completions = models.IntegerField(default=0)
+    completion_seconds = models.FloatField(default=0.0)
+
+    # Device of the respondents who started
+    mobile_responses = models.IntegerField(default=0)
+    desktop_responses = models.IntegerField(default=0)
+    tablet_responses = models.IntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Rollup for {self.survey_id} on {self.day}"
+
+    class Meta:
+        ordering = ["day", "id"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["survey", "day"], name="unique_survey_daily_rollup"
+            )
+        ]
+
+
+class AnswerSentiment(models.Model):
+    """
+    Lexicon sentiment score of a text answer, from -1 (negative) to 1
+    (positive). Answers are scored in batches after they are written, the
+    latest ``answer_created_at`` being the high-water mark of the next batch.
+    """
+
+    answer = models.OneToOneField(
+        "surveys.Answer",
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="sentiment",
+    )
+    question = models.ForeignKey(
+        "surveys.Question", on_delete=models.CASCADE, related_name="sentiments"
+    )
+    score = models.FloatField()
+    answer_created_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"Sentiment of {self.answer_id}: {self.score}"
+
+    class Meta:
+        ordering = ["answer_created_at", "answer"]
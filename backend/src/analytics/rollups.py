@@ -0,0 +1,290 @@
+import logging
+import re
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from analytics.models import SurveyDailyRollup
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Most days a zero-filled timeline may span
+MAX_TIMELINE_DAYS = 1000
+
+# Tablets are matched first: their user agents often also name Android
+TABLET_PATTERN = r"ipad|tablet|kindle|silk|playbook"
+MOBILE_PATTERN = r"mobi|iphone|ipod|android|blackberry|opera mini|windows phone"
+
+TABLET_RE = re.compile(TABLET_PATTERN, re.IGNORECASE)
+MOBILE_RE = re.compile(MOBILE_PATTERN, re.IGNORECASE)
+ANDROID_RE = re.compile("android", re.IGNORECASE)
+MOBI_RE = re.compile("mobi", re.IGNORECASE)
+
+# The same buckets as SQL conditions, for rebuilding from stored responses
+TABLET_Q = Q(user_agent__iregex=TABLET_PATTERN) | (
+    Q(user_agent__iregex="android") & ~Q(user_agent__iregex="mobi")
+)
+MOBILE_Q = ~TABLET_Q & Q(user_agent__iregex=MOBILE_PATTERN)
+
+
+class DeviceType:
+    MOBILE = "mobile"
+    TABLET = "tablet"
+    DESKTOP = "desktop"
+
+
+DEVICE_FIELDS = {
+    DeviceType.MOBILE: "mobile_responses",
+    DeviceType.TABLET: "tablet_responses",
+    DeviceType.DESKTOP: "desktop_responses",
+}
+
+
+def get_device_type(user_agent):
+    """Bucket a respondent's user agent as mobile, tablet or desktop"""
+    user_agent = user_agent or ""
+    if TABLET_RE.search(user_agent) or (
+        ANDROID_RE.search(user_agent) and not MOBI_RE.search(user_agent)
+    ):
+        return DeviceType.TABLET
+    if MOBILE_RE.search(user_agent):
+        return DeviceType.MOBILE
+    return DeviceType.DESKTOP
+
+
+def get_day(moment):
+    return timezone.localdate(moment) if moment else timezone.localdate()
+
+
+def start_deltas(survey_response):
+    device = get_device_type(survey_response.user_agent)
+    return {"starts": 1, DEVICE_FIELDS[device]: 1}
+
+
+def completion_deltas(survey_response):
+    deltas = {"completions": 1}
+    if survey_response.time_taken is not None:
+        deltas["timed_completions"] = 1
+        deltas["completion_seconds"] = survey_response.time_taken.total_seconds()
+    return deltas
+
+
+def completion_day(survey_response):
+    """
+    The day a response was completed, None if it has no completion time:
+    writes stamp ``completed_at``, so that is reported rather than guessed
+    """
+    if survey_response.completed_at is None:
+        logger.warning(
+            f"Complete response {survey_response.pk} has no completed_at, "
+            "leaving it out of the daily rollups"
+        )
+        return None
+    return get_day(survey_response.completed_at)
+
+
+class ResponseRollup:
+    """
+    Maintains SurveyDailyRollup rows with F()-expression deltas as responses
+    are written, and reads timelines and totals from them.
+    """
+
+    @staticmethod
+    def apply(survey_id, day, deltas):
+        """Add deltas to the rollup of a survey and day, creating it if needed"""
+        expressions = {
+            field: F(field) + value for field, value in deltas.items() if value
+        }
+        if not expressions:
+            return
+
+        queryset = SurveyDailyRollup.objects.filter(survey_id=survey_id, day=day)
+        if not queryset.update(**expressions):
+            SurveyDailyRollup.objects.get_or_create(survey_id=survey_id, day=day)
+            queryset.update(**expressions)
+
+    @staticmethod
+    def record_response_started(survey_response):
+        ResponseRollup.apply(
+            survey_response.survey_id,
+            get_day(survey_response.started_at),
+            start_deltas(survey_response),
+        )
+
+    @staticmethod
+    def record_response_completed(survey_response):
+        day = completion_day(survey_response)
+        if day is not None:
+            ResponseRollup.apply(
+                survey_response.survey_id, day, completion_deltas(survey_response)
+            )
+
+    @staticmethod
+    def record_responses(responses):
+        """Fold a batch of newly created responses into their daily rollups"""
+        deltas = defaultdict(Counter)
+        for survey_response in responses:
+            survey_id = survey_response.survey_id
+            deltas[survey_id, get_day(survey_response.started_at)].update(
+                start_deltas(survey_response)
+            )
+            day = survey_response.is_complete and completion_day(survey_response)
+            if day:
+                deltas[survey_id, day].update(completion_deltas(survey_response))
+
+        for (survey_id, day), day_deltas in deltas.items():
+            ResponseRollup.apply(survey_id, day, day_deltas)
+
+    @staticmethod
+    @transaction.atomic
+    def rebuild(survey):
+        """Recompute every daily rollup of a survey from its stored responses"""
+        responses = survey.responses.order_by()
+
+        starts = (
+            responses.annotate(day=TruncDate("started_at"))
+            .values("day")
+            .annotate(
+                starts=Count("id"),
+                mobile_responses=Count("id", filter=MOBILE_Q),
+                tablet_responses=Count("id", filter=TABLET_Q),
+            )
+        )
+        untimed = responses.filter(is_complete=True, completed_at=None).count()
+        if untimed:
+            logger.warning(
+                f"{untimed} complete responses of survey {survey.pk} have no "
+                "completed_at, leaving them out of the daily rollups"
+            )
+        completions = (
+            responses.filter(is_complete=True, completed_at__isnull=False)
+            .annotate(day=TruncDate("completed_at"))
+            .values("day")
+            .annotate(
+                completions=Count("id"),
+                timed_completions=Count("time_taken"),
+                total_time=Sum("time_taken"),
+            )
+        )
+
+        rollups = {}
+        for row in starts:
+            rollups[row["day"]] = SurveyDailyRollup(
+                survey=survey,
+                day=row["day"],
+                starts=row["starts"],
+                mobile_responses=row["mobile_responses"],
+                tablet_responses=row["tablet_responses"],
+                desktop_responses=(
+                    row["starts"] - row["mobile_responses"] - row["tablet_responses"]
+                ),
+            )
+        for row in completions:
+            rollup = rollups.setdefault(
+                row["day"], SurveyDailyRollup(survey=survey, day=row["day"])
+            )
+            rollup.completions = row["completions"]
+            rollup.timed_completions = row["timed_completions"]
+            rollup.completion_seconds = (
+                row["total_time"].total_seconds() if row["total_time"] else 0.0
+            )
+
+        SurveyDailyRollup.objects.filter(survey=survey).delete()
+        SurveyDailyRollup.objects.bulk_create(rollups.values())
+        return len(rollups)
+
+    @staticmethod
+    def get_rollups(survey_id, start=None, end=None):
+        queryset = SurveyDailyRollup.objects.filter(survey_id=survey_id)
+        if start is not None:
+            queryset = queryset.filter(day__gte=start)
+        if end is not None:
+            queryset = queryset.filter(day__lte=end)
+        return queryset
+
+    @staticmethod
+    def summary(survey_id, start=None, end=None):
+        """Response totals, completion rate and average completion time"""
+        totals = (
+            ResponseRollup.get_rollups(survey_id, start, end)
+            .order_by()
+            .aggregate(
+                starts=Coalesce(Sum("starts"), 0),
+                completions=Coalesce(Sum("completions"), 0),
+                timed_completions=Coalesce(Sum("timed_completions"), 0),
+                completion_seconds=Coalesce(Sum("completion_seconds"), 0.0),
+                mobile_responses=Coalesce(Sum("mobile_responses"), 0),
+                desktop_responses=Coalesce(Sum("desktop_responses"), 0),
+                tablet_responses=Coalesce(Sum("tablet_responses"), 0),
+            )
+        )
+
+        starts, completions = totals["starts"], totals["completions"]
+        average_time = None
+        if totals["timed_completions"]:
+            average_time = timedelta(
+                seconds=totals["completion_seconds"] / totals["timed_completions"]
+            )
+
+        return {
+            "total_responses": starts,
+            "completed_responses": completions,
+            "completion_rate": (
+                round(completions / starts * 100, 2) if starts > 0 else 0.0
+            ),
+            "average_completion_time": average_time,
+            "devices": {
+                device: totals[field] for device, field in DEVICE_FIELDS.items()
+            },
+        }
+
+    @staticmethod
+    def timeline(survey_id, start=None, end=None):
+        """
+        Starts and completions per day, oldest first. Days without responses
+        are filled with zeros when the range is bounded on both ends, which
+        may span at most MAX_TIMELINE_DAYS.
+        """
+        if start is not None and end is not None:
+            if (end - start).days >= MAX_TIMELINE_DAYS:
+                raise ValueError(f"Timeline spans more than {MAX_TIMELINE_DAYS} days")
+
+        rows = ResponseRollup.get_rollups(survey_id, start, end).values(
+            "day", "starts", "completions", "timed_completions", "completion_seconds"
+        )
+        days = {
+            row["day"]: {
+                "day": row["day"],
+                "starts": row["starts"],
+                "completions": row["completions"],
+                "average_completion_seconds": (
+                    round(row["completion_seconds"] / row["timed_completions"], 2)
+                    if row["timed_completions"]
+                    else None
+                ),
+            }
+            for row in rows
+        }
+
+        if start is None or end is None:
+            return [days[day] for day in sorted(days)]
+
+        timeline = []
+        day = start
+        while day <= end:
+            timeline.append(
+                days.get(
+                    day,
+                    {
+                        "day": day,
+                        "starts": 0,
+                        "completions": 0,
+                        "average_completion_seconds": None,
+                    },
+                )
+            )
+            day += timedelta(days=1)
+        return timeline
@@ -0,0 +1,272 @@
+import math
+from collections import defaultdict
+from datetime import timedelta
+
+from analytics.models import AnswerSentiment, QuestionAnalytics
+from analytics.text import get_words
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Count, F, FloatField, Max, Value
+from django.db.models.functions import Coalesce
+from surveys.models.answer import Answer
+from surveys.models.question import FieldType
+
+
+def _valences(score, words):
+    return dict.fromkeys(words.split(), score)
+
+
+# Valence of opinion words, from -4 (most negative) to 4 (most positive)
+LEXICON = {
+    **_valences(
+        4,
+        """
+        amazing awesome brilliant excellent exceptional fantastic flawless
+        incredible love loved loves outstanding perfect phenomenal superb
+        wonderful
+        """,
+    ),
+    **_valences(
+        3,
+        """
+        beautiful delight delighted delightful enjoy enjoyed enjoyable
+        excited favorite favourite glad great happy impressed impressive
+        lovely pleased recommend recommended satisfied thank thanks
+        """,
+    ),
+    **_valences(
+        2,
+        """
+        appreciate appreciated best better clean clear comfortable convenient
+        easy efficient fast friendly fun good helpful intuitive kind like
+        liked nice pleasant polite quick reliable responsive simple smooth
+        useful valuable worth
+        """,
+    ),
+    **_valences(
+        1,
+        """
+        adequate decent fair fine improved improvement okay ok reasonable
+        solid sufficient
+        """,
+    ),
+    **_valences(
+        -1,
+        """
+        average confusing complicated delay delayed expensive lacking limited
+        mediocre missing odd overpriced problem problems slow unclear unsure
+        wait waiting
+        """,
+    ),
+    **_valences(
+        -2,
+        """
+        annoyed annoying bad bug buggy broken difficult disappointed
+        disappointing dislike error errors fail failed fails frustrated
+        frustrating hard issue issues lost poor rude sad unhappy unhelpful
+        unreliable unusable useless worse wrong
+        """,
+    ),
+    **_valences(
+        -3,
+        """
+        angry awful crash crashed crashes dreadful hate hated horrible
+        ridiculous scam terrible waste
+        """,
+    ),
+    **_valences(-4, "abysmal atrocious disgusting pathetic worst"),
+}
+
+# A negation flips the valence of the next opinion word within a few words
+NEGATIONS = frozenset(
+    """
+    not no never none nothing neither nor cannot can't don't doesn't didn't
+    isn't wasn't aren't weren't won't wouldn't shouldn't couldn't haven't
+    hasn't hadn't without
+    """.split()
+)
+NEGATION_WINDOW = 3
+NEGATION_FACTOR = -0.74
+
+# Degree adverbs scaling the next opinion word
+INTENSIFIERS = {
+    "very": 1.3,
+    "really": 1.3,
+    "so": 1.2,
+    "too": 1.2,
+    "extremely": 1.5,
+    "incredibly": 1.5,
+    "absolutely": 1.5,
+    "totally": 1.4,
+    "super": 1.4,
+    "quite": 1.1,
+    "slightly": 0.6,
+    "somewhat": 0.7,
+    "barely": 0.5,
+    "bit": 0.7,
+}
+
+# Normalizes a summed valence into [-1, 1]: score / sqrt(score^2 + alpha)
+NORMALIZATION_ALPHA = 15
+
+POSITIVE_THRESHOLD = 0.05
+NEGATIVE_THRESHOLD = -0.05
+
+
+def score_text(text):
+    """Sentiment of a text from -1 to 1, 0 when it has no opinion words"""
+    total = 0.0
+    negation = 0
+    intensity = 1.0
+    for word in get_words(text):
+        valence = LEXICON.get(word)
+        if valence is None:
+            if word in NEGATIONS:
+                negation = NEGATION_WINDOW
+            elif word in INTENSIFIERS:
+                intensity = INTENSIFIERS[word]
+            else:
+                negation = max(negation - 1, 0)
+            continue
+
+        valence *= intensity
+        if negation:
+            valence *= NEGATION_FACTOR
+        total += valence
+        negation, intensity = 0, 1.0
+
+    if not total:
+        return 0.0
+    return total / math.sqrt(total * total + NORMALIZATION_ALPHA)
+
+
+def get_sentiment_label(score):
+    if score >= POSITIVE_THRESHOLD:
+        return "positive"
+    if score <= NEGATIVE_THRESHOLD:
+        return "negative"
+    return "neutral"
+
+
+class SentimentScorer:
+    """
+    Scores new text answers in batches into AnswerSentiment rows and keeps
+    the average score of each question (``QuestionAnalytics.sentiment_score``)
+    up to date with F()-expression deltas.
+    """
+
+    @staticmethod
+    def get_high_water_mark():
+        """Creation time of the latest answer scored, None before any"""
+        return AnswerSentiment.objects.aggregate(latest=Max("answer_created_at"))[
+            "latest"
+        ]
+
+    @staticmethod
+    def get_pending_answers(since=None):
+        answers = (
+            Answer.objects.filter(
+                question__field_type=FieldType.TEXT, sentiment__isnull=True
+            )
+            .exclude(text_answer="")
+            .order_by("created_at", "id")
+        )
+        if since is not None:
+            overlap = timedelta(seconds=settings.SENTIMENT_HIGH_WATER_OVERLAP)
+            answers = answers.filter(created_at__gte=since - overlap)
+        return answers
+
+    @staticmethod
+    def score_batch(since=None, batch_size=None):
+        """
+        Score up to ``batch_size`` unscored answers created after ``since``
+        (less the overlap) and return how many were scored. Answers being
+        scored by a concurrent batch are locked and skipped.
+        """
+        batch_size = batch_size or settings.SENTIMENT_BATCH_SIZE
+
+        with transaction.atomic():
+            rows = list(
+                SentimentScorer.get_pending_answers(since)
+                .select_for_update(skip_locked=True, of=("self",))
+                .values_list("id", "question_id", "created_at", "text_answer")[
+                    :batch_size
+                ]
+            )
+
+            sentiments = []
+            totals = defaultdict(lambda: [0, 0.0])
+            for answer_id, question_id, created_at, text in rows:
+                score = score_text(text)
+                sentiments.append(
+                    AnswerSentiment(
+                        answer_id=answer_id,
+                        question_id=question_id,
+                        score=score,
+                        answer_created_at=created_at,
+                    )
+                )
+                totals[question_id][0] += 1
+                totals[question_id][1] += score
+
+            AnswerSentiment.objects.bulk_create(sentiments)
+            SentimentScorer.record_scores(totals)
+
+        return len(rows)
+
+    @staticmethod
+    def record_scores(totals):
+        """Fold ``{question_id: [count, score sum]}`` into question averages"""
+        QuestionAnalytics.objects.bulk_create(
+            [QuestionAnalytics(question_id=question_id) for question_id in totals],
+            ignore_conflicts=True,
+        )
+        for question_id, (count, score_sum) in totals.items():
+            QuestionAnalytics.objects.filter(question_id=question_id).update(
+                sentiment_score=(
+                    Coalesce(F("sentiment_score"), Value(0.0)) * F("sentiment_count")
+                    + Value(score_sum)
+                )
+                / (F("sentiment_count") + Value(count)),
+                sentiment_count=F("sentiment_count") + count,
+            )
+
+    @staticmethod
+    def run(batch_size=None):
+        """Score every answer written since the last run, batch by batch"""
+        batch_size = batch_size or settings.SENTIMENT_BATCH_SIZE
+        since = SentimentScorer.get_high_water_mark()
+
+        scored = 0
+        while True:
+            count = SentimentScorer.score_batch(since, batch_size)
+            scored += count
+            if count < batch_size:
+                return scored
+
+    @staticmethod
+    def rebuild(survey):
+        """
+        Recompute the question averages of a survey from the stored scores,
+        dropping deleted answers
+        """
+        averages = {
+            row["question_id"]: row
+            for row in AnswerSentiment.objects.filter(question__survey=survey)
+            .order_by()
+            .values("question_id")
+            .annotate(
+                average=Avg("score", output_field=FloatField()), count=Count("answer")
+            )
+        }
+        for question_id in survey.questions.filter(
+            field_type=FieldType.TEXT
+        ).values_list("id", flat=True):
+            row = averages.get(question_id, {"average": None, "count": 0})
+            QuestionAnalytics.objects.update_or_create(
+                question_id=question_id,
+                defaults={
+                    "sentiment_score": row["average"],
+                    "sentiment_count": row["count"],
+                },
+            )
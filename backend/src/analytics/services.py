@@ -1,9 +1,52 @@
 from collections import Counter, defaultdict
 from datetime import timedelta
 
-from django.db.models import Avg, Count, F, Max, Min, StdDev
+from analytics.aggregation import (
+    CHOICE_FIELD_TYPES,
+    EMPTY_QUESTION_STATS,
+    TEXT_FIELD_TYPES,
+    SurveyAggregation,
+)
+from analytics.funnel import get_funnel
+from analytics.histograms import (
+    DEFAULT_HISTOGRAM_BUCKETS,
+    HistogramMode,
+    get_edges,
+    to_buckets,
+)
+from analytics.models import QuestionAnalytics
+from analytics.rollups import ResponseRollup
+from analytics.sentiment import get_sentiment_label
+from analytics.text import get_word_cloud
+from django.db.models import Count
 from django.utils import timezone
-from surveys.models.answer import Answer
+from surveys.models.question import FieldType, QuestionOption
+
+# Value of the bucket collecting choices which match none of the options
+OTHER_OPTION = "other"
+
+
+def get_choice_options(question, question_options):
+    """
+    Options of a choice question as ``{"value", "label", "is_other"}``, from
+    its QuestionOption rows or else its ``options`` list, which may hold plain
+    values or ``{"value", "label"}`` objects
+    """
+    if question_options:
+        return [
+            {"value": option.value, "label": option.text, "is_other": option.is_other}
+            for option in question_options
+        ]
+
+    options = []
+    for option in question.options or []:
+        if isinstance(option, dict):
+            value = str(option.get("value", option.get("label", "")))
+            label = option.get("label", option.get("text", value))
+        else:
+            value = label = str(option)
+        options.append({"value": value, "label": label, "is_other": False})
+    return options
 
 
 class AnalyticsService:
@@ -15,28 +58,14 @@ class AnalyticsService:
     def get_response_analytics(self):
         """Get comprehensive response analytics"""
         responses = self.survey.responses.all()
-        completed_responses = responses.filter(is_complete=True)
 
-        # Basic metrics
-        total_responses = responses.count()
-        completed_count = completed_responses.count()
-        completion_rate = (
-            (completed_count / total_responses * 100) if total_responses > 0 else 0
-        )
-
-        # Time-based analytics
-        avg_completion_time = completed_responses.aggregate(
-            avg_time=Avg("completion_time")
-        )["avg_time"]
+        # Totals, rates and the timeline come from the daily rollups
+        summary = ResponseRollup.summary(self.survey.id)
 
         # Response timeline (last 30 days)
-        thirty_days_ago = timezone.now() - timedelta(days=30)
-        daily_responses = (
-            responses.filter(submitted_at__gte=thirty_days_ago)
-            .extra(select={"day": "date(submitted_at)"})
-            .values("day")
-            .annotate(count=Count("id"))
-            .order_by("day")
+        today = timezone.localdate()
+        daily_responses = ResponseRollup.timeline(
+            self.survey.id, today - timedelta(days=29), today
         )
 
         # Device/User agent analysis
@@ -47,23 +76,61 @@ class AnalyticsService:
         )
 
         return {
-            "total_responses": total_responses,
-            "completed_responses": completed_count,
-            "completion_rate": round(completion_rate, 2),
-            "average_completion_time": avg_completion_time,
-            "daily_responses": list(daily_responses),
+            **summary,
+            "daily_responses": daily_responses,
             "top_user_agents": list(user_agents),
             "abandonment_points": self._get_abandonment_points(),
         }
 
-    def get_question_analytics(self):
-        """Get detailed analytics for each question"""
+    def get_question_analytics(
+        self, histogram_mode=HistogramMode.WIDTH, buckets=DEFAULT_HISTOGRAM_BUCKETS
+    ):
+        """
+        Get detailed analytics for each question. Number answers and text
+        lengths are bucketed into ``buckets`` equal-width or quantile buckets.
+        """
         question_analytics = []
 
-        for question in self.survey.questions.all():
-            answers = Answer.objects.filter(question=question)
-            total_answers = answers.count()
-            total_responses = self.survey.responses.count()
+        questions = self.survey.questions.all()
+        total_responses = self.survey.responses.count()
+
+        aggregation = SurveyAggregation(self.survey)
+        question_stats = aggregation.question_stats()
+        distributions = aggregation.value_distributions()
+
+        histograms = self._get_histograms(
+            aggregation, questions, question_stats, histogram_mode, buckets
+        )
+
+        # Choice tallies and the options to map them onto, only fetched when
+        # the survey has choice questions
+        choice_counts, choice_options = {}, defaultdict(list)
+        choice_ids = [q.id for q in questions if q.field_type in CHOICE_FIELD_TYPES]
+        if choice_ids:
+            choice_counts = aggregation.choice_counts()
+            for option in QuestionOption.objects.filter(question_id__in=choice_ids):
+                choice_options[option.question_id].append(option)
+
+        # Word frequencies and sentiment stored by the text analytics batch jobs
+        text_analytics = {}
+        text_ids = [q.id for q in questions if q.field_type == FieldType.TEXT]
+        if text_ids:
+            text_analytics = {
+                row["question_id"]: row
+                for row in QuestionAnalytics.objects.filter(
+                    question_id__in=text_ids
+                ).values(
+                    "question_id",
+                    "word_cloud_data",
+                    "sentiment_score",
+                    "sentiment_count",
+                )
+            }
+
+        for question in questions:
+            stats = question_stats.get(question.id, EMPTY_QUESTION_STATS)
+            distribution = distributions.get(question.id, [])
+            total_answers = stats["total_answers"]
 
             analytics = {
                 "question_id": question.id,
@@ -84,90 +151,165 @@ class AnalyticsService:
 
             # Type-specific analytics
             if question.field_type == "T":
-                analytics.update(self._analyze_text_question(question, answers))
+                analytics.update(
+                    self._analyze_text_question(
+                        stats,
+                        histograms.get(question.id, []),
+                        text_analytics.get(question.id),
+                    )
+                )
             elif question.field_type == "N":
-                analytics.update(self._analyze_number_question(question, answers))
+                analytics.update(
+                    self._analyze_number_question(
+                        stats, histograms.get(question.id, [])
+                    )
+                )
             elif question.field_type in ["SC", "MC"]:
-                analytics.update(self._analyze_choice_question(question, answers))
+                analytics.update(
+                    self._analyze_choice_question(
+                        question,
+                        choice_counts.get(question.id, {}),
+                        choice_options[question.id],
+                    )
+                )
             elif question.field_type == "R":
-                analytics.update(self._analyze_rating_question(question, answers))
+                analytics.update(
+                    self._analyze_rating_question(question, stats, distribution)
+                )
 
             question_analytics.append(analytics)
 
         return question_analytics
 
-    def _analyze_text_question(self, question, answers):
-        """Analyze text-based questions"""
-        text_answers = answers.filter(text_answer__isnull=False)
+    def _get_histograms(self, aggregation, questions, question_stats, mode, buckets):
+        """
+        Buckets of the number answers and text lengths of every question, by
+        question id, in one query. Equal-width edges span the minimum and
+        maximum already computed by question_stats.
+        """
+        if mode == HistogramMode.QUANTILE:
+            question_ids = [
+                question.id
+                for question in questions
+                if question.field_type in (FieldType.NUMBER, *TEXT_FIELD_TYPES)
+            ]
+            return aggregation.quantile_histograms(question_ids, buckets)
+
+        edges = {}
+        for question in questions:
+            stats = question_stats.get(question.id, EMPTY_QUESTION_STATS)
+            if question.field_type == FieldType.NUMBER:
+                edges[question.id] = get_edges(
+                    stats["min_value"], stats["max_value"], buckets
+                )
+            elif question.field_type in TEXT_FIELD_TYPES:
+                edges[question.id] = get_edges(
+                    stats["min_length"], stats["max_length"], buckets, integer=True
+                )
 
-        if not text_answers.exists():
-            return {"word_cloud": [], "avg_length": 0, "sentiment": None}
+        return {
+            question_id: to_buckets(histogram)
+            for question_id, histogram in aggregation.histograms(edges).items()
+        }
 
-        # Word frequency analysis
-        all_text = " ".join([answer.text_answer for answer in text_answers])
-        words = all_text.lower().split()
-        word_freq = Counter(words)
-        common_words = word_freq.most_common(20)
+    def _analyze_text_question(self, stats, length_buckets, stored):
+        """
+        Analyze text-based questions, ``stored`` being their QuestionAnalytics
+        values (None before the batch jobs first ran)
+        """
+        if not stats["text_answers"]:
+            return {
+                "word_cloud": [],
+                "bigrams": [],
+                "avg_length": 0,
+                "sentiment": None,
+            }
 
-        # Average length
-        avg_length = (
-            text_answers.aggregate(avg_len=Avg(F("text_answer__length")))["avg_len"]
-            or 0
-        )
+        # Word and bigram frequencies, counted incrementally by a batch job
+        word_cloud = get_word_cloud(stored["word_cloud_data"] if stored else {})
 
         return {
-            "word_cloud": common_words,
-            "avg_length": round(avg_length, 2),
-            "response_lengths": self._get_length_distribution(text_answers),
+            **word_cloud,
+            "sentiment": self._get_sentiment(stored),
+            "avg_length": round(stats["avg_length"] or 0, 2),
+            "response_lengths": length_buckets,
         }
 
-    def _analyze_number_question(self, question, answers):
-        """Analyze numerical questions"""
-        number_answers = answers.filter(number_answer__isnull=False)
-
-        if not number_answers.exists():
-            return {"statistics": {}, "distribution": []}
+    def _get_sentiment(self, stored):
+        """Average sentiment of the answers scored by the sentiment batch job"""
+        if not stored or not stored["sentiment_count"]:
+            return None
 
-        stats = number_answers.aggregate(
-            min_val=Min("number_answer"),
-            max_val=Max("number_answer"),
-            avg_val=Avg("number_answer"),
-            std_dev=StdDev("number_answer"),
-        )
+        score = stored["sentiment_score"]
+        return {
+            "score": round(score, 3),
+            "label": get_sentiment_label(score),
+            "scored_answers": stored["sentiment_count"],
+        }
 
-        # Create distribution buckets
-        distribution = self._create_number_distribution(number_answers)
+    def _analyze_number_question(self, stats, distribution):
+        """Analyze numerical questions, ``distribution`` being their buckets"""
+        if not stats["number_answers"]:
+            return {"statistics": {}, "distribution": []}
 
         return {
             "statistics": {
-                "min": float(stats["min_val"] or 0),
-                "max": float(stats["max_val"] or 0),
-                "average": round(float(stats["avg_val"] or 0), 2),
+                "min": float(stats["min_value"] or 0),
+                "max": float(stats["max_value"] or 0),
+                "average": round(float(stats["avg_value"] or 0), 2),
                 "std_deviation": round(float(stats["std_dev"] or 0), 2),
             },
             "distribution": distribution,
         }
 
-    def _analyze_choice_question(self, question, answers):
-        """Analyze single/multiple choice questions"""
-        choice_counts = defaultdict(int)
-
-        for answer in answers:
-            if answer.choice_answers:
-                for choice in answer.choice_answers:
-                    choice_counts[choice] += 1
+    def _analyze_choice_question(self, question, counts, question_options):
+        """
+        Analyze single/multiple choice questions from their selection counts,
+        in option order. Values matching no option are counted under the
+        "other" option (added when the question has none).
+        """
+        remaining = dict(counts)
+        options = get_choice_options(question, question_options)
+
+        distribution = []
+        other = None
+        for option in options:
+            entry = {
+                "option": option["value"],
+                "label": option["label"],
+                "count": remaining.pop(option["value"], 0),
+            }
+            if option["is_other"]:
+                other = entry
+            distribution.append(entry)
+
+        if not options:
+            distribution = [
+                {"option": value, "label": value, "count": count}
+                for value, count in remaining.items()
+            ]
+        elif remaining:
+            if other is None:
+                other = {"option": OTHER_OPTION, "label": "Other", "count": 0}
+                distribution.append(other)
+            other["count"] += sum(remaining.values())
+            other["other_values"] = [
+                {"value": value, "count": count}
+                for value, count in Counter(remaining).most_common(10)
+            ]
 
         # Calculate percentages
-        total_answers = sum(choice_counts.values())
+        total_answers = sum(entry["count"] for entry in distribution)
         choice_percentages = [
             {
-                "option": option,
-                "count": count,
+                **entry,
                 "percentage": (
-                    round((count / total_answers * 100), 2) if total_answers > 0 else 0
+                    round((entry["count"] / total_answers * 100), 2)
+                    if total_answers > 0
+                    else 0
                 ),
             }
-            for option, count in choice_counts.items()
+            for entry in distribution
         ]
 
         # Sort by count
@@ -179,53 +321,52 @@ class AnalyticsService:
             "least_popular": choice_percentages[-1] if choice_percentages else None,
         }
 
-    def _analyze_rating_question(self, question, answers):
+    def _analyze_rating_question(self, question, stats, distribution):
         """Analyze rating scale questions"""
-        number_answers = answers.filter(number_answer__isnull=False)
-
-        if not number_answers.exists():
+        if not stats["number_answers"]:
             return {"rating_distribution": [], "average_rating": 0}
 
-        # Rating distribution
-        rating_counts = (
-            number_answers.values("number_answer")
-            .annotate(count=Count("id"))
-            .order_by("number_answer")
-        )
-
-        avg_rating = number_answers.aggregate(avg=Avg("number_answer"))["avg"] or 0
+        avg_rating = stats["avg_value"] or 0
 
         return {
-            "rating_distribution": list(rating_counts),
+            "rating_distribution": [
+                {"number_answer": value, "count": count}
+                for value, count in distribution
+            ],
             "average_rating": round(float(avg_rating), 2),
             "rating_summary": self._get_rating_summary(avg_rating, question.scale_max),
         }
 
-    def _get_abandonment_points(self):
-        """Identify where users abandon the survey"""
-        questions = self.survey.questions.all().order_by("order")
-        abandonment_points = []
+    def _get_rating_summary(self, avg_rating, scale_max):
+        """Describe an average rating relative to the question's scale"""
+        score = (avg_rating / scale_max * 100) if scale_max else 0
 
-        total_responses = self.survey.responses.count()
+        if score >= 80:
+            label = "Excellent"
+        elif score >= 60:
+            label = "Good"
+        elif score >= 40:
+            label = "Average"
+        else:
+            label = "Poor"
 
-        for _i, question in enumerate(questions):
-            answered_count = Answer.objects.filter(question=question).count()
-            abandonment_rate = (
-                ((total_responses - answered_count) / total_responses * 100)
-                if total_responses > 0
-                else 0
-            )
-
-            abandonment_points.append(
-                {
-                    "question_order": question.order,
-                    "question_title": question.title,
-                    "abandonment_rate": round(abandonment_rate, 2),
-                    "answered_count": answered_count,
-                }
-            )
-
-        return abandonment_points
+        return {"score": round(score, 2), "label": label}
+
+    def _get_abandonment_points(self):
+        """Identify where users abandon the survey, from the drop-off funnel"""
+        funnel = get_funnel(self.survey)[0]
+
+        return [
+            {
+                "question_order": step["question_order"],
+                "question_title": step["question_title"],
+                "abandonment_rate": step["abandonment_rate"],
+                "answered_count": step["answered"],
+                "reached_count": step["reached"],
+                "dropped_count": step["dropped"],
+            }
+            for step in funnel["steps"]
+        ]
 
     def generate_report_data(self):
         """Generate comprehensive report data"""
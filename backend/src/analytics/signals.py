@@ -0,0 +1,49 @@
+from analytics.counters import AnalyticsCounter
+from analytics.distinct import DistinctCounter
+from analytics.rollups import ResponseRollup
+from django.db.models.signals import post_init, post_save
+from django.dispatch import receiver
+from surveys.models.answer import Answer
+from surveys.models.survey import SurveyResponse
+from surveys.signals import answers_bulk_created, responses_bulk_created
+
+
+@receiver(post_init, sender=SurveyResponse)
+def remember_response_completion(sender, instance, **kwargs):
+    # Lets post_save detect the transition to complete without a query
+    instance._was_complete = instance.is_complete
+
+
+@receiver(post_save, sender=SurveyResponse)
+def track_survey_response(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+
+    if created:
+        AnalyticsCounter.record_response_started(instance)
+        ResponseRollup.record_response_started(instance)
+        DistinctCounter.record_response_started(instance)
+
+    if instance.is_complete and (created or not instance._was_complete):
+        AnalyticsCounter.record_response_completed(instance)
+        ResponseRollup.record_response_completed(instance)
+
+    instance._was_complete = instance.is_complete
+
+
+@receiver(post_save, sender=Answer)
+def track_answer(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        AnalyticsCounter.record_answers([instance])
+
+
+@receiver(answers_bulk_created, sender=Answer)
+def track_bulk_answers(sender, answers, **kwargs):
+    AnalyticsCounter.record_answers(answers)
+
+
+@receiver(responses_bulk_created, sender=SurveyResponse)
+def track_bulk_responses(sender, responses, **kwargs):
+    AnalyticsCounter.record_responses(responses)
+    ResponseRollup.record_responses(responses)
+    DistinctCounter.record_responses(responses)
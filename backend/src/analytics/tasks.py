@@ -0,0 +1,36 @@
+import logging
+
+from celery import shared_task
+
+from .counters import AnalyticsCounter
+from .sentiment import SentimentScorer
+from .text import update_pending_word_frequencies
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def refresh_completion_percentiles():
+    """Recompute completion time percentiles of surveys with new completions"""
+    refreshed = AnalyticsCounter.refresh_stale_percentiles()
+    if refreshed:
+        logger.info(f"Refreshed completion time percentiles of {refreshed} surveys")
+    return {"refreshed": refreshed}
+
+
+@shared_task
+def score_answer_sentiment():
+    """Score the sentiment of text answers written since the last run"""
+    scored = SentimentScorer.run()
+    if scored:
+        logger.info(f"Scored the sentiment of {scored} text answers")
+    return {"scored": scored}
+
+
+@shared_task
+def update_word_clouds():
+    """Count the words of text answers written since the last run"""
+    updated = update_pending_word_frequencies()
+    if updated:
+        logger.info(f"Updated the word frequencies of {updated} text questions")
+    return {"updated": updated}
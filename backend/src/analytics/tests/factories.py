@@ -20,4 +20,3 @@ class QuestionAnalyticsFactory(factory.django.DjangoModelFactory):
 
     question = factory.SubFactory(QuestionFactory)
     total_answers = 7
-    skip_count = 2
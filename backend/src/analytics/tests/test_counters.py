@@ -0,0 +1,191 @@
+from datetime import timedelta
+from io import StringIO
+
+from analytics.counters import AnalyticsCounter
+from analytics.models import QuestionAnalytics, SurveyAnalytics
+from django.core.management import call_command
+from django.test import TestCase
+from surveys.models.question import FieldType
+from surveys.models.survey import SurveyResponse
+from surveys.signals import responses_bulk_created
+from surveys.tests.factories.answer_factory import AnswerFactory
+from surveys.tests.factories.question_factory import QuestionFactory
+from surveys.tests.factories.survey_factory import (
+    SurveyFactory,
+    SurveyResponseFactory,
+)
+
+
+class AnalyticsCounterTest(TestCase):
+    def setUp(self):
+        self.survey = SurveyFactory()
+        self.number_question = QuestionFactory(
+            survey=self.survey, field_type=FieldType.NUMBER, order=1
+        )
+        self.choice_question = QuestionFactory(
+            survey=self.survey,
+            field_type=FieldType.MULTIPLE_CHOICE,
+            order=2,
+            options=["red", "green", "blue"],
+        )
+
+    def submit(self, number=None, choices=None, is_complete=True):
+        response = SurveyResponseFactory(
+            survey=self.survey,
+            is_complete=is_complete,
+            time_taken=timedelta(minutes=4),
+        )
+        if number is not None:
+            AnswerFactory(
+                response=response, question=self.number_question, number_answer=number
+            )
+        if choices is not None:
+            AnswerFactory(
+                response=response, question=self.choice_question, json_answer=choices
+            )
+        return response
+
+    def test_survey_counters_are_incremented(self):
+        self.submit(number=1)
+        self.submit(number=2, is_complete=False)
+
+        analytics = SurveyAnalytics.objects.get(survey=self.survey)
+        self.assertEqual(analytics.total_starts, 2)
+        self.assertEqual(analytics.total_completions, 1)
+        self.assertEqual(analytics.completion_rate, 50.0)
+        self.assertEqual(analytics.bounce_rate, 50.0)
+        self.assertEqual(analytics.average_completion_time, timedelta(minutes=4))
+
+    def test_completion_is_counted_once(self):
+        response = self.submit(number=1, is_complete=False)
+
+        response.is_complete = True
+        response.save()
+        response.save()
+
+        analytics = SurveyAnalytics.objects.get(survey=self.survey)
+        self.assertEqual(analytics.total_completions, 1)
+        self.assertEqual(analytics.completion_rate, 100.0)
+
+    def test_average_completion_time_skips_untimed_completions(self):
+        SurveyResponseFactory(
+            survey=self.survey, is_complete=True, time_taken=timedelta(minutes=10)
+        )
+        SurveyResponseFactory(survey=self.survey, is_complete=True, time_taken=None)
+
+        # Intake batches fold timed and untimed completions together
+        batch = [
+            SurveyResponseFactory.build(
+                survey=self.survey,
+                user=None,
+                is_complete=True,
+                time_taken=timedelta(minutes=20),
+            ),
+            SurveyResponseFactory.build(
+                survey=self.survey, user=None, is_complete=True, time_taken=None
+            ),
+        ]
+        SurveyResponse.objects.bulk_create(batch)
+        responses_bulk_created.send(sender=SurveyResponse, responses=batch)
+
+        incremental = SurveyAnalytics.objects.get(survey=self.survey)
+        self.assertEqual(incremental.total_completions, 4)
+        self.assertEqual(incremental.timed_completions, 2)
+        self.assertEqual(incremental.average_completion_time, timedelta(minutes=15))
+
+        AnalyticsCounter.rebuild(self.survey)
+
+        rebuilt = SurveyAnalytics.objects.get(survey=self.survey)
+        self.assertEqual(rebuilt.timed_completions, incremental.timed_completions)
+        self.assertEqual(
+            rebuilt.average_completion_time, incremental.average_completion_time
+        )
+
+    def test_completion_percentiles(self):
+        for minutes in range(1, 11):
+            SurveyResponseFactory(
+                survey=self.survey,
+                is_complete=True,
+                time_taken=timedelta(minutes=minutes),
+            )
+        SurveyResponseFactory(survey=self.survey, is_complete=False)
+
+        analytics = SurveyAnalytics.objects.get(survey=self.survey)
+        self.assertTrue(analytics.percentiles_stale)
+        self.assertIsNone(analytics.median_completion_time)
+
+        self.assertEqual(AnalyticsCounter.refresh_stale_percentiles(), 1)
+        self.assertEqual(AnalyticsCounter.refresh_stale_percentiles(), 0)
+
+        analytics.refresh_from_db()
+        self.assertFalse(analytics.percentiles_stale)
+        self.assertEqual(analytics.median_completion_time, timedelta(minutes=5.5))
+        self.assertEqual(analytics.p90_completion_time, timedelta(minutes=9.1))
+        self.assertEqual(analytics.p99_completion_time, timedelta(minutes=9.91))
+
+    def test_question_counters_are_incremented(self):
+        self.submit(number=10, choices=["red", "blue"])
+        self.submit(number=0, choices=["red"])
+        self.submit()
+
+        number_analytics = QuestionAnalytics.objects.get(question=self.number_question)
+        self.assertEqual(number_analytics.total_answers, 2)
+        self.assertEqual(number_analytics.skip_count, 1)
+        self.assertEqual(number_analytics.min_value, 0)
+        self.assertEqual(number_analytics.max_value, 10)
+        self.assertEqual(number_analytics.average_value, 5)
+
+        choice_analytics = QuestionAnalytics.objects.get(question=self.choice_question)
+        self.assertEqual(choice_analytics.choice_distribution, {"red": 2, "blue": 1})
+
+    def test_new_responses_do_not_write_question_rows(self):
+        self.submit(number=1)
+        analytics = QuestionAnalytics.objects.get(question=self.number_question)
+
+        self.submit()
+        self.submit()
+
+        unchanged = QuestionAnalytics.objects.get(question=self.number_question)
+        self.assertEqual(unchanged.updated_at, analytics.updated_at)
+        self.assertEqual(unchanged.skip_count, 2)
+
+    def test_record_answers_batches_questions_into_one_update(self):
+        response = SurveyResponseFactory(survey=self.survey)
+        answers = [
+            AnswerFactory.build(
+                response=response, question=self.number_question, number_answer=3
+            ),
+            AnswerFactory.build(
+                response=response,
+                question=self.choice_question,
+                json_answer=["green"],
+            ),
+        ]
+        QuestionAnalytics.objects.create(question=self.number_question)
+        QuestionAnalytics.objects.create(question=self.choice_question)
+
+        with self.assertNumQueries(1):
+            AnalyticsCounter.record_answers(answers)
+
+    def test_rebuild_matches_incremental_counters(self):
+        self.submit(number=4, choices=["green"])
+        self.submit(number=8, choices=["green", "red"], is_complete=False)
+        incremental = QuestionAnalytics.objects.get(question=self.choice_question)
+
+        SurveyAnalytics.objects.all().delete()
+        QuestionAnalytics.objects.all().delete()
+        call_command(
+            "rebuild_analytics", survey=[str(self.survey.id)], stdout=StringIO()
+        )
+
+        analytics = SurveyAnalytics.objects.get(survey=self.survey)
+        self.assertEqual(analytics.total_starts, 2)
+        self.assertEqual(analytics.total_completions, 1)
+        self.assertEqual(analytics.median_completion_time, timedelta(minutes=4))
+
+        number_analytics = QuestionAnalytics.objects.get(question=self.number_question)
+        self.assertEqual(number_analytics.total_answers, 2)
+        self.assertEqual(number_analytics.average_value, 6)
+
+        rebuilt = QuestionAnalytics.objects.get(question=self.choice_question)
+        self.assertEqual(rebuilt.choice_distribution, incremental.choice_distribution)
@@ -0,0 +1,65 @@
+from datetime import timedelta
+
+from analytics.distinct import DistinctCounter
+from analytics.rollups import MAX_TIMELINE_DAYS
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from surveys.models.survey import SurveyResponse
+from surveys.tests.factories.survey_factory import (
+    SurveyFactory,
+    SurveyResponseFactory,
+    UserFactory,
+)
+
+
+class DistinctCounterTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.survey = SurveyFactory()
+        self.user = UserFactory()
+        self.today = timezone.localdate()
+
+    def respond(self, **data):
+        return SurveyResponseFactory(survey=self.survey, **data)
+
+    def test_unique_values_are_counted_once(self):
+        self.respond(user=self.user, ip_address="10.0.0.1", country="France")
+        self.respond(user=self.user, ip_address="10.0.0.2", country="france")
+        self.respond(user=None, session_key="abc", ip_address="10.0.0.1", country="")
+        self.respond(user=None, session_key="abc", ip_address=None, country="Peru")
+
+        counts = DistinctCounter.counts(self.survey.id)
+
+        self.assertEqual(counts, {"respondents": 2, "ips": 2, "countries": 2})
+
+    def test_date_ranges_are_merged(self):
+        older = self.respond(user=self.user, ip_address="10.0.0.1")
+        self.respond(user=self.user, ip_address="10.0.0.2")
+        self.respond(user=None, ip_address="10.0.0.3")
+        yesterday = self.today - timedelta(days=1)
+        # The counters bucket responses by the day they were recorded
+        SurveyResponse.objects.filter(id=older.id).update(
+            started_at=timezone.now() - timedelta(days=1)
+        )
+        DistinctCounter.rebuild(self.survey)
+
+        counts = DistinctCounter.counts(self.survey.id, yesterday, yesterday)
+        self.assertEqual((counts["respondents"], counts["ips"]), (1, 1))
+
+        counts = DistinctCounter.counts(self.survey.id, yesterday, self.today)
+        self.assertEqual((counts["respondents"], counts["ips"]), (2, 3))
+
+        with self.assertRaises(ValueError):
+            DistinctCounter.counts(
+                self.survey.id,
+                self.today - timedelta(days=MAX_TIMELINE_DAYS),
+                self.today,
+            )
+
+    def test_counts_do_not_query_responses(self):
+        self.respond()
+
+        with self.assertNumQueries(0):
+            counts = DistinctCounter.counts(self.survey.id)
+        self.assertEqual(counts["respondents"], 1)
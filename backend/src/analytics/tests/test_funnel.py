@@ -0,0 +1,96 @@
+from analytics.funnel import FunnelSegment, get_funnel
+from analytics.services import AnalyticsService
+from django.test import TestCase
+from surveys.tests.factories.answer_factory import AnswerFactory
+from surveys.tests.factories.question_factory import QuestionFactory
+from surveys.tests.factories.survey_factory import (
+    SurveyFactory,
+    SurveyResponseFactory,
+)
+
+IPHONE = "Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) Mobile/15E148"
+DESKTOP = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/126.0 Safari/537.36"
+
+
+class FunnelTest(TestCase):
+    def setUp(self):
+        self.survey = SurveyFactory()
+        self.questions = [
+            QuestionFactory(survey=self.survey, title=f"Q{order}", order=order)
+            for order in (1, 2, 3)
+        ]
+
+        # Furthest question answered: 3 (complete), 3, 2 (skipping 1), 1, none
+        self.respond([1, 2, 3], is_complete=True, country="IN")
+        self.respond([1, 3], user_agent=IPHONE, country="IN")
+        self.respond([2], user_agent=IPHONE, country="US")
+        self.respond([1], country="US")
+        self.respond([], country="")
+
+    def respond(self, orders, is_complete=False, user_agent=DESKTOP, country=""):
+        response = SurveyResponseFactory(
+            survey=self.survey,
+            is_complete=is_complete,
+            user_agent=user_agent,
+            country=country,
+        )
+        for order in orders:
+            AnswerFactory(
+                response=response,
+                question=self.questions[order - 1],
+                text_answer="answer",
+            )
+
+    def get_steps(self, funnel):
+        return [
+            (step["reached"], step["answered"], step["dropped"])
+            for step in funnel["steps"]
+        ]
+
+    def test_funnel(self):
+        with self.assertNumQueries(2):
+            funnels = get_funnel(self.survey)
+
+        self.assertEqual(len(funnels), 1)
+        funnel = funnels[0]
+        self.assertEqual(
+            (funnel["responses"], funnel["completed"], funnel["no_answers"]),
+            (5, 1, 1),
+        )
+        self.assertEqual(self.get_steps(funnel), [(4, 3, 1), (3, 2, 1), (2, 2, 1)])
+        self.assertEqual(funnel["steps"][0]["abandonment_rate"], 25)
+
+    def test_segmented_funnels(self):
+        funnels = {
+            funnel["segment"]: funnel
+            for funnel in get_funnel(self.survey, FunnelSegment.DEVICE)
+        }
+
+        self.assertEqual(set(funnels), {"desktop", "mobile"})
+        self.assertEqual(
+            self.get_steps(funnels["mobile"]), [(2, 1, 0), (2, 1, 1), (1, 1, 1)]
+        )
+
+        funnels = {
+            funnel["segment"]: funnel
+            for funnel in get_funnel(self.survey, FunnelSegment.COUNTRY)
+        }
+        self.assertEqual(
+            {segment: funnel["responses"] for segment, funnel in funnels.items()},
+            {"IN": 2, "US": 2, None: 1},
+        )
+
+    def test_abandonment_points(self):
+        points = AnalyticsService(self.survey)._get_abandonment_points()
+
+        self.assertEqual(
+            [(point["question_title"], point["dropped_count"]) for point in points],
+            [("Q1", 1), ("Q2", 1), ("Q3", 1)],
+        )
+        self.assertEqual(points[2]["abandonment_rate"], 50)
+
+    def test_survey_without_responses(self):
+        funnel = get_funnel(SurveyFactory())[0]
+
+        self.assertEqual(funnel["responses"], 0)
+        self.assertEqual(funnel["steps"], [])
@@ -0,0 +1,115 @@
+from datetime import timedelta
+
+from analytics.aggregation import SurveyAggregation
+from analytics.histograms import get_edges, merge_histograms, to_buckets
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from surveys.models.answer import Answer
+from surveys.models.question import FieldType
+from surveys.tests.factories.answer_factory import AnswerFactory
+from surveys.tests.factories.question_factory import QuestionFactory
+from surveys.tests.factories.survey_factory import (
+    SurveyFactory,
+    SurveyResponseFactory,
+)
+
+
+class EdgesTest(SimpleTestCase):
+    def test_equal_width_edges(self):
+        self.assertEqual(get_edges(0, 10, 5), [0, 2, 4, 6, 8, 10])
+        self.assertEqual(get_edges(3, 3, 5), [3, 4])
+        self.assertEqual(get_edges(None, None), [])
+
+    def test_integer_edges(self):
+        # Lengths 1 to 25 in whole-number buckets of 3, the last ending at 26
+        self.assertEqual(get_edges(1, 25, 10, integer=True), list(range(1, 29, 3)))
+        self.assertEqual(get_edges(4, 6, 10, integer=True), [4, 5, 6, 7])
+
+    def test_merge_histograms(self):
+        merged = merge_histograms(
+            [
+                {"edges": [0, 5, 10], "counts": [1, 2]},
+                {"edges": [0, 5, 10], "counts": [3, 0]},
+            ]
+        )
+
+        self.assertEqual(merged, {"edges": [0, 5, 10], "counts": [4, 2]})
+        self.assertEqual(
+            to_buckets(merged),
+            [
+                {"start": 0, "end": 5, "count": 4},
+                {"start": 5, "end": 10, "count": 2},
+            ],
+        )
+        with self.assertRaises(ValueError):
+            merge_histograms([merged, {"edges": [0, 10], "counts": [6]}])
+
+
+class HistogramQueryTest(TestCase):
+    def setUp(self):
+        self.survey = SurveyFactory()
+        self.number_question = QuestionFactory(
+            survey=self.survey, field_type=FieldType.NUMBER, order=1
+        )
+        self.text_question = QuestionFactory(
+            survey=self.survey, field_type=FieldType.TEXT, order=2
+        )
+        self.aggregation = SurveyAggregation(self.survey)
+
+        for value, text in [(1, "ok"), (4, "fine"), (5, ""), (9, "very good")]:
+            response = SurveyResponseFactory(survey=self.survey)
+            AnswerFactory(
+                response=response, question=self.number_question, number_answer=value
+            )
+            AnswerFactory(
+                response=response, question=self.text_question, text_answer=text
+            )
+
+    def test_width_buckets_in_one_query(self):
+        edges = {
+            self.number_question.id: [0, 5, 10],
+            self.text_question.id: get_edges(2, 9, 4, integer=True),
+        }
+
+        with self.assertNumQueries(1):
+            histograms = self.aggregation.histograms(edges)
+
+        self.assertEqual(histograms[self.number_question.id]["counts"], [2, 2])
+        self.assertEqual(
+            histograms[self.text_question.id],
+            {"edges": [2, 4, 6, 8, 10], "counts": [1, 1, 0, 1]},
+        )
+
+    def test_time_partitions_merge_into_the_whole(self):
+        earlier = timezone.now() - timedelta(days=2)
+        Answer.objects.filter(
+            question=self.number_question, number_answer__lt=5
+        ).update(created_at=earlier)
+        split = timezone.now() - timedelta(days=1)
+        edges = {self.number_question.id: get_edges(1, 9, 4)}
+
+        partitions = [
+            self.aggregation.histograms(edges, end=split),
+            self.aggregation.histograms(edges, start=split),
+        ]
+
+        self.assertEqual(partitions[0][self.number_question.id]["counts"], [1, 1, 0, 0])
+        self.assertEqual(
+            merge_histograms(
+                partition[self.number_question.id] for partition in partitions
+            ),
+            self.aggregation.histograms(edges)[self.number_question.id],
+        )
+
+    def test_quantile_buckets(self):
+        histograms = self.aggregation.quantile_histograms(
+            [self.number_question.id], buckets=2
+        )
+
+        self.assertEqual(
+            histograms[self.number_question.id],
+            [
+                {"start": 1, "end": 4, "count": 2},
+                {"start": 5, "end": 9, "count": 2},
+            ],
+        )
@@ -0,0 +1,153 @@
+from datetime import timedelta
+from io import StringIO
+
+from analytics.models import SurveyDailyRollup
+from analytics.rollups import (
+    MAX_TIMELINE_DAYS,
+    DeviceType,
+    ResponseRollup,
+    get_device_type,
+)
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from surveys.models.survey import SurveyResponse
+from surveys.tests.factories.survey_factory import (
+    SurveyFactory,
+    SurveyResponseFactory,
+)
+
+IPHONE = "Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) Mobile/15E148"
+IPAD = "Mozilla/5.0 (iPad; CPU OS 17_0 like Mac OS X) Mobile/15E148"
+ANDROID_TABLET = "Mozilla/5.0 (Linux; Android 14; SM-X710) Safari/537.36"
+DESKTOP = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/126.0 Safari/537.36"
+
+
+class DeviceTypeTest(SimpleTestCase):
+    def test_device_buckets(self):
+        self.assertEqual(get_device_type(IPHONE), DeviceType.MOBILE)
+        self.assertEqual(get_device_type(IPAD), DeviceType.TABLET)
+        self.assertEqual(get_device_type(ANDROID_TABLET), DeviceType.TABLET)
+        self.assertEqual(get_device_type(DESKTOP), DeviceType.DESKTOP)
+        self.assertEqual(get_device_type(""), DeviceType.DESKTOP)
+
+
+class ResponseRollupTest(TestCase):
+    def setUp(self):
+        self.survey = SurveyFactory()
+        self.today = timezone.localdate()
+
+    def submit(self, user_agent=DESKTOP, is_complete=True, minutes=4):
+        started_at = timezone.now()
+        return SurveyResponseFactory(
+            survey=self.survey,
+            user_agent=user_agent,
+            is_complete=is_complete,
+            started_at=started_at,
+            completed_at=started_at if is_complete else None,
+            time_taken=timedelta(minutes=minutes) if is_complete else None,
+        )
+
+    def test_rollup_is_maintained_on_write(self):
+        self.submit(IPHONE, minutes=2)
+        self.submit(IPAD, minutes=6)
+        response = self.submit(is_complete=False)
+
+        # Completed ten minutes after it was started
+        response.started_at -= timedelta(minutes=10)
+        response.is_complete = True
+        response.save()
+
+        rollup = SurveyDailyRollup.objects.get(survey=self.survey, day=self.today)
+        self.assertEqual((rollup.starts, rollup.completions), (3, 3))
+        self.assertEqual(rollup.timed_completions, 3)
+        self.assertAlmostEqual(rollup.completion_seconds, 1080, delta=1)
+        self.assertEqual(
+            (
+                rollup.mobile_responses,
+                rollup.tablet_responses,
+                rollup.desktop_responses,
+            ),
+            (1, 1, 1),
+        )
+
+    def test_completions_are_not_bucketed_by_start(self):
+        response = self.submit()
+        yesterday = timezone.now() - timedelta(days=1)
+        SurveyResponse.objects.filter(id=response.id).update(
+            started_at=yesterday, completed_at=None
+        )
+
+        with self.assertLogs("analytics.rollups", "WARNING"):
+            ResponseRollup.rebuild(self.survey)
+
+        rollup = SurveyDailyRollup.objects.get(survey=self.survey)
+        self.assertEqual(rollup.day, self.today - timedelta(days=1))
+        self.assertEqual((rollup.starts, rollup.completions), (1, 0))
+
+    def test_summary_and_timeline(self):
+        self.submit(minutes=2)
+        self.submit(minutes=4)
+        self.submit(is_complete=False)
+        SurveyDailyRollup.objects.create(
+            survey=self.survey, day=self.today - timedelta(days=2), starts=1
+        )
+
+        summary = ResponseRollup.summary(self.survey.id)
+        self.assertEqual(summary["total_responses"], 4)
+        self.assertEqual(summary["completed_responses"], 2)
+        self.assertEqual(summary["completion_rate"], 50.0)
+        self.assertEqual(summary["average_completion_time"], timedelta(minutes=3))
+
+        timeline = ResponseRollup.timeline(
+            self.survey.id, self.today - timedelta(days=2), self.today
+        )
+        self.assertEqual(
+            [(row["starts"], row["completions"]) for row in timeline],
+            [(1, 0), (0, 0), (3, 2)],
+        )
+        self.assertEqual(timeline[-1]["average_completion_seconds"], 180)
+
+        with self.assertRaises(ValueError):
+            ResponseRollup.timeline(
+                self.survey.id,
+                self.today - timedelta(days=MAX_TIMELINE_DAYS),
+                self.today,
+            )
+
+    def test_reads_do_not_touch_responses(self):
+        self.submit()
+
+        with self.assertNumQueries(2):
+            ResponseRollup.summary(self.survey.id)
+            ResponseRollup.timeline(self.survey.id)
+
+    def test_rebuild_matches_incremental_rollup(self):
+        self.submit(IPHONE, minutes=2)
+        self.submit(is_complete=False)
+        older = self.submit(ANDROID_TABLET, minutes=10)
+        yesterday = timezone.now() - timedelta(days=1)
+        SurveyResponse.objects.filter(id=older.id).update(
+            started_at=yesterday, completed_at=yesterday
+        )
+
+        SurveyDailyRollup.objects.all().delete()
+        call_command(
+            "rebuild_daily_rollups", survey=[str(self.survey.id)], stdout=StringIO()
+        )
+
+        rollups = list(SurveyDailyRollup.objects.filter(survey=self.survey))
+        self.assertEqual(
+            [rollup.day for rollup in rollups],
+            [
+                self.today - timedelta(days=1),
+                self.today,
+            ],
+        )
+        self.assertEqual((rollups[0].starts, rollups[0].completions), (1, 1))
+        self.assertEqual(rollups[0].tablet_responses, 1)
+        self.assertEqual(rollups[0].completion_seconds, 600)
+        self.assertEqual((rollups[1].starts, rollups[1].completions), (2, 1))
+        self.assertEqual(
+            (rollups[1].mobile_responses, rollups[1].desktop_responses), (1, 1)
+        )
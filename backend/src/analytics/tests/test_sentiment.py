@@ -0,0 +1,87 @@
+from analytics.models import AnswerSentiment, QuestionAnalytics
+from analytics.sentiment import SentimentScorer, get_sentiment_label, score_text
+from django.test import SimpleTestCase, TestCase
+from surveys.models.question import FieldType
+from surveys.tests.factories.answer_factory import AnswerFactory
+from surveys.tests.factories.question_factory import QuestionFactory
+from surveys.tests.factories.survey_factory import (
+    SurveyFactory,
+    SurveyResponseFactory,
+)
+
+
+class ScoreTextTest(SimpleTestCase):
+    def test_polarity(self):
+        self.assertGreater(score_text("Great survey, really easy to use!"), 0.5)
+        self.assertLess(score_text("The form was slow and buggy"), -0.5)
+        self.assertEqual(score_text("I filled it in on Tuesday"), 0.0)
+
+    def test_negation_and_intensity(self):
+        self.assertLess(score_text("It was not good"), 0)
+        self.assertGreater(score_text("Never had a bad experience"), 0)
+        self.assertGreater(score_text("very good"), score_text("good"))
+        self.assertLess(score_text("slightly slow"), 0)
+        self.assertGreater(score_text("slightly slow"), score_text("slow"))
+
+    def test_labels(self):
+        self.assertEqual(get_sentiment_label(0.6), "positive")
+        self.assertEqual(get_sentiment_label(0.0), "neutral")
+        self.assertEqual(get_sentiment_label(-0.6), "negative")
+
+
+class SentimentScorerTest(TestCase):
+    def setUp(self):
+        self.survey = SurveyFactory()
+        self.question = QuestionFactory(survey=self.survey, field_type=FieldType.TEXT)
+        self.number_question = QuestionFactory(
+            survey=self.survey, field_type=FieldType.NUMBER
+        )
+
+    def answer(self, text="", question=None, **kwargs):
+        return AnswerFactory(
+            response=SurveyResponseFactory(survey=self.survey),
+            question=question or self.question,
+            text_answer=text,
+            **kwargs,
+        )
+
+    def get_analytics(self):
+        return QuestionAnalytics.objects.get(question=self.question)
+
+    def test_new_answers_are_scored_incrementally(self):
+        good = self.answer("Excellent and easy")
+        bad = self.answer("Terrible, it crashed")
+        self.answer("")
+        self.answer(question=self.number_question, number_answer=3)
+
+        self.assertEqual(SentimentScorer.run(batch_size=1), 2)
+        self.assertEqual(AnswerSentiment.objects.count(), 2)
+        analytics = self.get_analytics()
+        self.assertEqual(analytics.sentiment_count, 2)
+        self.assertAlmostEqual(
+            analytics.sentiment_score,
+            (good.sentiment.score + bad.sentiment.score) / 2,
+        )
+
+        self.assertEqual(SentimentScorer.run(), 0)
+
+        latest = self.answer("Nice")
+        self.assertEqual(SentimentScorer.run(), 1)
+        analytics = self.get_analytics()
+        self.assertEqual(analytics.sentiment_count, 3)
+        self.assertAlmostEqual(
+            analytics.sentiment_score,
+            (good.sentiment.score + bad.sentiment.score + latest.sentiment.score) / 3,
+        )
+
+    def test_rebuild_drops_deleted_answers(self):
+        good = self.answer("Wonderful")
+        self.answer("Awful")
+        SentimentScorer.run()
+
+        good.delete()
+        SentimentScorer.rebuild(self.survey)
+
+        analytics = self.get_analytics()
+        self.assertEqual(analytics.sentiment_count, 1)
+        self.assertLess(analytics.sentiment_score, 0)
@@ -0,0 +1,274 @@
+from analytics.aggregation import SurveyAggregation
+from analytics.histograms import HistogramMode
+from analytics.sentiment import SentimentScorer
+from analytics.services import AnalyticsService
+from analytics.text import update_pending_word_frequencies
+from django.test import TestCase
+from surveys.models.question import FieldType
+from surveys.tests.factories.answer_factory import AnswerFactory
+from surveys.tests.factories.question_factory import (
+    QuestionFactory,
+    QuestionOptionFactory,
+)
+from surveys.tests.factories.survey_factory import (
+    SurveyFactory,
+    SurveyResponseFactory,
+)
+
+
+class QuestionAnalyticsTest(TestCase):
+    def setUp(self):
+        self.survey = SurveyFactory()
+        self.number_question = QuestionFactory(
+            survey=self.survey, field_type=FieldType.NUMBER, order=1
+        )
+        self.rating_question = QuestionFactory(
+            survey=self.survey, field_type=FieldType.RATING, order=2, scale_max=5
+        )
+        self.responses = SurveyResponseFactory.create_batch(4, survey=self.survey)
+
+        for value, response in zip([10, 20, 30], self.responses, strict=False):
+            AnswerFactory(
+                response=response,
+                question=self.number_question,
+                number_answer=value,
+            )
+        for value, response in zip([5, 5, 3, 4], self.responses, strict=False):
+            AnswerFactory(
+                response=response,
+                question=self.rating_question,
+                number_answer=value,
+            )
+
+    def get_analytics(self):
+        analytics = AnalyticsService(self.survey).get_question_analytics()
+        return {str(item["question_id"]): item for item in analytics}
+
+    def test_number_question_statistics(self):
+        analytics = self.get_analytics()[str(self.number_question.id)]
+
+        self.assertEqual(analytics["total_answers"], 3)
+        self.assertEqual(analytics["answer_rate"], 75)
+        self.assertEqual(analytics["skip_rate"], 25)
+        self.assertEqual(analytics["statistics"]["min"], 10)
+        self.assertEqual(analytics["statistics"]["max"], 30)
+        self.assertEqual(analytics["statistics"]["average"], 20)
+        distribution = analytics["distribution"]
+        self.assertEqual(len(distribution), 10)
+        self.assertEqual(distribution[0], {"start": 10, "end": 12, "count": 1})
+        self.assertEqual(distribution[5], {"start": 20, "end": 22, "count": 1})
+        self.assertEqual(distribution[9], {"start": 28, "end": 30, "count": 1})
+        self.assertEqual(sum(bucket["count"] for bucket in distribution), 3)
+
+    def test_number_question_quantiles(self):
+        analytics = AnalyticsService(self.survey).get_question_analytics(
+            histogram_mode=HistogramMode.QUANTILE, buckets=2
+        )
+        analytics = {str(item["question_id"]): item for item in analytics}
+
+        self.assertEqual(
+            analytics[str(self.number_question.id)]["distribution"],
+            [
+                {"start": 10, "end": 20, "count": 2},
+                {"start": 30, "end": 30, "count": 1},
+            ],
+        )
+
+    def test_rating_question_histogram(self):
+        analytics = self.get_analytics()[str(self.rating_question.id)]
+
+        self.assertEqual(analytics["total_answers"], 4)
+        self.assertEqual(analytics["average_rating"], 4.25)
+        self.assertEqual(
+            analytics["rating_distribution"],
+            [
+                {"number_answer": 3, "count": 1},
+                {"number_answer": 4, "count": 1},
+                {"number_answer": 5, "count": 2},
+            ],
+        )
+        self.assertEqual(analytics["rating_summary"]["label"], "Excellent")
+
+    def test_unanswered_question(self):
+        question = QuestionFactory(
+            survey=self.survey, field_type=FieldType.NUMBER, order=3
+        )
+
+        analytics = self.get_analytics()[str(question.id)]
+
+        self.assertEqual(analytics["total_answers"], 0)
+        self.assertEqual(analytics["skip_rate"], 100)
+        self.assertEqual(analytics["statistics"], {})
+
+    def test_text_question_word_cloud_and_sentiment(self):
+        question = QuestionFactory(
+            survey=self.survey, field_type=FieldType.TEXT, order=3
+        )
+        for text, response in zip(
+            ["Great support", "Support was slow", "Great app"],
+            self.responses,
+            strict=False,
+        ):
+            AnswerFactory(response=response, question=question, text_answer=text)
+
+        # The report only reads what the batch jobs stored
+        analytics = self.get_analytics()[str(question.id)]
+        self.assertEqual(analytics["word_cloud"], [])
+        self.assertIsNone(analytics["sentiment"])
+
+        update_pending_word_frequencies()
+        SentimentScorer.run()
+        analytics = self.get_analytics()[str(question.id)]
+        self.assertEqual(analytics["word_cloud"][:2], [("great", 2), ("support", 2)])
+        self.assertEqual(analytics["sentiment"]["label"], "positive")
+        self.assertEqual(analytics["sentiment"]["scored_answers"], 3)
+
+    def test_query_count_is_independent_of_question_count(self):
+        """
+        Benchmark: questions, response count, grouped stats, grouped rating
+        distributions and number histograms - five queries per survey however
+        many questions it has.
+        """
+        with self.assertNumQueries(5):
+            AnalyticsService(self.survey).get_question_analytics()
+
+        for order in range(3, 13):
+            question = QuestionFactory(
+                survey=self.survey, field_type=FieldType.RATING, order=order
+            )
+            for response in self.responses:
+                AnswerFactory(response=response, question=question, number_answer=4)
+
+        with self.assertNumQueries(5):
+            analytics = AnalyticsService(self.survey).get_question_analytics()
+
+        self.assertEqual(len(analytics), 12)
+
+
+class ChoiceAnalyticsTest(TestCase):
+    def setUp(self):
+        self.survey = SurveyFactory()
+        self.colors = QuestionFactory(
+            survey=self.survey,
+            field_type=FieldType.MULTIPLE_CHOICE,
+            options=["red", "green", "blue"],
+            allow_other=True,
+            order=1,
+        )
+        self.plan = QuestionFactory(
+            survey=self.survey, field_type=FieldType.SINGLE_CHOICE, order=2
+        )
+        for order, (value, text) in enumerate([("free", "Free"), ("pro", "Pro")]):
+            QuestionOptionFactory(
+                question=self.plan, value=value, text=text, order=order
+            )
+        QuestionOptionFactory(
+            question=self.plan,
+            value="other",
+            text="Something else",
+            order=2,
+            is_other=True,
+        )
+
+        for colors, plan in [
+            (["red", "blue"], "free"),
+            (["red"], "pro"),
+            (["teal", "red"], "enterprise"),
+            ([], ""),
+        ]:
+            self.answer(colors, plan)
+
+    def answer(self, colors, plan):
+        response = SurveyResponseFactory(survey=self.survey)
+        AnswerFactory(response=response, question=self.colors, json_answer=colors)
+        # Older choice answers may only have a text_answer
+        AnswerFactory(response=response, question=self.plan, text_answer=plan)
+
+    def get_analytics(self):
+        analytics = AnalyticsService(self.survey).get_question_analytics()
+        return {str(item["question_id"]): item for item in analytics}
+
+    def test_choice_counts(self):
+        counts = SurveyAggregation(self.survey).choice_counts()
+        counts = {str(question_id): count for question_id, count in counts.items()}
+
+        self.assertEqual(counts[str(self.colors.id)], {"red": 3, "blue": 1, "teal": 1})
+        self.assertEqual(
+            counts[str(self.plan.id)], {"free": 1, "pro": 1, "enterprise": 1}
+        )
+
+    def test_distribution_follows_options(self):
+        analytics = self.get_analytics()[str(self.colors.id)]
+
+        self.assertEqual(
+            [(row["option"], row["count"]) for row in analytics["choice_distribution"]],
+            [("red", 3), ("blue", 1), ("other", 1), ("green", 0)],
+        )
+        self.assertEqual(analytics["most_popular"]["percentage"], 60)
+        other = analytics["choice_distribution"][2]
+        self.assertEqual(other["other_values"], [{"value": "teal", "count": 1}])
+
+    def test_unmatched_values_use_the_other_option(self):
+        analytics = self.get_analytics()[str(self.plan.id)]
+
+        self.assertEqual(
+            [(row["label"], row["count"]) for row in analytics["choice_distribution"]],
+            [("Free", 1), ("Pro", 1), ("Something else", 1)],
+        )
+
+    def test_query_count_is_independent_of_answer_count(self):
+        """
+        Benchmark: the four queries of every survey, plus the grouped choice
+        counts and the options of choice questions.
+        """
+        with self.assertNumQueries(6):
+            self.get_analytics()
+
+        for _ in range(10):
+            self.answer(["green"], "pro")
+
+        with self.assertNumQueries(6):
+            self.get_analytics()
+
+
+class SubmissionReportTest(TestCase):
+    def setUp(self):
+        self.survey = SurveyFactory()
+        self.first = QuestionFactory(survey=self.survey, title="First", order=1)
+        self.second = QuestionFactory(survey=self.survey, title="Second", order=2)
+        self.third = QuestionFactory(
+            survey=self.survey,
+            title="Third",
+            field_type=FieldType.NUMBER,
+            order=3,
+        )
+        responses = SurveyResponseFactory.create_batch(
+            3, survey=self.survey, is_complete=True
+        )
+        SurveyResponseFactory(survey=self.survey, is_complete=False, user=None)
+
+        for response in responses:
+            AnswerFactory(response=response, question=self.first, text_answer="yes")
+        AnswerFactory(response=responses[0], question=self.second, text_answer="")
+        AnswerFactory(response=responses[0], question=self.third, number_answer=0)
+        AnswerFactory(response=responses[1], question=self.third, number_answer=3)
+
+    def test_report_counts(self):
+        with self.assertNumQueries(1):
+            report = SurveyAggregation(self.survey).submission_report()
+
+        self.assertEqual(report["total_responses"], 4)
+        self.assertEqual(report["total_submission"], 3)
+        self.assertEqual(report["anonymous_user"], 1)
+        self.assertEqual(report["registered_user"], 3)
+        self.assertEqual(report["total_answer"], 5)
+        self.assertEqual(report["total_unanswer"], 7)
+        self.assertEqual(report["popular_answer"], {"total": 3, "question": "First"})
+        self.assertEqual(report["unpopular_answer"], {"total": 4, "question": "Second"})
+
+    def test_report_without_questions(self):
+        report = SurveyAggregation(SurveyFactory()).submission_report()
+
+        self.assertEqual(report["total_responses"], 0)
+        self.assertEqual(report["total_answer"], 0)
+        self.assertEqual(report["popular_answer"], {"total": 0, "question": ""})
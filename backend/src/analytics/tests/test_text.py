@@ -0,0 +1,136 @@
+from analytics.models import QuestionAnalytics
+from analytics.text import (
+    SpaceSaving,
+    bigrams,
+    get_word_cloud,
+    rebuild_word_frequencies,
+    reset_word_frequencies,
+    tokenize,
+    update_pending_word_frequencies,
+    update_word_frequencies,
+)
+from django.test import SimpleTestCase, TestCase
+from surveys.models.question import FieldType
+from surveys.tests.factories.answer_factory import AnswerFactory
+from surveys.tests.factories.question_factory import QuestionFactory
+from surveys.tests.factories.survey_factory import (
+    SurveyFactory,
+    SurveyResponseFactory,
+)
+
+
+class TokenizeTest(SimpleTestCase):
+    def test_tokenize(self):
+        self.assertEqual(
+            tokenize("The checkout was SLOW, and I don’t like 2 clicks!"),
+            ["checkout", "slow", "like", "clicks"],
+        )
+
+    def test_bigrams(self):
+        self.assertEqual(
+            bigrams(["fast", "checkout", "flow"]), ["fast checkout", "checkout flow"]
+        )
+
+
+class SpaceSavingTest(SimpleTestCase):
+    def test_exact_under_capacity(self):
+        counter = SpaceSaving(10)
+        counter.update("abracadabra")
+
+        self.assertEqual(counter.most_common(3), [("a", 5), ("b", 2), ("r", 2)])
+        self.assertEqual(counter.errors, {})
+
+    def test_heavy_hitters_are_kept(self):
+        counter = SpaceSaving(5)
+        for n in range(1000):
+            counter.add("frequent")
+            counter.add(f"rare{n}")
+
+        self.assertEqual(len(counter.counts), 5)
+        item, count = counter.most_common(1)[0]
+        self.assertEqual(item, "frequent")
+        self.assertEqual(count - counter.errors.get(item, 0), 1000)
+
+    def test_state_round_trip(self):
+        counter = SpaceSaving(2)
+        counter.update(["a", "b", "c", "c"])
+
+        restored = SpaceSaving.from_state(2, counter.get_state())
+        restored.add("a")
+
+        self.assertEqual(restored.most_common(1), [("c", 3)])
+        self.assertEqual(len(restored.counts), 2)
+
+
+class WordFrequencyTest(TestCase):
+    def setUp(self):
+        self.survey = SurveyFactory()
+        self.question = QuestionFactory(survey=self.survey, field_type=FieldType.TEXT)
+
+    def answer(self, text):
+        return AnswerFactory(
+            response=SurveyResponseFactory(survey=self.survey),
+            question=self.question,
+            text_answer=text,
+        )
+
+    def test_counts_are_updated_incrementally(self):
+        self.answer("Great support team")
+        self.answer("Support team was slow")
+        self.answer("")
+
+        data = update_word_frequencies(self.question, chunk_size=1)
+        self.assertEqual(data["answers"], 2)
+
+        self.answer("Support was great")
+        data = update_word_frequencies(self.question, chunk_size=1)
+
+        word_cloud = get_word_cloud(data, n=3)
+        self.assertEqual(data["answers"], 3)
+        self.assertEqual(
+            word_cloud["word_cloud"], [("support", 3), ("great", 2), ("team", 2)]
+        )
+        self.assertEqual(word_cloud["bigrams"][0], ("support team", 2))
+        self.assertEqual(
+            QuestionAnalytics.objects.get(question=self.question).word_cloud_data,
+            data,
+        )
+
+    def test_reset_recounts_every_answer(self):
+        self.answer("Fast delivery")
+        update_word_frequencies(self.question)
+
+        reset_word_frequencies(self.question)
+        data = update_word_frequencies(self.question)
+
+        self.assertEqual(data["answers"], 1)
+        self.assertEqual(dict(get_word_cloud(data)["word_cloud"])["fast"], 1)
+
+    def test_only_questions_with_new_answers_are_updated(self):
+        other = QuestionFactory(survey=self.survey, field_type=FieldType.TEXT)
+        self.answer("Fast delivery")
+
+        self.assertEqual(update_pending_word_frequencies(), 1)
+        self.assertEqual(update_pending_word_frequencies(), 0)
+
+        AnswerFactory(
+            response=SurveyResponseFactory(survey=self.survey),
+            question=other,
+            text_answer="Slow delivery",
+        )
+        self.assertEqual(update_pending_word_frequencies(), 1)
+        self.assertEqual(
+            QuestionAnalytics.objects.get(question=other).word_cloud_data["answers"], 1
+        )
+
+    def test_rebuild_drops_deleted_answers(self):
+        self.answer("Fast delivery")
+        slow = self.answer("Slow delivery")
+        update_word_frequencies(self.question)
+
+        slow.delete()
+        rebuild_word_frequencies(self.survey)
+
+        data = QuestionAnalytics.objects.get(question=self.question).word_cloud_data
+        self.assertEqual(data["answers"], 1)
+        self.assertNotIn("slow", dict(get_word_cloud(data)["word_cloud"]))
@@ -0,0 +1,124 @@
+from datetime import datetime, timedelta
+
+from analytics.timeseries import (
+    Bucket,
+    ceil_bucket,
+    compute_timeseries,
+    floor_bucket,
+    get_survey_timeseries,
+)
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from surveys.models.survey import SurveyResponse
+from surveys.tests.factories.survey_factory import (
+    SurveyFactory,
+    SurveyResponseFactory,
+)
+
+
+class FloorBucketTest(SimpleTestCase):
+    def test_buckets_align_like_date_trunc(self):
+        # A Thursday
+        moment = timezone.make_aware(datetime(2025, 5, 15, 13, 45, 12))
+
+        self.assertEqual(
+            floor_bucket(moment, Bucket.HOUR),
+            timezone.make_aware(datetime(2025, 5, 15, 13)),
+        )
+        self.assertEqual(
+            floor_bucket(moment, Bucket.DAY),
+            timezone.make_aware(datetime(2025, 5, 15)),
+        )
+        self.assertEqual(
+            floor_bucket(moment, Bucket.WEEK),
+            timezone.make_aware(datetime(2025, 5, 12)),
+        )
+
+    def test_ceil_bucket(self):
+        moment = timezone.make_aware(datetime(2025, 5, 15, 13, 45, 12))
+        boundary = timezone.make_aware(datetime(2025, 5, 15))
+
+        self.assertEqual(
+            ceil_bucket(moment, Bucket.DAY),
+            timezone.make_aware(datetime(2025, 5, 16)),
+        )
+        self.assertEqual(ceil_bucket(boundary, Bucket.DAY), boundary)
+
+
+class SurveyTimeseriesTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.survey = SurveyFactory()
+        self.day = floor_bucket(timezone.now() - timedelta(days=5), Bucket.DAY)
+
+    def respond(self, started_at, minutes=None):
+        response = SurveyResponseFactory(
+            survey=self.survey,
+            is_complete=minutes is not None,
+            time_taken=timedelta(minutes=minutes) if minutes is not None else None,
+        )
+        SurveyResponse.objects.filter(id=response.id).update(started_at=started_at)
+
+    def test_points_per_bucket(self):
+        self.respond(self.day + timedelta(hours=1), minutes=2)
+        self.respond(self.day + timedelta(hours=1, minutes=30), minutes=4)
+        self.respond(self.day + timedelta(hours=1, minutes=40), minutes=9)
+        self.respond(self.day + timedelta(hours=3))
+
+        series = compute_timeseries(
+            self.survey.id, self.day, self.day + timedelta(hours=4), Bucket.HOUR
+        )
+
+        self.assertEqual(
+            [(point["starts"], point["completions"]) for point in series],
+            [(0, 0), (3, 3), (0, 0), (1, 0)],
+        )
+        self.assertEqual(series[1]["median_completion_seconds"], 240)
+        self.assertEqual(series[1]["p90_completion_seconds"], 480)
+        self.assertEqual(series[3]["abandonments"], 1)
+        self.assertEqual(series[3]["abandonment_rate"], 100)
+        self.assertIsNone(series[3]["median_completion_seconds"])
+
+        series = compute_timeseries(
+            self.survey.id, self.day, self.day + timedelta(days=1), Bucket.DAY
+        )
+        self.assertEqual(len(series), 1)
+        self.assertEqual(series[0]["starts"], 4)
+        self.assertEqual(series[0]["abandonment_rate"], 25)
+
+    def test_settled_buckets_are_cached(self):
+        self.respond(self.day + timedelta(hours=1), minutes=2)
+        end = self.day + timedelta(days=2)
+
+        get_survey_timeseries(self.survey.id, self.day, end, Bucket.DAY)
+        self.respond(self.day + timedelta(hours=2), minutes=2)
+
+        with self.assertNumQueries(0):
+            series = get_survey_timeseries(self.survey.id, self.day, end, Bucket.DAY)
+        self.assertEqual([point["starts"] for point in series], [1, 0])
+
+    def test_recent_buckets_are_split_from_settled_ones(self):
+        self.respond(self.day + timedelta(hours=1), minutes=2)
+        SurveyResponseFactory(survey=self.survey)
+
+        series = get_survey_timeseries(
+            self.survey.id, self.day, timezone.now() + timedelta(hours=1), Bucket.DAY
+        )
+
+        self.assertEqual(len(series), 6)
+        self.assertEqual(series[0]["starts"], 1)
+        self.assertEqual(series[-1]["starts"], 1)
+
+    def test_recent_requests_share_a_cache_entry(self):
+        SurveyResponseFactory(survey=self.survey)
+        get_survey_timeseries(self.survey.id, self.day, timezone.now(), Bucket.DAY)
+
+        with self.assertNumQueries(0):
+            series = get_survey_timeseries(
+                self.survey.id,
+                self.day,
+                timezone.now() + timedelta(seconds=1),
+                Bucket.DAY,
+            )
+        self.assertEqual(series[-1]["starts"], 1)
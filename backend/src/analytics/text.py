@@ -0,0 +1,226 @@
+import heapq
+import re
+import unicodedata
+from datetime import datetime
+
+from analytics.models import QuestionAnalytics
+from django.db import transaction
+from django.db.models import Max, Q
+from surveys.models.answer import Answer
+from surveys.models.question import FieldType, Question
+
+# Terms tracked per question and n-gram size, and answers read per transaction
+WORD_CLOUD_CAPACITY = 1000
+WORD_CLOUD_CHUNK_SIZE = 2000
+
+# Letters, with inner apostrophes ("don't"); digits and punctuation split words
+TOKEN_RE = re.compile(r"[^\W\d_]+(?:'[^\W\d_]+)*")
+
+STOPWORDS = frozenset(
+    """
+    a about above after again against all am an and any are aren't as at be
+    because been before being below between both but by can can't cannot could
+    couldn't did didn't do does doesn't doing don't down during each few for
+    from further had hadn't has hasn't have haven't having he he'd he'll he's
+    her here here's hers herself him himself his how how's i i'd i'll i'm i've
+    if in into is isn't it it's its itself just let's me more most mustn't my
+    myself no nor not of off on once only or other ought our ours ourselves out
+    over own same shan't she she'd she'll she's should shouldn't so some such
+    than that that's the their theirs them themselves then there there's these
+    they they'd they'll they're they've this those through to too under until
+    up very was wasn't we we'd we'll we're we've were weren't what what's when
+    when's where where's which while who who's whom why why's will with won't
+    would wouldn't you you'd you'll you're you've your yours yourself
+    yourselves
+    """.split()
+)
+
+
+def get_words(text):
+    """
+    Lowercased words of a text without punctuation, with curly apostrophes
+    and compatibility characters normalized
+    """
+    text = unicodedata.normalize("NFKC", text).lower().replace("’", "'")
+    return TOKEN_RE.findall(text)
+
+
+def tokenize(text):
+    """Words of a text without stopwords or single letters"""
+    return [
+        token for token in get_words(text) if len(token) > 1 and token not in STOPWORDS
+    ]
+
+
+def bigrams(tokens):
+    return [
+        f"{first} {second}" for first, second in zip(tokens, tokens[1:], strict=False)
+    ]
+
+
+class SpaceSaving:
+    """
+    Approximate counts of the most frequent items of a stream in at most
+    ``capacity`` counters (Metwally et al.'s space-saving). When all counters
+    are taken a new item replaces the least counted one and inherits its
+    count, recorded as the item's maximum overcount in ``errors``; any item
+    seen more often than ``total / capacity`` times is guaranteed a counter.
+    """
+
+    def __init__(self, capacity, counts=None, errors=None):
+        self.capacity = capacity
+        self.counts = dict(counts or {})
+        self.errors = dict(errors or {})
+        # Lazy min-heap of (count, item), entries may lag behind the counts
+        self.heap = None
+
+    @classmethod
+    def from_state(cls, capacity, state):
+        state = state or {}
+        return cls(capacity, state.get("counts"), state.get("errors"))
+
+    def get_state(self):
+        return {"counts": self.counts, "errors": self.errors}
+
+    def add(self, item, count=1):
+        counts = self.counts
+        if item in counts:
+            counts[item] += count
+            return
+        if len(counts) < self.capacity:
+            counts[item] = count
+            return
+
+        victim, floor = self.pop_min()
+        del counts[victim]
+        self.errors.pop(victim, None)
+        counts[item] = floor + count
+        self.errors[item] = floor
+        heapq.heappush(self.heap, (counts[item], item))
+
+    def update(self, items):
+        for item in items:
+            self.add(item)
+
+    def pop_min(self):
+        """Remove and return the least counted item and its count"""
+        if self.heap is None or len(self.heap) > 4 * self.capacity:
+            self.heap = [(count, item) for item, count in self.counts.items()]
+            heapq.heapify(self.heap)
+
+        while True:
+            count, item = heapq.heappop(self.heap)
+            current = self.counts.get(item)
+            if current == count:
+                return item, count
+            if current is not None:
+                # Counted again since it was pushed
+                heapq.heappush(self.heap, (current, item))
+
+    def most_common(self, n):
+        return sorted(self.counts.items(), key=lambda item: (-item[1], item[0]))[:n]
+
+
+def get_text_answers(question, cursor=None):
+    """Non-blank text answers of a question in (created_at, id) order"""
+    answers = Answer.objects.filter(question=question).exclude(text_answer="")
+    if cursor is not None:
+        created_at, answer_id = datetime.fromisoformat(cursor[0]), cursor[1]
+        answers = answers.filter(
+            Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=answer_id)
+        )
+    return answers.order_by("created_at", "id").values_list(
+        "created_at", "id", "text_answer"
+    )
+
+
+def update_word_frequencies(
+    question, capacity=WORD_CLOUD_CAPACITY, chunk_size=WORD_CLOUD_CHUNK_SIZE
+):
+    """
+    Fold the text answers of a question written since the last run into the
+    word and bigram counters kept in ``QuestionAnalytics.word_cloud_data``,
+    and return it.
+
+    Answers are streamed ``chunk_size`` at a time, each chunk in a transaction
+    holding the analytics row lock, so memory stays bounded by the counters
+    and concurrent runs never count an answer twice. The position reached is
+    saved with the counters after every chunk, and edited or deleted answers
+    are only reflected by ``reset_word_frequencies``.
+    """
+    QuestionAnalytics.objects.get_or_create(question=question)
+
+    while True:
+        with transaction.atomic():
+            analytics = QuestionAnalytics.objects.select_for_update().get(
+                question=question
+            )
+            data = analytics.word_cloud_data or {}
+            words = SpaceSaving.from_state(capacity, data.get("words"))
+            pairs = SpaceSaving.from_state(capacity, data.get("bigrams"))
+
+            read = 0
+            cursor = data.get("cursor")
+            answers = get_text_answers(question, cursor)[:chunk_size]
+            for created_at, answer_id, text in answers.iterator(chunk_size=chunk_size):
+                tokens = tokenize(text)
+                words.update(tokens)
+                pairs.update(bigrams(tokens))
+                cursor = [created_at.isoformat(), str(answer_id)]
+                read += 1
+
+            if read:
+                data = {
+                    "answers": data.get("answers", 0) + read,
+                    "cursor": cursor,
+                    "words": words.get_state(),
+                    "bigrams": pairs.get_state(),
+                }
+                QuestionAnalytics.objects.filter(pk=analytics.pk).update(
+                    word_cloud_data=data
+                )
+
+        if read < chunk_size:
+            return data
+
+
+def update_pending_word_frequencies():
+    """
+    Update the word frequencies of the text questions with answers written
+    since their last update, and return how many were updated
+    """
+    questions = (
+        Question.objects.filter(field_type=FieldType.TEXT)
+        .annotate(latest=Max("answer__created_at", filter=~Q(answer__text_answer="")))
+        .filter(latest__isnull=False)
+        .values_list("id", "latest", "analytics__word_cloud_data__cursor")
+    )
+    pending = [
+        question_id
+        for question_id, latest, cursor in questions
+        if cursor is None or latest > datetime.fromisoformat(cursor[0])
+    ]
+
+    for question in Question.objects.filter(id__in=pending):
+        update_word_frequencies(question)
+    return len(pending)
+
+
+def reset_word_frequencies(question):
+    """Drop the counters of a question, the next update recounts every answer"""
+    QuestionAnalytics.objects.filter(question=question).update(word_cloud_data={})
+
+
+def rebuild_word_frequencies(survey):
+    """Recount the word frequencies of the text questions of a survey"""
+    for question in survey.questions.filter(field_type=FieldType.TEXT):
+        reset_word_frequencies(question)
+        update_word_frequencies(question)
+
+
+def get_word_cloud(data, n=20):
+    """The ``n`` most frequent words and bigrams of saved word cloud data"""
+    return {
+        "word_cloud": SpaceSaving.from_state(0, data.get("words")).most_common(n),
+        "bigrams": SpaceSaving.from_state(0, data.get("bigrams")).most_common(n),
+    }
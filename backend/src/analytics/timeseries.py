@@ -0,0 +1,158 @@
+from datetime import datetime, time, timedelta
+
+from analytics.aggregation import COMPLETION_PERCENTILES, completion_time_percentiles
+from core.cache import CacheService
+from django.conf import settings
+from django.db.models import Count, Q
+from django.db.models.functions import Trunc
+from django.utils import timezone
+from surveys.models.survey import SurveyResponse
+
+
+class Bucket:
+    HOUR = "hour"
+    DAY = "day"
+    WEEK = "week"
+
+    CHOICES = (HOUR, DAY, WEEK)
+
+
+# Most buckets a single time series request may span
+MAX_BUCKETS = 1000
+
+
+def floor_bucket(moment, bucket):
+    """Start of the bucket containing ``moment``, as ``date_trunc`` computes it"""
+    local = timezone.localtime(moment)
+    if bucket == Bucket.HOUR:
+        return local.replace(minute=0, second=0, microsecond=0)
+
+    day = local.date()
+    if bucket == Bucket.WEEK:
+        # Weeks start on Monday
+        day -= timedelta(days=day.weekday())
+    return timezone.make_aware(datetime.combine(day, time()))
+
+
+def next_bucket(start, bucket):
+    if bucket == Bucket.HOUR:
+        return start + timedelta(hours=1)
+    days = 7 if bucket == Bucket.WEEK else 1
+    day = timezone.localtime(start).date() + timedelta(days=days)
+    return timezone.make_aware(datetime.combine(day, time()))
+
+
+def ceil_bucket(moment, bucket):
+    """Start of the first bucket starting at or after ``moment``"""
+    start = floor_bucket(moment, bucket)
+    return start if start == moment else next_bucket(start, bucket)
+
+
+def iter_buckets(start, end, bucket):
+    """Bucket starts from the one containing ``start`` up to ``end`` (excluded)"""
+    current = floor_bucket(start, bucket)
+    while current < end:
+        yield current
+        current = next_bucket(current, bucket)
+
+
+def count_buckets(start, end, bucket):
+    count = 0
+    for _start in iter_buckets(start, end, bucket):
+        count += 1
+        if count > MAX_BUCKETS:
+            break
+    return count
+
+
+def empty_point(start):
+    return {
+        "bucket": start.isoformat(),
+        "starts": 0,
+        "completions": 0,
+        "abandonments": 0,
+        "abandonment_rate": 0.0,
+        **{f"{name}_completion_seconds": None for name in COMPLETION_PERCENTILES},
+    }
+
+
+def compute_timeseries(survey_id, start, end, bucket):
+    """
+    Starts, completions, abandonments and the median, p90 and p99 completion
+    times of the responses started in each bucket of ``[start, end)``, in one
+    grouped query. Completions are counted in the bucket their response
+    started in.
+    """
+    completed = Q(is_complete=True)
+    rows = (
+        SurveyResponse.objects.filter(
+            survey_id=survey_id, started_at__gte=start, started_at__lt=end
+        )
+        .annotate(
+            bucket=Trunc("started_at", bucket, tzinfo=timezone.get_current_timezone())
+        )
+        .values("bucket")
+        .annotate(
+            starts=Count("id"),
+            completions=Count("id", filter=completed),
+            **completion_time_percentiles(completed),
+        )
+        .order_by("bucket")
+    )
+    rows = {row["bucket"]: row for row in rows}
+
+    series = []
+    for bucket_start in iter_buckets(start, end, bucket):
+        point = empty_point(bucket_start)
+        row = rows.get(bucket_start)
+        if row is not None:
+            abandonments = row["starts"] - row["completions"]
+            point.update(
+                {
+                    "starts": row["starts"],
+                    "completions": row["completions"],
+                    "abandonments": abandonments,
+                    "abandonment_rate": round(abandonments / row["starts"] * 100, 2),
+                }
+            )
+            for name in COMPLETION_PERCENTILES:
+                if row[name] is not None:
+                    point[f"{name}_completion_seconds"] = row[name].total_seconds()
+        series.append(point)
+    return series
+
+
+def get_survey_timeseries(survey_id, start, end, bucket):
+    """
+    The time series of a survey over ``[start, end)``, cached per survey,
+    range and bucket size. The range is widened to whole buckets, so requests
+    ending at different times within a bucket share their cache entries. The
+    part of the range made of buckets which ended more than
+    TIMESERIES_SETTLE_TIME ago is cached as final, the rest briefly.
+    """
+    start = floor_bucket(start, bucket)
+    end = ceil_bucket(end, bucket)
+    settled = floor_bucket(
+        timezone.now() - timedelta(seconds=settings.TIMESERIES_SETTLE_TIME), bucket
+    )
+    split = min(max(settled, start), end)
+
+    series = []
+    if start < split:
+        series += CacheService.get_or_generate_timeseries(
+            survey_id,
+            bucket,
+            start,
+            split,
+            lambda: compute_timeseries(survey_id, start, split, bucket),
+            final=True,
+        )
+    if split < end:
+        series += CacheService.get_or_generate_timeseries(
+            survey_id,
+            bucket,
+            split,
+            end,
+            lambda: compute_timeseries(survey_id, split, end, bucket),
+        )
+    return series
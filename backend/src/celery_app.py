@@ -17,6 +17,15 @@ app.conf.task_routes = {
     "core.tasks.heavy_task": {"queue": "heavy"},
     "core.tasks.light_task": {"queue": "light"},
     "core.tasks.email_task": {"queue": "email"},
+    "surveys.tasks.run_export_job": {"queue": "heavy"},
+    "surveys.tasks.write_export_chunk": {"queue": "heavy"},
+    "surveys.tasks.assemble_export_job": {"queue": "heavy"},
+    "surveys.tasks.export_job_failed": {"queue": "light"},
+    "surveys.tasks.expire_export_job_files": {"queue": "light"},
+    "surveys.tasks.sweep_response_drafts": {"queue": "light"},
+    "analytics.tasks.refresh_completion_percentiles": {"queue": "light"},
+    "analytics.tasks.score_answer_sentiment": {"queue": "heavy"},
+    "analytics.tasks.update_word_clouds": {"queue": "heavy"},
 }
 
 app.conf.task_default_queue = "default"
@@ -28,20 +37,28 @@ app.conf.task_queues = (
 )
 
 # Periodic task schedule
-# app.conf.beat_schedule = {
-#     "cleanup-task": {
-#         "task": "core.tasks.cleanup_old_data",
-#         "schedule": crontab(hour=2, minute=0),
-#     },
-#     "send-daily-report": {
-#         "task": "core.tasks.send_daily_report",
-#         "schedule": crontab(hour=8, minute=30, day_of_week=1),
-#     },
-#     "health-check": {
-#         "task": "core.tasks.health_check",
-#         "schedule": 300.0,
-#     },
-# }
+app.conf.beat_schedule = {
+    "expire-export-job-files": {
+        "task": "surveys.tasks.expire_export_job_files",
+        "schedule": 86400.0,
+    },
+    "sweep-response-drafts": {
+        "task": "surveys.tasks.sweep_response_drafts",
+        "schedule": 900.0,
+    },
+    "refresh-completion-percentiles": {
+        "task": "analytics.tasks.refresh_completion_percentiles",
+        "schedule": 300.0,
+    },
+    "score-answer-sentiment": {
+        "task": "analytics.tasks.score_answer_sentiment",
+        "schedule": 300.0,
+    },
+    "update-word-clouds": {
+        "task": "analytics.tasks.update_word_clouds",
+        "schedule": 300.0,
+    },
+}
 
 # Discover tasks from all registered Django app configs
 app.autodiscover_tasks()
@@ -7,6 +7,7 @@ BAD_REQUEST_ERROR = "Bad request. The parameters were valid but the request fail
 
 REQUIRED_FIELD = "This field is required."
 EXTRA_FIELD_CONTAIN = "This is an  extra field."
+INVALID_CURSOR = "Invalid cursor."
 
 # Survey
 SURVEY_CREATE_SUCCESS = "Survey created successfully."
@@ -50,3 +51,21 @@ SURVEY_RESPONSE_CREATE_SUCCESS = "Survey response created successfully."
 SURVEY_RESPONSE_UPDATE_SUCCESS = "Survey response updated successfully."
 SURVEY_RESPONSE_DELETE_SUCCESS = "Survey response deleted successfully."
 NOT_FOUND_RESPONSE_ERROR = "Survey response id '{0}' does not exist."
+SURVEY_RESPONSE_ACCEPTED = "Survey response accepted and queued for processing."
+SURVEY_RESPONSE_DRAFT_SAVED = "Survey response draft saved successfully."
+SURVEY_RESPONSE_DRAFT_DELETE_SUCCESS = "Survey response draft deleted successfully."
+NOT_FOUND_RESPONSE_DRAFT_ERROR = "Survey response draft '{0}' does not exist."
+DUPLICATE_RESPONSE_ERROR = "A response with user token '{0}' was already submitted."
+
+# exports
+INVALID_EXPORT_FORMAT = "Unsupported export format '{0}', choose one of: {1}."
+EXPORT_JOB_CREATE_SUCCESS = "Export job created successfully."
+EXPORT_JOB_NOT_READY = "Export job '{0}' is not ready yet, current status: {1}."
+
+# analytics
+INVALID_TIMESERIES_BUCKET = "Unsupported bucket '{0}', choose one of: {1}."
+INVALID_TIMESERIES_RANGE = (
+    "The time series range must end after it starts and span at most {0} buckets."
+)
+INVALID_DATE_RANGE = "The date range may span at most {0} days."
+INVALID_FUNNEL_SEGMENT = "Unsupported segment '{0}', choose one of: {1}."
@@ -1,8 +1,21 @@
 import hashlib
+import json
+import logging
+import math
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from functools import wraps
 
 from django.conf import settings
-from django.core.cache import cache
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
 
 
 def cache_key_generator(*args, **kwargs):
@@ -11,8 +24,357 @@ def cache_key_generator(*args, **kwargs):
     return hashlib.md5(key_data.encode()).hexdigest()
 
 
-def cached_function(timeout=None, key_prefix=""):
-    """Decorator to cache function results"""
+# Marker distinguishing a cache miss from a cached None
+CACHE_MISS = object()
+
+
+def get_redis_client(alias=DEFAULT_CACHE_ALIAS):
+    """Raw Redis client of a django-redis cache, None for other backends"""
+    from django.core.cache import caches
+
+    if not hasattr(caches[alias], "client"):
+        return None
+
+    from django_redis import get_redis_connection
+
+    return get_redis_connection(alias)
+
+
+class LocalCache:
+    """
+    Bounded, thread-safe LRU cache with a per-entry TTL, kept in process
+    memory. Values are returned as stored, callers must not mutate them.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def get(self, key):
+        """Return ``(found, value)``"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self.entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return False, None
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return True, value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+
+        with self.lock:
+            self.entries[key] = (time.monotonic() + ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, *keys):
+        with self.lock:
+            for key in keys:
+                self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class TieredCache:
+    """
+    Read-through two-tier cache: a short-lived in-process LRU in front of the
+    shared Django cache (Redis).
+
+    Hot keys are answered from process memory without a network round trip
+    or decoding. Writes go to both tiers and are broadcast on a Redis pub/sub
+    channel so other processes drop their local copy; without pub/sub (e.g.
+    a local memory backend) local entries are only bounded by the TTL.
+    """
+
+    def __init__(self, alias=DEFAULT_CACHE_ALIAS, maxsize=1024, ttl=5, channel=None):
+        self.alias = alias
+        self.local = LocalCache(maxsize, ttl)
+        self.channel = channel
+        self.origin = uuid.uuid4().hex
+        self.invalidations = 0
+        self.subscriber = None
+        self.subscriber_lock = threading.Lock()
+
+    @property
+    def backend(self):
+        from django.core.cache import caches
+
+        return caches[self.alias]
+
+    def get_redis_client(self):
+        if self.channel is None:
+            return None
+        return get_redis_client(self.alias)
+
+    def local_ttl(self, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            return self.backend.default_timeout
+        return timeout
+
+    def get(self, key, default=None):
+        self.ensure_subscribed()
+
+        found, value = self.local.get(key)
+        if found:
+            return value
+
+        value = self.backend.get(key, CACHE_MISS)
+        if value is CACHE_MISS:
+            return default
+
+        self.local.set(key, value)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT):
+        self.backend.set(key, value, timeout)
+        self.local.set(key, value, self.local_ttl(timeout))
+        self.publish([key])
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT):
+        # Nothing can be cached locally for a key that did not exist
+        added = self.backend.add(key, value, timeout)
+        if added:
+            self.local.set(key, value, self.local_ttl(timeout))
+        return added
+
+    def delete(self, *keys):
+        self.backend.delete_many(keys)
+        self.local.delete(*keys)
+        self.publish(keys)
+
+    def stats(self):
+        """Hit, miss and eviction counters of the local tier"""
+        return {
+            "hits": self.local.hits,
+            "misses": self.local.misses,
+            "evictions": self.local.evictions,
+            "expirations": self.local.expirations,
+            "invalidations": self.invalidations,
+            "size": len(self.local),
+        }
+
+    def reset_stats(self):
+        self.local.reset_stats()
+        self.invalidations = 0
+
+    def publish(self, keys):
+        client = self.get_redis_client()
+        if client is None:
+            return
+
+        message = json.dumps({"origin": self.origin, "keys": list(keys)})
+        try:
+            client.publish(self.channel, message)
+        except Exception as err:
+            # Other processes catch up when their local entries expire
+            logger.error(f"Error publishing cache invalidation: {str(err)}")
+
+    def handle_message(self, data):
+        try:
+            message = json.loads(data)
+        except (TypeError, ValueError):
+            return
+        if message.get("origin") == self.origin:
+            return
+
+        self.local.delete(*message.get("keys", []))
+        self.invalidations += 1
+
+    def ensure_subscribed(self):
+        """Start the invalidation listener of this process on first use"""
+        if self.subscriber is not None or self.channel is None:
+            return
+
+        with self.subscriber_lock:
+            if self.subscriber is not None:
+                return
+            client = self.get_redis_client()
+            if client is None:
+                self.channel = None
+                return
+
+            self.subscriber = threading.Thread(
+                target=self.listen,
+                args=(client,),
+                name="tiered-cache-invalidation",
+                daemon=True,
+            )
+            self.subscriber.start()
+
+    def listen(self, client):
+        while True:
+            try:
+                pubsub = client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                # Messages may have been missed while (re)connecting
+                self.local.clear()
+                for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self.handle_message(message["data"])
+            except Exception as err:
+                logger.error(f"Cache invalidation listener failed: {str(err)}")
+                self.local.clear()
+                time.sleep(1)
+
+
+tiered_cache = TieredCache(
+    maxsize=getattr(settings, "TIERED_CACHE_SIZE", 1024),
+    ttl=getattr(settings, "TIERED_CACHE_TTL", 5),
+    channel=getattr(settings, "TIERED_CACHE_CHANNEL", None),
+)
+
+
+# Seconds a recomputation may hold the single-flight lock of a key
+CACHE_LOCK_TIMEOUT = 30
+# Seconds between checks while waiting for another worker to fill a key
+CACHE_LOCK_POLL_INTERVAL = 0.05
+
+refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="cache-refresh")
+
+
+def get_lock_key(cache_key):
+    return f"{cache_key}:lock"
+
+
+def set_cached_value(cache_key, value, timeout, stale_timeout=0, delta=0, store=cache):
+    """
+    Cache a value in an envelope recording when it goes stale and how long it
+    took to compute. The envelope also tells a cached None apart from a miss.
+    The entry is kept ``stale_timeout`` seconds past its expiry so it can be
+    served while it is being recomputed.
+    """
+    envelope = {"value": value, "expires_at": time.time() + timeout, "delta": delta}
+    store.set(cache_key, envelope, timeout + stale_timeout)
+
+
+def get_cached_value(cache_key, store=cache):
+    """Return the value cached by set_cached_value, or CACHE_MISS"""
+    envelope = store.get(cache_key)
+    if not isinstance(envelope, dict) or "expires_at" not in envelope:
+        return CACHE_MISS
+    return envelope["value"]
+
+
+def should_refresh(envelope, beta):
+    """
+    Probabilistic early expiration (XFetch): refresh ahead of expiry with a
+    probability growing as expiry nears and with the cost of recomputing, so
+    one request refreshes a hot key before every request misses at once.
+    """
+    delta = envelope.get("delta") or 0
+    jitter = -delta * beta * math.log(random.random() or 1e-12)
+    return time.time() + jitter >= envelope["expires_at"]
+
+
+def recompute(cache_key, compute, timeout, stale_timeout, store, lock_token):
+    try:
+        started = time.monotonic()
+        value = compute()
+        delta = time.monotonic() - started
+        set_cached_value(cache_key, value, timeout, stale_timeout, delta, store)
+        return value
+    finally:
+        lock_key = get_lock_key(cache_key)
+        if store.get(lock_key) == lock_token:
+            store.delete(lock_key)
+
+
+def background_recompute(*args):
+    try:
+        recompute(*args)
+    except Exception as err:
+        logger.error(f"Error refreshing cache key {args[0]}: {str(err)}")
+    finally:
+        close_old_connections()
+
+
+def get_or_compute(
+    cache_key,
+    compute,
+    timeout,
+    stale_timeout=0,
+    beta=1.0,
+    store=cache,
+    background=True,
+):
+    """
+    Return the cached value of a key, computing it at most once at a time
+    across all processes.
+
+    - Misses are computed by the worker taking the key's lock, the others wait
+      for its result (and compute themselves only if the lock times out).
+    - Hits are refreshed early with probability given by ``should_refresh``.
+    - Values past their expiry are served for up to ``stale_timeout`` seconds
+      while one worker recomputes them, in the background by default.
+    """
+    envelope = store.get(cache_key)
+    lock_key = get_lock_key(cache_key)
+    lock_token = uuid.uuid4().hex
+
+    if isinstance(envelope, dict) and "expires_at" in envelope:
+        if not should_refresh(envelope, beta):
+            return envelope["value"]
+
+        if store.add(lock_key, lock_token, CACHE_LOCK_TIMEOUT):
+            args = (cache_key, compute, timeout, stale_timeout, store, lock_token)
+            if background:
+                refresh_executor.submit(background_recompute, *args)
+            else:
+                return recompute(*args)
+
+        # Stale while another worker revalidates
+        return envelope["value"]
+
+    if not store.add(lock_key, lock_token, CACHE_LOCK_TIMEOUT):
+        deadline = time.monotonic() + CACHE_LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(CACHE_LOCK_POLL_INTERVAL)
+            value = get_cached_value(cache_key, store)
+            if value is not CACHE_MISS:
+                return value
+            if store.add(lock_key, lock_token, CACHE_LOCK_TIMEOUT):
+                break
+
+    return recompute(cache_key, compute, timeout, stale_timeout, store, lock_token)
+
+
+def cached_function(
+    timeout=None, key_prefix="", tiered=False, stale_timeout=0, beta=1.0
+):
+    """
+    Decorator to cache function results. With ``tiered`` the results are also
+    kept in the in-process cache tier, for small and hot immutable values.
+
+    Concurrent misses are computed once (see ``get_or_compute``), popular
+    keys are refreshed early and, with ``stale_timeout``, expired results are
+    served while being recomputed in the background. None results are cached.
+    """
+    store = tiered_cache if tiered else cache
 
     def decorator(func):
         @wraps(func)
@@ -20,32 +382,125 @@ def cached_function(timeout=None, key_prefix=""):
             cache_key = (
                 f"{key_prefix}:{func.__name__}:{cache_key_generator(*args, **kwargs)}"
             )
-            result = cache.get(cache_key)
-
-            if result is None:
-                result = func(*args, **kwargs)
-                cache_timeout = timeout or getattr(
-                    settings, "DEFAULT_CACHE_TIMEOUT", 300
-                )
-                cache.set(cache_key, result, cache_timeout)
-
-            return result
+            cache_timeout = timeout or getattr(settings, "DEFAULT_CACHE_TIMEOUT", 300)
+            return get_or_compute(
+                cache_key,
+                lambda: func(*args, **kwargs),
+                cache_timeout,
+                stale_timeout=stale_timeout,
+                beta=beta,
+                store=store,
+            )
 
         return wrapper
 
     return decorator
 
 
+class CacheTags:
+    """
+    Invalidation by tag without scanning the keyspace.
+
+    Every tagged cache key is added to one Redis set per tag, so invalidating
+    a tag deletes exactly the keys registered under it: one SMEMBERS per tag
+    and one DEL for all the keys, pipelined. Tag sets expire with the longest
+    lived entry registered under them. On other cache backends the sets are
+    kept as plain (non-atomic) cache values.
+    """
+
+    @staticmethod
+    def get_tag_key(tag):
+        return f"cache_tag:{tag}"
+
+    @staticmethod
+    def register(cache_key, tags, timeout):
+        tag_keys = [CacheTags.get_tag_key(tag) for tag in tags if tag]
+        client = get_redis_client()
+
+        if client is None:
+            for tag_key in tag_keys:
+                members = set(cache.get(tag_key) or [])
+                members.add(cache_key)
+                cache.set(tag_key, sorted(members), timeout)
+            return
+
+        pipeline = client.pipeline(transaction=False)
+        for tag_key in tag_keys:
+            redis_key = cache.make_key(tag_key)
+            pipeline.sadd(redis_key, cache_key)
+            if timeout is None:
+                pipeline.persist(redis_key)
+            else:
+                # Only ever extend, so the set outlives all its keys
+                pipeline.expire(redis_key, timeout, gt=True)
+                pipeline.expire(redis_key, timeout, nx=True)
+        pipeline.execute()
+
+    @staticmethod
+    def unregister(cache_key, tags):
+        """Remove a key deleted on its own from the sets of its tags"""
+        tag_keys = [CacheTags.get_tag_key(tag) for tag in tags if tag]
+        client = get_redis_client()
+
+        if client is None:
+            for tag_key in tag_keys:
+                members = set(cache.get(tag_key) or [])
+                if cache_key in members:
+                    members.discard(cache_key)
+                    cache.set(tag_key, sorted(members))
+            return
+
+        pipeline = client.pipeline(transaction=False)
+        for tag_key in tag_keys:
+            pipeline.srem(cache.make_key(tag_key), cache_key)
+        pipeline.execute()
+
+    @staticmethod
+    def invalidate(*tags):
+        """Delete every key registered under the tags, returns how many"""
+        tag_keys = [CacheTags.get_tag_key(tag) for tag in tags if tag]
+        client = get_redis_client()
+
+        if client is None:
+            keys = {key for tag_key in tag_keys for key in cache.get(tag_key) or []}
+            cache.delete_many(tag_keys)
+        else:
+            redis_keys = [cache.make_key(tag_key) for tag_key in tag_keys]
+            pipeline = client.pipeline(transaction=False)
+            for redis_key in redis_keys:
+                pipeline.smembers(redis_key)
+            pipeline.delete(*redis_keys)
+            *members, _deleted = pipeline.execute()
+            keys = {
+                key.decode() if isinstance(key, bytes) else key
+                for tag_members in members
+                for key in tag_members
+            }
+
+        if keys:
+            # Through the tiered cache so local copies are dropped everywhere
+            tiered_cache.delete(*keys)
+        return len(keys)
+
+
 class CacheService:
     """Service class for common caching operations"""
 
     @staticmethod
-    def get_survey_cache_key(survey_id):
-        return f"survey:{survey_id}"
+    def get_user_tag(user_token):
+        return f"user:{user_token}"
+
+    @staticmethod
+    def get_survey_cache_key(survey_id, version=None):
+        if version is None:
+            return f"survey:{survey_id}"
+        return f"survey:{survey_id}:{version}"
 
     @staticmethod
-    def get_report_cache_key(survey_id):
-        return f"survey_report:{survey_id}"
+    def get_report_cache_key(survey_id, version=None):
+        if version is None:
+            return f"survey_report:{survey_id}"
+        return f"survey_report:{survey_id}:{version}"
 
     @staticmethod
     def get_user_progress_key(user_token, survey_id):
@@ -56,50 +511,189 @@ class CacheService:
         return f"template:{template_id}"
 
     @staticmethod
-    def cache_survey_data(survey):
-        from surveys.serializers import SurveyDetailSerializer
+    def get_survey_version_key(survey_id):
+        return f"survey_version:{survey_id}"
+
+    @staticmethod
+    def get_responses_version_key(survey_id):
+        return f"survey_responses_version:{survey_id}"
 
-        cache_key = CacheService.get_survey_cache_key(survey.id)
-        serializer = SurveyDetailSerializer(survey)
-        cache.set(cache_key, serializer.data, settings.SURVEY_CACHE_TIMEOUT)
-        return serializer.data
+    @staticmethod
+    def get_survey_schema_key(survey_id, version):
+        return f"survey_schema:{survey_id}:{version}"
 
     @staticmethod
-    def get_cached_survey(survey_id):
-        cache_key = CacheService.get_survey_cache_key(survey_id)
-        return cache.get(cache_key)
+    def get_response_intake_key(response_id):
+        return f"response_intake:{response_id}"
+
+    @staticmethod
+    def get_timeseries_cache_key(survey_id, bucket, start, end):
+        return (
+            f"survey_timeseries:{survey_id}:{bucket}:"
+            f"{int(start.timestamp())}:{int(end.timestamp())}"
+        )
+
+    @staticmethod
+    def cache_survey_data(survey_id, version, etag, body):
+        """Store the rendered survey detail payload for a survey version"""
+        cache_key = CacheService.get_survey_cache_key(survey_id, version)
+        tiered_cache.set(cache_key, (etag, body), settings.SURVEY_CACHE_TIMEOUT)
+
+    @staticmethod
+    def get_cached_survey(survey_id, version):
+        """Return ``(etag, body)`` of the cached survey detail, or None"""
+        cache_key = CacheService.get_survey_cache_key(survey_id, version)
+        return tiered_cache.get(cache_key)
 
     @staticmethod
     def invalidate_survey_cache(survey_id):
-        cache_key = CacheService.get_survey_cache_key(survey_id)
-        cache.delete(cache_key)
-        # Also invalidate related report cache
         report_cache_key = CacheService.get_report_cache_key(survey_id)
         cache.delete(report_cache_key)
+        # Survey detail and schema entries are keyed by the survey version, so
+        # bumping it invalidates them all without deleting each key
+        CacheService.bump_survey_version(survey_id)
+
+    @staticmethod
+    def get_survey_version(survey_id):
+        """
+        Return the current version token of a survey. Caches keyed by it are
+        invalidated all at once by bump_survey_version.
+        """
+        cache_key = CacheService.get_survey_version_key(survey_id)
+        version = tiered_cache.get(cache_key)
+        if version is None:
+            # Random tokens rather than counters, so an evicted or expired
+            # version can never come back and match entries cached before a
+            # write
+            tiered_cache.add(
+                cache_key, uuid.uuid4().hex, settings.SURVEY_VERSION_TIMEOUT
+            )
+            version = tiered_cache.get(cache_key)
+        return version
+
+    @staticmethod
+    def bump_survey_version(survey_id):
+        cache_key = CacheService.get_survey_version_key(survey_id)
+        tiered_cache.set(cache_key, uuid.uuid4().hex, settings.SURVEY_VERSION_TIMEOUT)
+
+    @staticmethod
+    def get_responses_version(survey_id):
+        """
+        Return the version token of the responses of a survey, replaced on
+        every response or answer write
+        """
+        cache_key = CacheService.get_responses_version_key(survey_id)
+        version = cache.get(cache_key)
+        if version is None:
+            cache.add(cache_key, uuid.uuid4().hex, settings.SURVEY_VERSION_TIMEOUT)
+            version = cache.get(cache_key)
+        return version
+
+    @staticmethod
+    def bump_responses_version(survey_id):
+        cache_key = CacheService.get_responses_version_key(survey_id)
+        cache.set(cache_key, uuid.uuid4().hex, settings.SURVEY_VERSION_TIMEOUT)
+
+    @staticmethod
+    def get_report_version(survey_id):
+        """Version of the report of a survey: its questions and its responses"""
+        return (
+            f"{CacheService.get_survey_version(survey_id)}."
+            f"{CacheService.get_responses_version(survey_id)}"
+        )
 
     @staticmethod
-    def cache_report_data(survey_id, report_data):
-        cache_key = CacheService.get_report_cache_key(survey_id)
-        cache.set(cache_key, report_data, settings.REPORT_CACHE_TIMEOUT)
+    def cache_report_data(survey_id, report_data, version=None):
+        cache_key = CacheService.get_report_cache_key(survey_id, version)
+        set_cached_value(
+            cache_key,
+            report_data,
+            settings.REPORT_CACHE_TIMEOUT,
+            settings.REPORT_CACHE_STALE_TIMEOUT,
+        )
 
     @staticmethod
-    def get_cached_report(survey_id):
-        cache_key = CacheService.get_report_cache_key(survey_id)
+    def get_cached_report(survey_id, version=None):
+        cache_key = CacheService.get_report_cache_key(survey_id, version)
+        report_data = get_cached_value(cache_key)
+        return None if report_data is CACHE_MISS else report_data
+
+    @staticmethod
+    def get_or_generate_report(survey_id, generate):
+        """
+        Return the cached report of a survey, calling ``generate()`` in a
+        single worker when it is missing, near expiry or stale. Reports are
+        keyed by get_report_version, so any write to the survey, its questions
+        or its responses makes the next read regenerate it.
+        """
+        version = CacheService.get_report_version(survey_id)
+        cache_key = CacheService.get_report_cache_key(survey_id, version)
+        return get_or_compute(
+            cache_key,
+            generate,
+            settings.REPORT_CACHE_TIMEOUT,
+            stale_timeout=settings.REPORT_CACHE_STALE_TIMEOUT,
+        )
+
+    @staticmethod
+    def get_or_generate_timeseries(
+        survey_id, bucket, start, end, generate, final=False
+    ):
+        """
+        Return the cached time series of a survey over a range, calling
+        ``generate()`` in a single worker on a miss. Final series, whose
+        buckets can no longer change, are kept for much longer.
+        """
+        timeout = (
+            settings.TIMESERIES_FINAL_CACHE_TIMEOUT
+            if final
+            else settings.TIMESERIES_CACHE_TIMEOUT
+        )
+        cache_key = CacheService.get_timeseries_cache_key(survey_id, bucket, start, end)
+        return get_or_compute(cache_key, generate, timeout)
+
+    @staticmethod
+    def cache_survey_schema(survey_id, version, schema):
+        cache_key = CacheService.get_survey_schema_key(survey_id, version)
+        tiered_cache.set(cache_key, schema, settings.SURVEY_CACHE_TIMEOUT)
+
+    @staticmethod
+    def get_cached_survey_schema(survey_id, version):
+        cache_key = CacheService.get_survey_schema_key(survey_id, version)
+        return tiered_cache.get(cache_key)
+
+    @staticmethod
+    def set_response_intake_status(response_id, status):
+        cache_key = CacheService.get_response_intake_key(response_id)
+        cache.set(cache_key, status, settings.RESPONSE_INTAKE_STATUS_TIMEOUT)
+
+    @staticmethod
+    def get_response_intake_status(response_id):
+        cache_key = CacheService.get_response_intake_key(response_id)
         return cache.get(cache_key)
 
     @staticmethod
     def cache_user_progress(user_token, survey_id, progress_data):
         cache_key = CacheService.get_user_progress_key(user_token, survey_id)
         cache.set(cache_key, progress_data, settings.USER_SESSION_TIMEOUT)
+        CacheTags.register(
+            cache_key,
+            [CacheService.get_user_tag(user_token)],
+            settings.USER_SESSION_TIMEOUT,
+        )
 
     @staticmethod
     def get_user_progress(user_token, survey_id):
         cache_key = CacheService.get_user_progress_key(user_token, survey_id)
         return cache.get(cache_key)
 
+    @staticmethod
+    def delete_user_progress(user_token, survey_id):
+        cache_key = CacheService.get_user_progress_key(user_token, survey_id)
+        cache.delete(cache_key)
+        CacheTags.unregister(cache_key, [CacheService.get_user_tag(user_token)])
+
     @staticmethod
     def clear_user_cache(user_token):
         """Clear all cache entries for a specific user"""
-        # This would require a pattern-based cache clear
-        # For now, we'll implement basic clearing
-        pass
+        return CacheTags.invalidate(CacheService.get_user_tag(user_token))
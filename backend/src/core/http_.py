@@ -1,3 +1,8 @@
+import os
+import re
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.http import parse_etags
 from rest_framework import status
 from rest_framework.exceptions import APIException
 
@@ -28,3 +33,119 @@ class HttpError(APIException):
             error_code = self.status_code
 
         self.detail = {"status": "Failed", "code": error_code, "message": message}
+
+
+# Bytes read per chunk when streaming a file from disk
+FILE_CHUNK_SIZE = 64 * 1024
+
+RANGE_HEADER_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def parse_range_header(header, size):
+    """
+    Return the inclusive ``(start, end)`` byte range requested by a single-range
+    ``Range`` header, ``None`` when the whole file should be sent, or raise
+    ValueError when the range cannot be satisfied.
+    """
+    match = RANGE_HEADER_RE.match(header.strip()) if header else None
+    if match is None:
+        # Missing, malformed and multi-range headers are served in full
+        return None
+
+    start, end = match.groups()
+    if not start and not end:
+        return None
+
+    if not start:
+        # Suffix range: the last N bytes
+        length = int(end)
+        if length == 0 or size == 0:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+
+    start = int(start)
+    end = int(end) if end else size - 1
+    if start >= size or end < start:
+        raise ValueError(header)
+    return start, min(end, size - 1)
+
+
+def iter_file_range(path, start, length, chunk_size=FILE_CHUNK_SIZE):
+    with open(path, "rb") as file:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(chunk_size, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def ranged_file_response(request, path, content_type, filename, etag=None):
+    """
+    Stream a file from disk honouring single ``Range`` requests (RFC 9110), so
+    interrupted downloads can be resumed. Answers 206 with the requested slice,
+    416 when the range is out of bounds and 200 with the full file otherwise.
+    """
+    size = os.path.getsize(path)
+
+    byte_range = None
+    if_range = request.headers.get("If-Range")
+    if if_range is None or (etag is not None and if_range == etag):
+        try:
+            byte_range = parse_range_header(request.headers.get("Range"), size)
+        except ValueError:
+            response = HttpResponse(
+                status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+            )
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+
+    if byte_range is None:
+        start, end = 0, size - 1
+        response = StreamingHttpResponse(
+            iter_file_range(path, 0, size), content_type=content_type
+        )
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            iter_file_range(path, start, end - start + 1),
+            content_type=content_type,
+            status=status.HTTP_206_PARTIAL_CONTENT,
+        )
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+    response["Content-Length"] = str(max(end - start + 1, 0))
+    response["Accept-Ranges"] = "bytes"
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    if etag is not None:
+        response["ETag"] = etag
+    return response
+
+
+def etag_matches(request, etag):
+    """Whether the ``If-None-Match`` header of a request matches an ETag"""
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+
+    # Weak comparison (RFC 9110 13.1.2): W/ prefixes are ignored
+    etags = [tag.removeprefix("W/") for tag in parse_etags(header)]
+    return "*" in etags or etag.removeprefix("W/") in etags
+
+
+def cached_json_response(request, body, etag):
+    """
+    Answer with pre-rendered JSON bytes, or 304 Not Modified when the client
+    already holds the representation identified by ``etag``.
+    """
+    if etag_matches(request, etag):
+        response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = HttpResponse(body, content_type="application/json")
+        response["Content-Length"] = str(len(body))
+
+    response["ETag"] = etag
+    # Clients may keep the payload but must revalidate it before reuse
+    response["Cache-Control"] = "no-cache"
+    return response
@@ -1,10 +1,316 @@
+import hashlib
+import json
+from base64 import b64decode, b64encode
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import EmptyPage, PageNotAnInteger
+from django.core.paginator import Paginator as DjangoPaginator
+from django.db import connection
+from django.db.models import Q
 from rest_framework import status
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from .api_message import INVALID_CURSOR
+from .cache import get_or_compute
+
+
+class CountType:
+    EXACT = "exact"
+    CACHED = "cached"
+    ESTIMATE = "estimate"
+
+
+COUNT_MODES = {
+    "exact": "exact",
+    "true": "exact",
+    "cached": "cached",
+    "estimate": "estimate",
+    "auto": "auto",
+    "false": None,
+    "none": None,
+    "0": None,
+}
+
+
+def get_count_mode(request, param, default):
+    """Read the count mode of a list request, e.g. ``?count=false``"""
+    mode = request.query_params.get(param)
+    if mode is None:
+        return default
+    return COUNT_MODES.get(mode.lower(), default)
+
+
+def count_queryset(queryset, mode="auto"):
+    """
+    Count a queryset with the given strategy, returning ``(count, count type)``:
+
+    - ``exact``: ``SELECT COUNT(*)``.
+    - ``cached``: an exact count shared for PAGINATION_COUNT_CACHE_TIMEOUT
+      seconds, computed by one worker at a time.
+    - ``estimate``: the planner's row estimate, no rows are read.
+    - ``auto``: exact when there are at most PAGINATION_EXACT_COUNT_LIMIT rows
+      (found by counting a ``LIMIT`` subquery), otherwise cached.
+
+    A mode of None skips the count, ``(None, None)``.
+    """
+    if mode is None:
+        return None, None
+
+    queryset = queryset.order_by()
+    if mode == "exact":
+        return queryset.count(), CountType.EXACT
+    if mode == "estimate" and connection.vendor == "postgresql":
+        return estimate_count(queryset), CountType.ESTIMATE
+
+    if mode == "auto":
+        limit = settings.PAGINATION_EXACT_COUNT_LIMIT
+        count = queryset[: limit + 1].count()
+        if count <= limit:
+            return count, CountType.EXACT
+
+    count = get_or_compute(
+        get_count_cache_key(queryset),
+        queryset.count,
+        settings.PAGINATION_COUNT_CACHE_TIMEOUT,
+        background=False,
+    )
+    return count, CountType.CACHED
+
+
+def get_count_cache_key(queryset):
+    sql, params = queryset.query.sql_with_params()
+    digest = hashlib.md5(
+        f"{sql}:{params!r}".encode(), usedforsecurity=False
+    ).hexdigest()
+    return f"count:{queryset.model._meta.db_table}:{digest}"
+
+
+class CountStrategyPaginator(DjangoPaginator):
+    """
+    A paginator which never counts to serve a page: the requested page is read
+    with one extra row, which tells whether a next page exists, and ``count``
+    is set to the lower bound this gives. The total shown to clients comes
+    from ``count_queryset``.
+    """
+
+    def page(self, number):
+        try:
+            number = int(number)
+        except (TypeError, ValueError) as err:
+            raise PageNotAnInteger(self.error_messages["invalid_page"]) from err
+        if number < 1:
+            raise EmptyPage(self.error_messages["min_page"])
+
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom : bottom + self.per_page + 1])
+        if not rows and (number > 1 or not self.allow_empty_first_page):
+            raise EmptyPage(self.error_messages["no_results"])
+
+        # Replaces the cached_property, so num_pages and has_next() follow it
+        self.__dict__["count"] = bottom + len(rows)
+        return self._get_page(rows[: self.per_page], number, self)
 
 
 class CustomPagination(PageNumberPagination):
+    """
+    Page number pagination. The total is counted according to ``?count=``
+    (see ``count_queryset``), ``auto`` by default, and ``?count=false`` leaves
+    it out; ``count_type`` tells which kind of count was returned.
+    """
+
+    page_size = 10
+    django_paginator_class = CountStrategyPaginator
+    count_query_param = "count"
+    count_mode = "auto"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page = super().paginate_queryset(queryset, request, view)
+        if page is not None:
+            mode = get_count_mode(request, self.count_query_param, self.count_mode)
+            self.count, self.count_type = count_queryset(queryset, mode)
+        return page
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "status": "success",
+                "code": status.HTTP_200_OK,
+                "data": {
+                    "count": self.count,
+                    "count_type": self.count_type,
+                    "page_size": self.page_size,
+                    "next": self.get_next_link(),
+                    "previous": self.get_previous_link(),
+                    "results": data,
+                },
+            }
+        )
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination on the ordering of the queryset, e.g. ``(-started_at,
+    id)``. A page is fetched with a ``WHERE (started_at, id) < (...)`` style
+    condition matching an index rather than an OFFSET, so any page costs the
+    same however deep it is. The last ordering field must be unique and none
+    may be null.
+
+    The total is only computed on request, with any ``?count=`` mode of
+    ``count_queryset``.
+    """
+
     page_size = 10
+    max_page_size = 100
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+    count_mode = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset)
+        mode = get_count_mode(request, self.count_query_param, self.count_mode)
+        self.count, self.count_type = count_queryset(queryset, mode)
+
+        cursor = self.decode_cursor(request)
+        self.reverse = bool(cursor and cursor.get("r"))
+
+        queryset = queryset.order_by(
+            *(self.reverse_ordering() if self.reverse else self.forward_ordering())
+        )
+        if cursor is not None:
+            queryset = queryset.filter(
+                self.get_keyset_filter(queryset.model, cursor["v"])
+            )
+
+        results = list(queryset[: self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[: self.page_size]
+
+        if self.reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+
+        self.page = results
+        return results
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def get_ordering(self, queryset):
+        ordering = [
+            field
+            for field in queryset.query.order_by or queryset.model._meta.ordering
+            if isinstance(field, str)
+        ]
+        if not ordering or ordering[-1].lstrip("-") not in ("id", "pk"):
+            # The primary key makes the ordering total
+            ordering.append("id")
+        return [(field.lstrip("-"), field.startswith("-")) for field in ordering]
+
+    def forward_ordering(self):
+        return [
+            f"-{field}" if descending else field for field, descending in self.ordering
+        ]
+
+    def reverse_ordering(self):
+        return [
+            field if descending else f"-{field}" for field, descending in self.ordering
+        ]
+
+    def get_keyset_filter(self, model, values):
+        """
+        ``(a, b) > (x, y)`` expanded to ``a > x OR (a = x AND b > y)``, with
+        each comparison flipped for descending fields and on reversed pages
+        """
+        if len(values) != len(self.ordering):
+            raise NotFound(INVALID_CURSOR)
+
+        try:
+            values = [
+                self.get_ordering_field(model, field).to_python(value)
+                for (field, _descending), value in zip(
+                    self.ordering, values, strict=True
+                )
+            ]
+        except (ValidationError, ValueError, TypeError) as err:
+            raise NotFound(INVALID_CURSOR) from err
+        if None in values:
+            raise NotFound(INVALID_CURSOR)
+
+        condition = Q()
+        equal = {}
+        for (field, descending), value in zip(self.ordering, values, strict=True):
+            lookup = "lt" if descending != self.reverse else "gt"
+            condition |= Q(**equal, **{f"{field}__{lookup}": value})
+            equal[field] = value
+        return condition
+
+    @staticmethod
+    def get_ordering_field(model, path):
+        """The model field an ordering such as ``survey__created_at`` refers to"""
+        field = None
+        for name in path.split("__"):
+            if field is not None:
+                if field.related_model is None:
+                    raise FieldDoesNotExist(path)
+                model = field.related_model
+            field = model._meta.pk if name == "pk" else model._meta.get_field(name)
+        return field
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            cursor = json.loads(b64decode(encoded.encode("ascii")).decode("utf-8"))
+            values = cursor["v"]
+        except (TypeError, ValueError, KeyError, UnicodeError) as err:
+            raise NotFound(INVALID_CURSOR) from err
+        if not isinstance(values, list):
+            raise NotFound(INVALID_CURSOR)
+        return cursor
+
+    def encode_cursor(self, instance, reverse=False):
+        values = [
+            self.to_cursor_value(getattr(instance, field))
+            for field, _descending in self.ordering
+        ]
+        cursor = {"v": values}
+        if reverse:
+            cursor["r"] = 1
+        encoded = b64encode(json.dumps(cursor).encode("utf-8")).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    @staticmethod
+    def to_cursor_value(value):
+        if hasattr(value, "isoformat"):
+            return value.isoformat()
+        if isinstance(value, int | float | str) or value is None:
+            return value
+        return str(value)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1])
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
 
     def get_paginated_response(self, data):
         return Response(
@@ -12,7 +318,8 @@ class CustomPagination(PageNumberPagination):
                 "status": "success",
                 "code": status.HTTP_200_OK,
                 "data": {
-                    "count": self.page.paginator.count,
+                    "count": self.count,
+                    "count_type": self.count_type,
                     "page_size": self.page_size,
                     "next": self.get_next_link(),
                     "previous": self.get_previous_link(),
@@ -20,3 +327,26 @@ class CustomPagination(PageNumberPagination):
                 },
             }
         )
+
+
+def estimate_count(queryset):
+    """
+    Row estimate of a queryset: the table statistics when it is unfiltered,
+    otherwise the top node of its plan (``EXPLAIN``, nothing is executed)
+    """
+    if not queryset.query.where:
+        return estimate_table_count(queryset.model)
+    plan = json.loads(queryset.explain(format="json"))
+    return plan[0]["Plan"]["Plan Rows"]
+
+
+def estimate_table_count(model):
+    """Row count of a model's table from the planner statistics (pg_class)"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+            [model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    # -1 until the table has been vacuumed or analyzed
+    return max(row[0], 0) if row else 0
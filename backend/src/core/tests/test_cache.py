@@ -1,7 +1,13 @@
+import json
+import threading
+import time
 import unittest
-from unittest.mock import patch
+import uuid
+from unittest.mock import MagicMock, patch
 
 from core import cache
+from django.conf import settings
+from django.core.cache import cache as django_cache
 
 
 class TestCacheKeyGenerator(unittest.TestCase):
@@ -27,7 +33,237 @@ class TestCachedFunction(unittest.TestCase):
         self.assertTrue(mock_cache.set.called)
 
 
+class TestGetOrCompute(unittest.TestCase):
+    def setUp(self):
+        self.key = f"test:{uuid.uuid4().hex}"
+
+    def test_cached_none_is_a_hit(self):
+        calls = []
+
+        @cache.cached_function(timeout=60, key_prefix=self.key)
+        def lookup():
+            calls.append(1)
+
+        self.assertIsNone(lookup())
+        self.assertIsNone(lookup())
+        self.assertEqual(len(calls), 1)
+
+    def test_concurrent_misses_compute_once(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return "report"
+
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(
+                    cache.get_or_compute(self.key, compute, 60)
+                )
+            )
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, ["report"] * 5)
+        self.assertEqual(len(calls), 1)
+
+    @patch("core.cache.close_old_connections")
+    @patch("core.cache.refresh_executor")
+    def test_stale_value_served_while_refreshing(self, mock_executor, mock_close):
+        mock_executor.submit.side_effect = lambda func, *args: func(*args)
+        cache.set_cached_value(self.key, "old", timeout=-1, stale_timeout=60)
+
+        value = cache.get_or_compute(self.key, lambda: "new", 60, stale_timeout=60)
+
+        self.assertEqual(value, "old")
+        mock_executor.submit.assert_called_once()
+        self.assertEqual(cache.get_cached_value(self.key), "new")
+        self.assertIsNone(django_cache.get(cache.get_lock_key(self.key)))
+        mock_close.assert_called_once()
+
+    def test_stale_value_served_while_locked(self):
+        cache.set_cached_value(self.key, "old", timeout=-1, stale_timeout=60)
+        django_cache.add(cache.get_lock_key(self.key), "other", 30)
+
+        value = cache.get_or_compute(self.key, lambda: "new", 60, background=False)
+
+        self.assertEqual(value, "old")
+
+    @patch("core.cache.random.random")
+    def test_early_refresh_probability(self, mock_random):
+        envelope = {"value": 1, "expires_at": time.time() + 10, "delta": 5}
+
+        mock_random.return_value = 0.9
+        self.assertFalse(cache.should_refresh(envelope, beta=1.0))
+        # -5 * ln(0.01) is about 23 seconds of head start
+        mock_random.return_value = 0.01
+        self.assertTrue(cache.should_refresh(envelope, beta=1.0))
+
+
+class TestLocalCache(unittest.TestCase):
+    def test_lru_eviction(self):
+        local = cache.LocalCache(maxsize=2, ttl=60)
+        local.set("a", 1)
+        local.set("b", 2)
+        local.get("a")
+        local.set("c", 3)
+
+        self.assertEqual(local.get("a"), (True, 1))
+        self.assertEqual(local.get("b"), (False, None))
+        self.assertEqual(local.evictions, 1)
+
+    @patch("core.cache.time.monotonic")
+    def test_ttl_expiration(self, mock_monotonic):
+        mock_monotonic.return_value = 100
+        local = cache.LocalCache(maxsize=2, ttl=5)
+        local.set("a", None)
+        local.set("b", 2, ttl=1)
+
+        mock_monotonic.return_value = 102
+        self.assertEqual(local.get("a"), (True, None))
+        self.assertEqual(local.get("b"), (False, None))
+        self.assertEqual((local.hits, local.misses, local.expirations), (1, 1, 1))
+
+
+class TestTieredCache(unittest.TestCase):
+    def setUp(self):
+        self.tiered = cache.TieredCache(maxsize=10, ttl=60)
+        self.backend = MagicMock(default_timeout=300)
+        self.backend.get.return_value = {"id": 1}
+        patcher = patch.object(
+            cache.TieredCache, "backend", property(lambda _self: self.backend)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_reads_through_the_local_tier(self):
+        self.assertEqual(self.tiered.get("survey:1"), {"id": 1})
+        self.assertEqual(self.tiered.get("survey:1"), {"id": 1})
+
+        self.backend.get.assert_called_once()
+        self.assertEqual(self.tiered.stats()["hits"], 1)
+        self.assertEqual(self.tiered.stats()["misses"], 1)
+
+    def test_writes_update_both_tiers(self):
+        self.tiered.set("survey:1", {"id": 2}, 30)
+        self.assertEqual(self.tiered.get("survey:1"), {"id": 2})
+        self.backend.set.assert_called_once_with("survey:1", {"id": 2}, 30)
+
+        self.tiered.delete("survey:1")
+        self.assertEqual(self.tiered.get("survey:1"), {"id": 1})
+
+    def test_publishes_and_applies_invalidations(self):
+        client = MagicMock()
+        self.tiered.channel = "cache:invalidate"
+        self.tiered.get_redis_client = lambda: client
+
+        self.tiered.set("survey:1", {"id": 2})
+        message = client.publish.call_args.args[1]
+        self.assertEqual(json.loads(message)["keys"], ["survey:1"])
+
+        # Own messages are ignored, other processes' drop the local copy
+        self.tiered.handle_message(message)
+        self.assertEqual(self.tiered.local.get("survey:1"), (True, {"id": 2}))
+        self.tiered.handle_message(json.dumps({"origin": "x", "keys": ["survey:1"]}))
+        self.assertEqual(self.tiered.local.get("survey:1"), (False, None))
+        self.assertEqual(self.tiered.stats()["invalidations"], 1)
+
+
+class TestCacheTags(unittest.TestCase):
+    def setUp(self):
+        self.token = uuid.uuid4().hex
+        self.survey_id = uuid.uuid4().hex
+
+    def test_clear_user_cache(self):
+        other_token = uuid.uuid4().hex
+        cache.CacheService.cache_user_progress(self.token, self.survey_id, {"p": 1})
+        cache.CacheService.cache_user_progress(self.token, "other", {"p": 2})
+        cache.CacheService.cache_user_progress(other_token, self.survey_id, {"p": 3})
+
+        self.assertEqual(cache.CacheService.clear_user_cache(self.token), 2)
+
+        self.assertIsNone(
+            cache.CacheService.get_user_progress(self.token, self.survey_id)
+        )
+        self.assertIsNone(cache.CacheService.get_user_progress(self.token, "other"))
+        self.assertEqual(
+            cache.CacheService.get_user_progress(other_token, self.survey_id),
+            {"p": 3},
+        )
+        self.assertEqual(cache.CacheService.clear_user_cache(self.token), 0)
+
+    def test_deleted_progress_leaves_its_tag(self):
+        cache.CacheService.cache_user_progress(self.token, self.survey_id, {"p": 1})
+        cache.CacheService.delete_user_progress(self.token, self.survey_id)
+
+        tag_key = cache.CacheTags.get_tag_key(
+            cache.CacheService.get_user_tag(self.token)
+        )
+        self.assertEqual(django_cache.get(tag_key) or [], [])
+        self.assertEqual(cache.CacheService.clear_user_cache(self.token), 0)
+
+    @patch("core.cache.CacheTags.register")
+    def test_versioned_entries_are_not_tagged(self, mock_register):
+        cache.CacheService.cache_survey_data(self.survey_id, "v1", '"e"', b"{}")
+        cache.CacheService.cache_report_data(self.survey_id, {"r": 1}, version="v1")
+
+        mock_register.assert_not_called()
+
+    @patch("core.cache.get_redis_client")
+    def test_redis_sets_are_pipelined(self, mock_client):
+        pipeline = mock_client.return_value.pipeline.return_value
+        pipeline.execute.return_value = [{b"user_progress:t:1"}, {b"other"}, 2]
+
+        cache.CacheTags.register("user_progress:t:1", ["user:t", "survey:1"], 60)
+        self.assertEqual(pipeline.sadd.call_count, 2)
+        pipeline.execute.assert_called_once()
+
+        with patch.object(cache.tiered_cache, "delete") as mock_delete:
+            count = cache.CacheTags.invalidate("user:t", "survey:1")
+
+        self.assertEqual(count, 2)
+        self.assertEqual(pipeline.smembers.call_count, 2)
+        pipeline.delete.assert_called_once()
+        self.assertEqual(
+            set(mock_delete.call_args.args), {"user_progress:t:1", "other"}
+        )
+        mock_client.return_value.scan.assert_not_called()
+        mock_client.return_value.keys.assert_not_called()
+
+
 class TestCacheService(unittest.TestCase):
+    @patch("core.cache.cache")
+    @patch("core.cache.tiered_cache")
+    def test_version_tokens_expire(self, mock_tiered, mock_cache):
+        mock_tiered.get.return_value = None
+        mock_cache.get.return_value = None
+
+        cache.CacheService.get_survey_version("gone")
+        cache.CacheService.bump_survey_version("gone")
+        cache.CacheService.get_responses_version("gone")
+        cache.CacheService.bump_responses_version("gone")
+
+        timeouts = [
+            call.args[2]
+            for mock in (
+                mock_tiered.add,
+                mock_tiered.set,
+                mock_cache.add,
+                mock_cache.set,
+            )
+            for call in mock.call_args_list
+        ]
+        self.assertEqual(len(timeouts), 4)
+        self.assertTrue(
+            all(timeout == settings.SURVEY_VERSION_TIMEOUT for timeout in timeouts)
+        )
+
     def test_get_survey_cache_key(self):
         self.assertEqual(cache.CacheService.get_survey_cache_key(1), "survey:1")
 
@@ -1,6 +1,15 @@
+import os
+import tempfile
 import unittest
 
-from core.http_ import Http404, HttpError
+from core.http_ import (
+    Http404,
+    HttpError,
+    cached_json_response,
+    parse_range_header,
+    ranged_file_response,
+)
+from django.test import RequestFactory
 from rest_framework import status
 
 
@@ -24,3 +33,76 @@ class TestHttpExceptions(unittest.TestCase):
         exc = HttpError(message="Bad req", error_code=456)
         self.assertEqual(exc.detail["message"], "Bad req")
         self.assertEqual(exc.detail["code"], 456)
+
+
+class TestRangedFileResponse(unittest.TestCase):
+    def setUp(self):
+        file = tempfile.NamedTemporaryFile(delete=False)
+        file.write(b"0123456789")
+        file.close()
+        self.path = file.name
+        self.addCleanup(os.remove, self.path)
+
+    def get(self, **headers):
+        request = RequestFactory().get("/", headers=headers)
+        return ranged_file_response(
+            request, self.path, "text/csv", "export.csv", etag='"v1"'
+        )
+
+    def test_parse_range_header(self):
+        self.assertEqual(parse_range_header("bytes=2-5", 10), (2, 5))
+        self.assertEqual(parse_range_header("bytes=4-", 10), (4, 9))
+        self.assertEqual(parse_range_header("bytes=-3", 10), (7, 9))
+        self.assertEqual(parse_range_header("bytes=8-20", 10), (8, 9))
+        self.assertIsNone(parse_range_header(None, 10))
+        self.assertIsNone(parse_range_header("bytes=0-1,4-5", 10))
+        with self.assertRaises(ValueError):
+            parse_range_header("bytes=10-", 10)
+
+    def test_full_file(self):
+        response = self.get()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertEqual(response["Content-Length"], "10")
+        self.assertEqual(b"".join(response.streaming_content), b"0123456789")
+
+    def test_partial_content(self):
+        response = self.get(range="bytes=6-")
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(response["Content-Range"], "bytes 6-9/10")
+        self.assertEqual(b"".join(response.streaming_content), b"6789")
+
+    def test_range_not_satisfiable(self):
+        response = self.get(range="bytes=20-30")
+        self.assertEqual(
+            response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+        )
+        self.assertEqual(response["Content-Range"], "bytes */10")
+
+    def test_stale_if_range_sends_full_file(self):
+        response = self.get(range="bytes=6-", if_range='"v0"')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b"".join(response.streaming_content), b"0123456789")
+
+
+class TestCachedJsonResponse(unittest.TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def test_full_response(self):
+        response = cached_json_response(self.factory.get("/"), b'{"a": 1}', '"abc"')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.content, b'{"a": 1}')
+        self.assertEqual(response["ETag"], '"abc"')
+
+    def test_not_modified(self):
+        for header in ('"abc"', 'W/"abc"', '"xyz", "abc"', "*"):
+            request = self.factory.get("/", HTTP_IF_NONE_MATCH=header)
+            response = cached_json_response(request, b"{}", '"abc"')
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+            self.assertEqual(response.content, b"")
+
+        request = self.factory.get("/", HTTP_IF_NONE_MATCH='"xyz"')
+        response = cached_json_response(request, b"{}", '"abc"')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
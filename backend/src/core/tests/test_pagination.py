@@ -1,6 +1,22 @@
-from core.pagination import CustomPagination
+import json
+from base64 import b64encode
+from urllib.parse import urlencode
+
+from core.pagination import CountType, CustomPagination, KeysetPagination
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
 from rest_framework.response import Response
-from rest_framework.test import APITestCase
+from rest_framework.test import APIRequestFactory, APITestCase
+from surveys.models.survey import SurveyResponse
+from surveys.tests.factories.survey_factory import (
+    SurveyFactory,
+    SurveyResponseFactory,
+)
 
 
 class TestCustomPagination(APITestCase):
@@ -12,6 +28,7 @@ class TestCustomPagination(APITestCase):
             {"paginator": type("Paginator", (), {"count": 100})(), "number": 1},
         )()
         paginator.page_size = 10
+        paginator.count, paginator.count_type = 100, CountType.EXACT
         paginator.get_next_link = lambda: None
         paginator.get_previous_link = lambda: None
         data = [1, 2, 3]
@@ -19,4 +36,143 @@ class TestCustomPagination(APITestCase):
         self.assertIsInstance(response, Response)
         self.assertEqual(response.data["status"], "success")
         self.assertEqual(response.data["data"]["count"], 100)
+        self.assertEqual(response.data["data"]["count_type"], "exact")
         self.assertEqual(response.data["data"]["results"], data)
+
+
+class TestCountStrategies(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = APIRequestFactory()
+        self.survey = SurveyFactory()
+        for _ in range(12):
+            SurveyResponseFactory(survey=self.survey)
+        self.queryset = SurveyResponse.objects.filter(survey=self.survey).order_by(
+            "-started_at", "id"
+        )
+
+    def paginate(self, url):
+        paginator = CustomPagination()
+        request = Request(self.factory.get(url))
+        page = paginator.paginate_queryset(self.queryset, request)
+        return paginator, page, paginator.get_paginated_response([]).data["data"]
+
+    def test_small_results_are_counted_exactly(self):
+        paginator, page, data = self.paginate("/responses/")
+
+        self.assertEqual(len(page), 10)
+        self.assertEqual((data["count"], data["count_type"]), (12, "exact"))
+        self.assertIsNotNone(data["next"])
+
+        _paginator, page, data = self.paginate("/responses/?page=2")
+        self.assertEqual(len(page), 2)
+        self.assertIsNone(data["next"])
+        self.assertIsNotNone(data["previous"])
+
+    @override_settings(PAGINATION_EXACT_COUNT_LIMIT=5)
+    def test_large_results_are_counted_once(self):
+        _paginator, _page, data = self.paginate("/responses/")
+        self.assertEqual((data["count"], data["count_type"]), (12, "cached"))
+
+        SurveyResponseFactory(survey=self.survey)
+        _paginator, _page, data = self.paginate("/responses/")
+        self.assertEqual((data["count"], data["count_type"]), (12, "cached"))
+
+        _paginator, _page, data = self.paginate("/responses/?count=exact")
+        self.assertEqual((data["count"], data["count_type"]), (13, "exact"))
+
+    def test_count_can_be_skipped(self):
+        with CaptureQueriesContext(connection) as context:
+            _paginator, page, data = self.paginate("/responses/?count=false")
+
+        self.assertEqual(len(context.captured_queries), 1)
+        self.assertNotIn("COUNT", context.captured_queries[0]["sql"])
+        self.assertEqual(len(page), 10)
+        self.assertEqual((data["count"], data["count_type"]), (None, None))
+        self.assertIsNotNone(data["next"])
+
+    def test_planner_estimate(self):
+        _paginator, _page, data = self.paginate("/responses/?count=estimate")
+
+        self.assertEqual(data["count_type"], "estimate")
+        self.assertGreaterEqual(data["count"], 0)
+
+
+class TestKeysetPagination(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.survey = SurveyFactory()
+        for _ in range(25):
+            SurveyResponseFactory(survey=self.survey)
+        # Ties on started_at are broken by id
+        SurveyResponse.objects.filter(
+            id__in=SurveyResponse.objects.values("id")[:10]
+        ).update(started_at=timezone.now())
+        self.queryset = SurveyResponse.objects.filter(survey=self.survey).order_by(
+            "-started_at", "id"
+        )
+
+    def paginate(self, url):
+        paginator = KeysetPagination()
+        request = Request(self.factory.get(url))
+        page = paginator.paginate_queryset(self.queryset, request)
+        return paginator, [response.id for response in page]
+
+    def test_pages_follow_the_ordering(self):
+        expected = list(self.queryset.values_list("id", flat=True))
+
+        seen, links = [], []
+        url = "/responses/?page_size=10"
+        while url:
+            paginator, ids = self.paginate(url)
+            seen.extend(ids)
+            links.append(paginator.get_previous_link())
+            url = paginator.get_next_link()
+
+        self.assertEqual(seen, expected)
+        self.assertIsNone(links[0])
+
+        # Walking back from the last page
+        paginator, ids = self.paginate(links[-1])
+        self.assertEqual(ids, expected[10:20])
+        paginator, ids = self.paginate(paginator.get_previous_link())
+        self.assertEqual(ids, expected[:10])
+        self.assertIsNone(paginator.get_previous_link())
+
+    def test_pages_do_not_use_offset(self):
+        paginator, _ids = self.paginate("/responses/?page_size=5")
+
+        with CaptureQueriesContext(connection) as context:
+            self.paginate(paginator.get_next_link())
+
+        sql = context.captured_queries[0]["sql"]
+        self.assertNotIn("OFFSET", sql)
+        self.assertIn("LIMIT 6", sql)
+
+    def test_count_is_optional(self):
+        paginator, _ids = self.paginate("/responses/")
+        self.assertIsNone(paginator.get_paginated_response([]).data["data"]["count"])
+
+        paginator, _ids = self.paginate("/responses/?count=exact")
+        self.assertEqual(paginator.count, 25)
+        self.assertEqual(paginator.count_type, "exact")
+
+        paginator, _ids = self.paginate("/responses/?count=estimate")
+        self.assertGreaterEqual(paginator.count, 0)
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(NotFound):
+            self.paginate("/responses/?cursor=not-a-cursor")
+
+    def test_tampered_cursor(self):
+        response = self.queryset.first()
+        for values in (
+            ["not-a-date", str(response.id)],
+            [response.started_at.isoformat(), "not-a-uuid"],
+            [response.started_at.isoformat(), None],
+            [[], str(response.id)],
+        ):
+            cursor = b64encode(json.dumps({"v": values}).encode()).decode()
+            query = urlencode({"cursor": cursor})
+            with self.subTest(values=values), self.assertRaises(NotFound):
+                self.paginate(f"/responses/?{query}")
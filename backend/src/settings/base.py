@@ -111,8 +111,59 @@ CACHES = {
 # Cache timeouts
 SURVEY_CACHE_TIMEOUT = 3600  # 1 hour
 REPORT_CACHE_TIMEOUT = 1800  # 30 minutes
+# Expired reports are served this long while one worker regenerates them
+REPORT_CACHE_STALE_TIMEOUT = 600  # 10 minutes
 USER_SESSION_TIMEOUT = 86400  # 24 hours
 TEMPLATE_CACHE_TIMEOUT = 7200  # 2 hours
+# Survey and response version tokens, which the entries above are keyed by.
+# Longer than any entry they key, so only unused surveys lose theirs
+SURVEY_VERSION_TIMEOUT = 1209600  # 2 weeks
+
+# Survey time series: buckets which ended more than the settle time ago no
+# longer change (responses rarely complete a day after starting) and are
+# cached for the final timeout, more recent buckets only briefly
+TIMESERIES_SETTLE_TIME = 86400  # 24 hours
+TIMESERIES_CACHE_TIMEOUT = 60  # 1 minute
+TIMESERIES_FINAL_CACHE_TIMEOUT = 604800  # 1 week
+# Unique respondent, IP and country counters (HyperLogLogs) of a survey,
+# kept this long after its last response
+DISTINCT_COUNTER_TIMEOUT = 34560000  # 400 days
+# Text answers scored per sentiment batch. Each run rescans this far behind
+# its high-water mark for answers committed after later ones were scored
+SENTIMENT_BATCH_SIZE = 5000
+SENTIMENT_HIGH_WATER_OVERLAP = 300  # 5 minutes
+
+# In-process cache tier in front of Redis for hot survey definitions, kept
+# coherent across processes by invalidations published on a pub/sub channel
+TIERED_CACHE_SIZE = config("TIERED_CACHE_SIZE", default=1024, cast=int)
+TIERED_CACHE_TTL = config("TIERED_CACHE_TTL", default=5, cast=int)  # seconds
+TIERED_CACHE_CHANNEL = "cache:invalidate"
+
+# List totals: counted exactly up to the limit, above it counted once per
+# timeout and cached (or estimated by the planner with ?count=estimate)
+PAGINATION_EXACT_COUNT_LIMIT = 1000
+PAGINATION_COUNT_CACHE_TIMEOUT = 300  # 5 minutes
+
+# Response intake: accept submissions onto a Redis stream and persist them in
+# batches with `manage.py process_response_intake` instead of synchronously
+RESPONSE_INTAKE_ENABLED = config("RESPONSE_INTAKE_ENABLED", default=False, cast=bool)
+RESPONSE_INTAKE_STREAM = "survey_responses:intake"
+RESPONSE_INTAKE_GROUP = "response_writers"
+RESPONSE_INTAKE_STATUS_TIMEOUT = 86400  # 24 hours
+
+# Request headers (WSGI META keys) holding the respondent's IP and country,
+# point them at what the proxy or CDN in front of the app sets
+RESPONSE_CLIENT_IP_HEADER = config("RESPONSE_CLIENT_IP_HEADER", default="REMOTE_ADDR")
+RESPONSE_COUNTRY_HEADER = config(
+    "RESPONSE_COUNTRY_HEADER", default="HTTP_CF_IPCOUNTRY"
+)
+
+# Save-and-resume drafts live in the cache (USER_SESSION_TIMEOUT); drafts idle
+# this long are written as incomplete responses, or dropped, by the sweeper
+RESPONSE_DRAFT_IDLE_TIMEOUT = 43200  # 12 hours
+RESPONSE_DRAFT_PERSIST_ABANDONED = config(
+    "RESPONSE_DRAFT_PERSIST_ABANDONED", default=True, cast=bool
+)
 
 # Debug toolbar settings
 CSRF_COOKIE_SECURE = True if not DEBUG else False
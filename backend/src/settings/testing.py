@@ -8,6 +8,13 @@ if "pytest" in sys.modules or "test" in sys.argv[0]:
     REST_FRAMEWORK["DEFAULT_THROTTLE_CLASSES"] = []
     REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"] = {}
 
+    # Tests must not depend on a running Redis server
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
 
 ALLOWED_HOSTS = ["*"]
 
@@ -0,0 +1,105 @@
+import math
+import uuid
+from datetime import date, datetime
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from surveys.models.question import FieldType
+
+NUMBER_FIELD_TYPES = (FieldType.NUMBER, FieldType.RATING, FieldType.SCALE)
+CHOICE_FIELD_TYPES = (FieldType.SINGLE_CHOICE, FieldType.MULTIPLE_CHOICE)
+JSON_FIELD_TYPES = (FieldType.BOOLEAN, FieldType.MATRIX)
+
+# Keys an answer payload may carry its value under, in order of precedence
+ANSWER_VALUE_KEYS = (
+    "value",
+    "number_answer",
+    "date_answer",
+    "datetime_answer",
+    "json_answer",
+    "text_answer",
+)
+
+
+class AnswerValueError(ValueError):
+    """Raised when a submitted value does not match the question field type"""
+
+
+def get_answer_value(answer_data):
+    for key in ANSWER_VALUE_KEYS:
+        if key in answer_data:
+            return answer_data[key]
+    return None
+
+
+def to_number(value):
+    if isinstance(value, bool):
+        raise AnswerValueError(f"'{value}' is not a valid number.")
+    try:
+        result = float(value)
+    except (TypeError, ValueError) as err:
+        raise AnswerValueError(f"'{value}' is not a valid number.") from err
+    if not math.isfinite(result):
+        # NaN would pass every min/max check and poison the aggregates
+        raise AnswerValueError(f"'{value}' is not a valid number.")
+    return result
+
+
+def to_date(value):
+    if isinstance(value, date) and not isinstance(value, datetime):
+        return value
+    parsed = parse_date(value) if isinstance(value, str) else None
+    if parsed is None:
+        raise AnswerValueError(f"'{value}' is not a valid date (YYYY-MM-DD).")
+    return parsed
+
+
+def to_datetime(value):
+    parsed = value if isinstance(value, datetime) else None
+    if isinstance(value, str):
+        try:
+            parsed = parse_datetime(value)
+        except ValueError:
+            parsed = None
+    if parsed is None:
+        raise AnswerValueError(f"'{value}' is not a valid ISO 8601 datetime.")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def to_choices(value):
+    # Choice answers always store the selected option values as a list
+    if value is None or value == "":
+        return []
+    if isinstance(value, list | tuple):
+        return [str(choice) for choice in value]
+    return [str(value)]
+
+
+def typed_answer_fields(field_type, value):
+    """
+    Return the Answer column values for a submitted value, routing it to the
+    typed column matching the question field type.
+    """
+    if value is None or value == "":
+        return {}
+    if field_type in NUMBER_FIELD_TYPES:
+        return {"number_answer": to_number(value)}
+    if field_type == FieldType.DATE:
+        return {"date_answer": to_date(value)}
+    if field_type == FieldType.DATETIME:
+        return {"datetime_answer": to_datetime(value)}
+    if field_type in CHOICE_FIELD_TYPES:
+        return {"json_answer": to_choices(value)}
+    if field_type in JSON_FIELD_TYPES or isinstance(value, dict | list):
+        return {"json_answer": value}
+    return {"text_answer": str(value)}
+
+
+def get_question_id(answer_data):
+    """Return the question UUID of an answer payload, or None if it is not one"""
+    try:
+        return uuid.UUID(str(answer_data.get("question")))
+    except (AttributeError, TypeError, ValueError):
+        return None
@@ -0,0 +1,58 @@
+from django.urls import reverse
+from drf_spectacular.utils import extend_schema_field
+from rest_framework import serializers
+from surveys.exports import EXPORT_JOB_CHUNKS, MAX_EXPORT_JOB_CHUNKS
+from surveys.models.export import ExportJob
+
+
+class ExportJobSerializer(serializers.ModelSerializer):
+    chunks = serializers.IntegerField(
+        source="total_chunks",
+        min_value=1,
+        max_value=MAX_EXPORT_JOB_CHUNKS,
+        default=EXPORT_JOB_CHUNKS,
+        write_only=True,
+    )
+    progress = serializers.FloatField(read_only=True)
+    download_url = serializers.SerializerMethodField("get_download_url")
+
+    class Meta:
+        model = ExportJob
+        fields = [
+            "id",
+            "survey",
+            "file_format",
+            "status",
+            "chunks",
+            "total_chunks",
+            "completed_chunks",
+            "progress",
+            "byte_size",
+            "download_url",
+            "error_message",
+            "created_at",
+            "completed_at",
+        ]
+        read_only_fields = [
+            "id",
+            "survey",
+            "status",
+            "total_chunks",
+            "completed_chunks",
+            "byte_size",
+            "error_message",
+            "created_at",
+            "completed_at",
+        ]
+
+    @extend_schema_field(serializers.URLField(allow_null=True))
+    def get_download_url(self, value):
+        if not value.is_ready:
+            return None
+
+        url = reverse(
+            "surveys:export-job-download",
+            kwargs={"survey_pk": value.survey_id, "pk": value.id},
+        )
+        request = self.context.get("request")
+        return request.build_absolute_uri(url) if request else url
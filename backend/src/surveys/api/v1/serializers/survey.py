@@ -1,13 +1,15 @@
 import logging
 
+from analytics.aggregation import SurveyAggregation
 from core.api_message import (
     INVALID_SURVEY_EXPIRED_DATE,
     INVALID_SURVEY_EXPIRED_FUTURE_DATE,
     INVALID_SURVEY_START_DATE,
     QUESTION_MAX_LIMIT,
+    REQUIRED_FIELD,
     START_DATE_MUST_LESS_THAN_EXPIRED_DATE,
 )
-from django.db.models import Count, Q
+from core.cache import CacheService
 from django.utils import timezone
 from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
@@ -17,9 +19,11 @@ from surveys.api.v1.serializers.question import (
     QuestionCreateUpdateDeleteSerializer,
     QuestionViewSerializer,
 )
+from surveys.intake import get_request_metadata
 from surveys.models.answer import Answer
-from surveys.models.question import Question
 from surveys.models.survey import Survey, SurveyResponse
+from surveys.schema import get_compiled_survey
+from surveys.signals import answers_bulk_created
 
 logger = logging.getLogger(__name__)
 
@@ -40,45 +44,63 @@ class SurveyResponseSerializer(serializers.ModelSerializer):
             "answers",
         ]
         read_only_fields = ["id", "user", "started_at", "completed_at"]
+        extra_kwargs = {"survey": {"required": False}}
+
+    def get_compiled_survey(self, attrs):
+        """Compile the submitted survey, falling back to the one in the URL"""
+        if "survey" in attrs:
+            return get_compiled_survey(attrs["survey"].pk)
+
+        view = self.context.get("view")
+        if view is None or "survey_pk" not in view.kwargs:
+            return None
+
+        survey_pk = view.kwargs.get("survey_pk")
+        compiled_survey = get_compiled_survey(survey_pk)
+        if compiled_survey is None:
+            raise serializers.ValidationError(
+                {"survey": f"Survey with ID {survey_pk} does not exist"}
+            )
+
+        attrs["survey_id"] = compiled_survey.id
+        return compiled_survey
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        if self.instance is not None:
+            return attrs
+
+        compiled_survey = self.get_compiled_survey(attrs)
+        if compiled_survey is None:
+            raise serializers.ValidationError({"survey": REQUIRED_FIELD})
+
+        # Validate the whole payload against the compiled survey so type and
+        # rule errors are reported as a 400 without querying the questions
+        answers, errors = compiled_survey.build_answers(attrs.get("answers", []))
+        if errors:
+            raise serializers.ValidationError({"answers": errors})
+        attrs["answers"] = answers
+
+        return attrs
 
     def create(self, validated_data):
-        answers_data = validated_data.pop("answers", [])
+        answers = validated_data.pop("answers", [])
         request = self.context.get("request")
 
-        # Get survey from URL if not explicitly provided
-        if (
-            "survey" not in validated_data
-            and "view" in self.context
-            and "survey_pk" in self.context.get("view").kwargs
-        ):
-            survey_pk = self.context.get("view").kwargs.get("survey_pk")
-            try:
-                validated_data["survey"] = Survey.objects.get(pk=survey_pk)
-            except Survey.DoesNotExist as err:
-                raise serializers.ValidationError(
-                    {"survey": f"Survey with ID {survey_pk} does not exist"}
-                ) from err
-
         # Set user if authenticated, otherwise leave as None for anonymous
         if request and request.user.is_authenticated:
             validated_data["user"] = request.user
+        if request:
+            validated_data.update(get_request_metadata(request))
 
         # Create the survey response
         survey_response = SurveyResponse.objects.create(**validated_data)
 
-        # Process the answers
-        for answer_data in answers_data:
-            question_id = answer_data.get("question")
-            try:
-                question = Question.objects.get(pk=question_id)
-                Answer.objects.create(
-                    response=survey_response,
-                    question=question,
-                    text_answer=answer_data.get("text_answer", ""),
-                )
-            except Question.DoesNotExist:
-                # Skip invalid questions
-                pass
+        # Write every answer in one INSERT
+        for answer in answers:
+            answer.response = survey_response
+        Answer.objects.bulk_create(answers)
+        answers_bulk_created.send(sender=Answer, answers=answers)
 
         return survey_response
 
@@ -99,55 +121,13 @@ class SurveyReportSerializer(serializers.ModelSerializer):
         )
         read_only_fields = fields
 
-    @extend_schema_field(serializers.ListField(child=serializers.DictField()))
+    @extend_schema_field(serializers.DictField())
     def get_reports(self, value):
-        # get all survey answer
-        answers = value.answers.all()
-
-        # get top popular answer object
-        popular_answer = (
-            answers.filter(~Q(ans=""))
-            .values("question_id__title")
-            .annotate(total=Count("question_id"))
-            .order_by("-total")[:1]
-        )
-
-        # get top unpopular answer object
-        unpopular_answer = (
-            answers.filter(ans="")
-            .values("question_id__title")
-            .annotate(total=Count("question_id"))
-            .order_by("-total")[:1]
+        return CacheService.get_or_generate_report(
+            value.id,
+            lambda: SurveyAggregation(value).submission_report(),
         )
 
-        data = {
-            "total_submission": answers.values("uuid").distinct().count(),
-            "anonymous_user": answers.filter(invitation_id__isnull=True)
-            .values("uuid")
-            .distinct()
-            .count(),
-            "invited_user": answers.filter(invitation_id__isnull=False)
-            .values("uuid")
-            .distinct()
-            .count(),
-            "total_answer": answers.filter(~Q(ans="")).count(),
-            "total_unanswer": answers.filter(ans="").count(),
-            "popular_answer": {"total": 0, "question": ""},
-            "unpopular_answer": {"total": 0, "question": ""},
-        }
-
-        if popular_answer:
-            data["popular_answer"]["total"] = popular_answer[0]["total"]
-            data["popular_answer"]["question"] = popular_answer[0]["question_id__title"]
-
-        if unpopular_answer:
-            data["unpopular_answer"]["total"] = unpopular_answer[0]["total"]
-            data["unpopular_answer"]["question"] = unpopular_answer[0][
-                "question_id__title"
-            ]
-
-        return data
-
 
 class SurveyViewSerializer(serializers.ModelSerializer):
     questions = QuestionViewSerializer(many=True)
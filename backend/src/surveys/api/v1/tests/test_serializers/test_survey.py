@@ -1,13 +1,19 @@
 import uuid
+from datetime import date
 
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from rest_framework.exceptions import ValidationError
 from surveys.api.v1.serializers.survey import (
     SurveyCreateSerializer,
+    SurveyResponseSerializer,
     SurveyUpdateSerializer,
     SurveyViewSerializer,
 )
+from surveys.models.question import FieldType
+from surveys.tests.factories.question_factory import QuestionFactory
 from surveys.tests.factories.survey_factory import SurveyFactory, UserFactory
 
 
@@ -103,3 +109,75 @@ class TestSurveyViewSerializer:
         data = serializer.data
         assert data["id"] == str(survey.id)
         assert "questions" in data
+
+
+@pytest.mark.django_db
+class TestSurveyResponseSerializer:
+    def submit(self, survey, answers):
+        serializer = SurveyResponseSerializer(
+            data={"survey": str(survey.id), "is_complete": True, "answers": answers}
+        )
+        serializer.is_valid(raise_exception=True)
+        return serializer.save()
+
+    def test_values_are_routed_to_typed_columns(self):
+        survey = SurveyFactory()
+        number = QuestionFactory(survey=survey, field_type=FieldType.NUMBER)
+        day = QuestionFactory(survey=survey, field_type=FieldType.DATE)
+        choices = QuestionFactory(survey=survey, field_type=FieldType.MULTIPLE_CHOICE)
+        text = QuestionFactory(survey=survey, field_type=FieldType.TEXT)
+
+        response = self.submit(
+            survey,
+            [
+                {"question": str(number.id), "value": "42"},
+                {"question": str(day.id), "value": "2025-01-31"},
+                {"question": str(choices.id), "value": ["red", "blue"]},
+                {"question": str(text.id), "text_answer": "Hello"},
+                {"question": str(uuid.uuid4()), "value": "unknown question"},
+            ],
+        )
+
+        answers = {str(answer.question_id): answer for answer in response.answers.all()}
+        assert len(answers) == 4
+        assert answers[str(number.id)].number_answer == 42.0
+        assert answers[str(day.id)].date_answer == date(2025, 1, 31)
+        assert answers[str(choices.id)].json_answer == ["red", "blue"]
+        assert answers[str(text.id)].text_answer == "Hello"
+
+    def test_invalid_typed_value(self):
+        survey = SurveyFactory()
+        number = QuestionFactory(survey=survey, field_type=FieldType.NUMBER)
+
+        serializer = SurveyResponseSerializer(
+            data={
+                "survey": str(survey.id),
+                "answers": [{"question": str(number.id), "value": "many"}],
+            }
+        )
+
+        assert not serializer.is_valid()
+        assert 0 in serializer.errors["answers"]
+
+    def test_query_count_is_independent_of_answer_count(self):
+        """
+        Benchmark: the survey lookup, question resolution and answer insert are
+        one query each however many answers a submission carries.
+        """
+        survey = SurveyFactory()
+        questions = QuestionFactory.create_batch(
+            30, survey=survey, field_type=FieldType.RATING
+        )
+
+        def count_queries(answered):
+            answers = [
+                {"question": str(question.id), "value": 4} for question in answered
+            ]
+            with CaptureQueriesContext(connection) as context:
+                self.submit(survey, answers)
+            return len(context.captured_queries)
+
+        # Warm up so analytics rows exist for every question
+        count_queries(questions)
+
+        assert count_queries(questions[:3]) == count_queries(questions)
@@ -0,0 +1,138 @@
+import os
+import tempfile
+from unittest.mock import patch
+
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from surveys.models.export import ExportJob, ExportStatus
+from surveys.models.survey import SurveyStatus
+from surveys.tests.factories.survey_factory import SurveyFactory, UserFactory
+
+
+class ExportJobViewsTest(APITestCase):
+    """Test cases for the background export job API views"""
+
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.media_root = media_root.name
+
+        self.user = UserFactory(username="owner", email="owner@example.com")
+        self.other_user = UserFactory(username="other", email="other@example.com")
+        self.survey = SurveyFactory(created_by=self.user, status=SurveyStatus.ACTIVE)
+        self.list_url = reverse(
+            "surveys:export-job-list", kwargs={"survey_pk": self.survey.pk}
+        )
+
+    def create_completed_job(self, content=b"a,b\n1,2\n"):
+        job = ExportJob.objects.create(
+            survey=self.survey,
+            status=ExportStatus.COMPLETED,
+            total_chunks=1,
+            completed_chunks=1,
+            byte_size=len(content),
+        )
+        job.file.name = f"exports/{job.id}/survey_responses.csv"
+        os.makedirs(os.path.dirname(job.file.path))
+        with open(job.file.path, "wb") as export:
+            export.write(content)
+        job.save()
+        return job
+
+    def download_url(self, job):
+        return reverse(
+            "surveys:export-job-download",
+            kwargs={"survey_pk": self.survey.pk, "pk": job.pk},
+        )
+
+    @patch("surveys.api.v1.viewsets.export.run_export_job")
+    def test_create_export_job(self, mock_task):
+        self.client.force_authenticate(user=self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                self.list_url, {"file_format": "ndjson", "chunks": 8}
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        job = ExportJob.objects.get(id=response.data["data"]["id"])
+        self.assertEqual(job.file_format, "ndjson")
+        self.assertEqual(job.total_chunks, 8)
+        self.assertEqual(job.requested_by, self.user)
+        mock_task.delay.assert_called_once_with(str(job.id))
+
+    def test_create_export_job_non_owner(self):
+        self.client.force_authenticate(user=self.other_user)
+
+        response = self.client.post(self.list_url, {"file_format": "csv"})
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(ExportJob.objects.exists())
+
+    def test_create_export_job_invalid_format(self):
+        self.client.force_authenticate(user=self.user)
+
+        response = self.client.post(self.list_url, {"file_format": "xlsx"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("file_format", response.data["details"])
+
+    def test_retrieve_export_job_progress(self):
+        job = ExportJob.objects.create(
+            survey=self.survey,
+            status=ExportStatus.RUNNING,
+            total_chunks=4,
+            completed_chunks=1,
+        )
+        self.client.force_authenticate(user=self.user)
+
+        url = reverse(
+            "surveys:export-job-detail",
+            kwargs={"survey_pk": self.survey.pk, "pk": job.pk},
+        )
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["data"]["progress"], 25.0)
+        self.assertIsNone(response.data["data"]["download_url"])
+
+    def test_download_export_job(self):
+        job = self.create_completed_job()
+        self.client.force_authenticate(user=self.user)
+
+        response = self.client.get(self.download_url(job))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertEqual(b"".join(response.streaming_content), b"a,b\n1,2\n")
+
+    def test_resume_export_job_download(self):
+        job = self.create_completed_job()
+        self.client.force_authenticate(user=self.user)
+
+        response = self.client.get(self.download_url(job), HTTP_RANGE="bytes=4-")
+
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(response["Content-Range"], "bytes 4-7/8")
+        self.assertEqual(b"".join(response.streaming_content), b"1,2\n")
+
+    def test_download_pending_export_job(self):
+        job = ExportJob.objects.create(survey=self.survey)
+        self.client.force_authenticate(user=self.user)
+
+        response = self.client.get(self.download_url(job))
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+    def test_download_export_job_non_owner(self):
+        job = self.create_completed_job()
+        self.client.force_authenticate(user=self.other_user)
+
+        response = self.client.get(self.download_url(job))
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
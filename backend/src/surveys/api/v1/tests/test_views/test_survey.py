@@ -1,4 +1,8 @@
-from django.test import Client, TestCase
+import uuid
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 from django.utils import timezone
 from rest_framework import status
@@ -24,6 +28,7 @@ class SurveyViewsTest(APITestCase):
     def setUp(self):
         """Set up test data"""
         # Clear all existing data to prevent test pollution
+        cache.clear()
         Survey.objects.all().delete()
         Question.objects.all().delete()
         SurveyResponse.objects.all().delete()
@@ -83,11 +88,66 @@ class SurveyViewsTest(APITestCase):
         response = self.client.get(url)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data["data"]["title"], "Test Survey")
+        self.assertEqual(response.json()["data"]["title"], "Test Survey")
         self.assertEqual(
-            response.data["data"]["description"], "A test survey description"
+            response.json()["data"]["description"], "A test survey description"
         )
 
+    def test_get_survey_detail_cached(self):
+        """Test survey detail is served from cache and revalidated by ETag"""
+        url = reverse("surveys:survey-detail", kwargs={"pk": self.survey.pk})
+        response = self.client.get(url)
+        etag = response["ETag"]
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(url)
+        self.assertEqual(cached.content, response.content)
+
+        with self.assertNumQueries(0):
+            not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.question.title = "Renamed Question"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.question.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(
+            response.json()["data"]["questions"][0]["title"], "Renamed Question"
+        )
+
+    def test_get_survey_detail_not_found(self):
+        """Test missing surveys are not cached"""
+        url = reverse("surveys:survey-detail", kwargs={"pk": uuid.uuid4()})
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        url = reverse("surveys:survey-detail", kwargs={"pk": "not-a-uuid"})
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_get_survey_detail_cached_by_canonical_id(self):
+        """Test other spellings of the survey id share its cache entry"""
+        urls = [
+            reverse("surveys:survey-detail", kwargs={"pk": pk})
+            for pk in (str(self.survey.pk).upper(), self.survey.pk.hex)
+        ]
+        for url in urls:
+            self.client.get(url)
+
+        self.survey.title = "Renamed Survey"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.survey.save()
+
+        for url in urls:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.json()["data"]["title"], "Renamed Survey")
+
     def test_create_survey_authenticated(self):
         """Test creating survey with authentication"""
         self.client.force_authenticate(user=self.user)
@@ -241,6 +301,72 @@ class SurveyViewsTest(APITestCase):
         for survey in results:
             self.assertEqual(survey["visibility"], SurveyVisibility.PUBLIC)
 
+    def test_export_survey_responses_owner(self):
+        """Test streaming survey responses export by owner"""
+        SurveyResponseFactory(survey=self.survey)
+        self.client.force_authenticate(user=self.user)
+
+        url = reverse("surveys:survey-export", kwargs={"pk": self.survey.pk})
+        response = self.client.get(url, {"file_format": "ndjson"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertEqual(len(b"".join(response.streaming_content).splitlines()), 1)
+
+    def test_export_survey_responses_non_owner(self):
+        """Test exporting survey responses by non-owner"""
+        other_user = UserFactory(username="otheruser", email="other@example.com")
+        self.client.force_authenticate(user=other_user)
+
+        url = reverse("surveys:survey-export", kwargs={"pk": self.survey.pk})
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_get_survey_report(self):
+        """Test the survey report is cached until a response is written"""
+        first = SurveyResponseFactory(survey=self.survey, is_complete=True)
+        AnswerFactory(response=first, question=self.question, text_answer="Yes")
+        self.client.force_authenticate(user=self.user)
+
+        url = reverse("surveys:survey-report", kwargs={"pk": self.survey.pk})
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        reports = response.data["data"]["reports"]
+        self.assertEqual(reports["total_submission"], 1)
+        self.assertEqual(reports["popular_answer"]["question"], "Test Question")
+
+        with self.assertNumQueries(2):
+            # The user and the survey, the report comes from the cache
+            self.client.get(url)
+
+        SurveyResponseFactory(survey=self.survey, is_complete=True)
+        reports = self.client.get(url).data["data"]["reports"]
+        self.assertEqual(reports["total_submission"], 2)
+        self.assertEqual(reports["total_unanswer"], 1)
+
+    def test_get_survey_report_non_owner(self):
+        """Test the survey report is only readable by its creator"""
+        other_user = UserFactory(username="otheruser", email="other@example.com")
+        self.client.force_authenticate(user=other_user)
+
+        url = reverse("surveys:survey-report", kwargs={"pk": self.survey.pk})
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_export_survey_responses_invalid_format(self):
+        """Test exporting survey responses with an unsupported format"""
+        self.client.force_authenticate(user=self.user)
+
+        url = reverse("surveys:survey-export", kwargs={"pk": self.survey.pk})
+        response = self.client.get(url, {"file_format": "pdf"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("file_format", response.data["details"])
+
 
 class SurveyResponseViewsTest(APITestCase):
     """Test cases for SurveyResponse API views"""
@@ -383,6 +509,137 @@ class SurveyResponseViewsTest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertTrue(response.data["data"]["is_complete"])
 
+    @override_settings(RESPONSE_INTAKE_ENABLED=True)
+    @patch("surveys.api.v1.viewsets.response.ResponseIntake")
+    def test_create_survey_response_intake(self, mock_intake):
+        """Test submissions are queued and acknowledged with 202 in intake mode"""
+        data = {
+            "is_complete": True,
+            "answers": [{"question": str(self.question.pk), "value": "Queued"}],
+        }
+
+        url = reverse("surveys:response-list", kwargs={"survey_pk": self.survey.pk})
+        response = self.client.post(url, data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data["data"]["intake_status"], "queued")
+        record = mock_intake.return_value.enqueue.call_args.args[0]
+        self.assertEqual(record["id"], response.data["data"]["id"])
+        self.assertEqual(record["answers"][0]["text_answer"], "Queued")
+
+    @override_settings(RESPONSE_INTAKE_ENABLED=True)
+    def test_create_survey_response_intake_missing_required_answer(self):
+        """Test intake mode validates required answers against the schema"""
+        url = reverse("surveys:response-list", kwargs={"survey_pk": self.survey.pk})
+        response = self.client.post(url, {"answers": []}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(str(self.question.pk), response.data["details"]["answers"])
+
+    def test_get_survey_response_intake_status(self):
+        """Test polling the persistence status of an accepted submission"""
+        url = reverse(
+            "surveys:response-intake-status",
+            kwargs={"survey_pk": self.survey.pk, "response_id": self.response.pk},
+        )
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["data"]["intake_status"], "persisted")
+
+        url = reverse(
+            "surveys:response-intake-status",
+            kwargs={"survey_pk": self.survey.pk, "response_id": uuid.uuid4()},
+        )
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_next_questions(self):
+        """Test paging through questions with conditional logic"""
+        follow_up = QuestionFactory(
+            survey=self.survey,
+            title="Follow up",
+            order=2,
+            depends_on=self.question,
+            condition_operator="equals",
+            condition_value="yes",
+        )
+        last = QuestionFactory(survey=self.survey, title="Last", order=3)
+
+        url = reverse(
+            "surveys:response-next-questions", kwargs={"survey_pk": self.survey.pk}
+        )
+        response = self.client.post(
+            url,
+            {
+                "answers": [{"question": str(self.question.pk), "value": "no"}],
+                "current": str(self.question.pk),
+                "limit": 1,
+            },
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        questions = response.data["data"]["questions"]
+        self.assertEqual([question["id"] for question in questions], [str(last.pk)])
+        self.assertTrue(response.data["data"]["is_last_page"])
+
+        response = self.client.post(
+            url,
+            {
+                "answers": [{"question": str(self.question.pk), "value": "yes"}],
+                "current": str(self.question.pk),
+                "limit": 1,
+            },
+            format="json",
+        )
+
+        questions = response.data["data"]["questions"]
+        self.assertEqual([question["id"] for question in questions], [follow_up.pk])
+        self.assertFalse(response.data["data"]["is_last_page"])
+
+        response = self.client.post(url, {"limit": 0}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("limit", response.data["details"])
+
+    def test_save_and_submit_response_draft(self):
+        """Test saving answers page by page and submitting the draft"""
+        token = str(uuid.uuid4())
+        url = reverse(
+            "surveys:response-draft",
+            kwargs={"survey_pk": self.survey.pk, "user_token": token},
+        )
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        response = self.client.put(
+            url,
+            {"answers": [{"question": str(self.question.pk), "value": "Later"}]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["data"]["answers"][0]["value"], "Later")
+
+        submit_url = reverse(
+            "surveys:response-submit-draft",
+            kwargs={"survey_pk": self.survey.pk, "user_token": token},
+        )
+        response = self.client.post(submit_url, {}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        saved = SurveyResponse.objects.get(id=response.data["data"]["id"])
+        self.assertEqual(saved.answers.get().text_answer, "Later")
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+        response = self.client.post(submit_url, {}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_get_response_analytics(self):
         """Test getting response analytics"""
         self.client.force_authenticate(user=self.user)
@@ -401,6 +658,82 @@ class SurveyResponseViewsTest(APITestCase):
         self.assertIn("total_responses", response.data["data"])
         self.assertIn("completion_rate", response.data["data"])
 
+        # The unique counts are read per day, the range is bounded
+        response = self.client.get(url, {"start": "0001-01-01", "end": "9999-12-31"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_get_response_timeline(self):
+        """Test getting the daily response timeline"""
+        self.client.force_authenticate(user=self.user)
+
+        url = reverse("surveys:response-timeline", kwargs={"survey_pk": self.survey.pk})
+        response = self.client.get(url, {"days": 7})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["data"]), 7)
+        self.assertEqual(response.data["data"][-1]["starts"], 1)
+
+        response = self.client.get(url, {"start": "2025-02-30"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # Unbounded spans and dates out of range are rejected, not filled
+        for params in (
+            {"start": "0001-01-01", "end": "9999-12-31"},
+            {"days": 10000000000},
+        ):
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        url = reverse(
+            "surveys:response-analytics", kwargs={"survey_pk": self.survey.pk}
+        )
+        response = self.client.get(url, {"days": 10000000000})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_get_response_funnel(self):
+        """Test getting the drop-off funnel, overall and by device"""
+        self.client.force_authenticate(user=self.user)
+        SurveyResponse.objects.filter(id=self.response.id).update(
+            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
+        )
+        AnswerFactory(
+            response=self.response, question=self.question, text_answer="Test answer"
+        )
+
+        url = reverse("surveys:response-funnel", kwargs={"survey_pk": self.survey.pk})
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        funnel = response.data["data"][0]
+        self.assertEqual(funnel["responses"], 1)
+        self.assertEqual(funnel["steps"][0]["reached"], 1)
+
+        response = self.client.get(url, {"segment": "device"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["data"][0]["segment"], "desktop")
+
+        response = self.client.get(url, {"segment": "browser"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_only_the_survey_creator_can_read_response_analytics(self):
+        """Test the analytics, timeline and funnel are hidden from other users"""
+        other_user = UserFactory(username="otheruser", email="other@example.com")
+
+        for name in (
+            "surveys:response-analytics",
+            "surveys:response-timeline",
+            "surveys:response-funnel",
+        ):
+            url = reverse(name, kwargs={"survey_pk": self.survey.pk})
+
+            self.client.force_authenticate(user=None)
+            response = self.client.get(url, {"segment": "country"})
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+            self.client.force_authenticate(user=other_user)
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
 
 class SurveyPublicAccessTest(TestCase):
     """Test cases for public survey access"""
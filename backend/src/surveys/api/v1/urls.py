@@ -1,9 +1,10 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 from rest_framework_nested.routers import NestedDefaultRouter
+from surveys.api.v1.viewsets.export import ExportJobViewSet
 from surveys.api.v1.viewsets.question import QuestionViewSet
 from surveys.api.v1.viewsets.response import SurveyResponseViewSet
-from surveys.api.v1.viewsets.survey import SurveyViewSet
+from surveys.api.v1.viewsets.survey import SurveyReportView, SurveyViewSet
 
 # Main router for surveys
 router = DefaultRouter()
@@ -13,12 +14,18 @@ router.register(
     r"api/v1/survey-responses", SurveyResponseViewSet, basename="survey-response"
 )
 
-# Nested routers for questions and responses under surveys
+# Nested routers for questions, responses and export jobs under surveys
 surveys_router = NestedDefaultRouter(router, r"api/v1/surveys", lookup="survey")
 surveys_router.register(r"questions", QuestionViewSet, basename="question")
 surveys_router.register(r"responses", SurveyResponseViewSet, basename="response")
+surveys_router.register(r"exports", ExportJobViewSet, basename="export-job")
 
 urlpatterns = [
     path("", include(router.urls)),
     path("", include(surveys_router.urls)),
+    path(
+        "api/v1/surveys/<uuid:pk>/report/",
+        SurveyReportView.as_view(),
+        name="survey-report",
+    ),
 ]
@@ -0,0 +1,160 @@
+from core.api_message import (
+    EXPORT_JOB_CREATE_SUCCESS,
+    EXPORT_JOB_NOT_READY,
+    NOT_FOUND_SURVEY_ERROR,
+    REQUEST_PAYLOAD_ERROR,
+)
+from core.http_ import Http404, ranged_file_response
+from django.db import transaction
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from surveys.api.v1.serializers.export import ExportJobSerializer
+from surveys.exports import EXPORTERS
+from surveys.models.export import ExportJob
+from surveys.models.survey import Survey
+from surveys.permissions import IsSurveyCreator
+from surveys.tasks import run_export_job
+
+
+class ExportJobViewSet(
+    mixins.CreateModelMixin,
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    viewsets.GenericViewSet,
+):
+    """
+    Background exports of the responses of a survey. Jobs are generated by
+    Celery on the heavy queue and their file can be downloaded (and resumed
+    with HTTP Range requests) once complete.
+    """
+
+    serializer_class = ExportJobSerializer
+    lookup_field = "pk"
+
+    def get_permissions(self):
+        # Only the survey creator (or admin/staff) can export its responses
+        if self.request.user and (
+            self.request.user.is_staff or self.request.user.is_superuser
+        ):
+            return [IsAuthenticated()]
+        return [IsAuthenticated(), IsSurveyCreator()]
+
+    def get_survey(self):
+        """
+        Get the parent survey of the export jobs
+        """
+        survey_pk = self.kwargs.get("survey_pk")
+        try:
+            return Survey.objects.get(pk=survey_pk)
+        except Survey.DoesNotExist as err:
+            raise Http404(
+                message=NOT_FOUND_SURVEY_ERROR.format(survey_pk),
+                error_code=status.HTTP_404_NOT_FOUND,
+            ) from err
+
+    def get_queryset(self):
+        survey_pk = self.kwargs.get("survey_pk")
+        user = self.request.user
+
+        qs = ExportJob.objects.filter(survey_id=survey_pk).select_related("survey")
+
+        # For detail views return every job so permissions answer 403, not 404
+        if self.action in ["retrieve", "download"]:
+            return qs.order_by("-created_at", "id")
+
+        if not (user.is_staff or user.is_superuser):
+            qs = qs.filter(survey__created_by=user)
+
+        return qs.order_by("-created_at", "id")
+
+    def list(self, request, *args, **kwargs):
+        """
+        List the export jobs of a survey with custom response format
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(
+            {"data": serializer.data, "status": "success", "code": status.HTTP_200_OK}
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Retrieve the status and progress of an export job
+        """
+        instance = self.get_object()
+        serializer = self.get_serializer(instance)
+
+        return Response(
+            {"data": serializer.data, "status": "success", "code": status.HTTP_200_OK}
+        )
+
+    @transaction.atomic
+    def create(self, request, *args, **kwargs):
+        """
+        Queue a background export of the survey responses
+        """
+        survey = self.get_survey()
+        self.check_object_permissions(request, survey)
+
+        serializer = self.get_serializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                {
+                    "details": serializer.errors,
+                    "message": REQUEST_PAYLOAD_ERROR,
+                    "status": "failed",
+                    "code": status.HTTP_400_BAD_REQUEST,
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        job = serializer.save(survey=survey, requested_by=request.user)
+
+        # Dispatch only once the job row is visible to the workers
+        transaction.on_commit(lambda: run_export_job.delay(str(job.id)))
+
+        return Response(
+            {
+                "message": EXPORT_JOB_CREATE_SUCCESS,
+                "status": "success",
+                "code": status.HTTP_202_ACCEPTED,
+                "data": serializer.data,
+            },
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+    @action(detail=True, methods=["get"], url_path="download")
+    def download(self, request, *args, **kwargs):
+        """
+        Download the export file, supporting ``Range`` requests to resume
+        interrupted transfers
+        """
+        job = self.get_object()
+
+        if not job.is_ready:
+            return Response(
+                {
+                    "message": EXPORT_JOB_NOT_READY.format(
+                        job.id, job.get_status_display()
+                    ),
+                    "status": "failed",
+                    "code": status.HTTP_409_CONFLICT,
+                },
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        return ranged_file_response(
+            request,
+            job.file.path,
+            content_type=EXPORTERS[job.file_format].content_type,
+            filename=job.file.name.rsplit("/", 1)[-1],
+            etag=f'"{job.id}-{job.byte_size}"',
+        )
@@ -8,6 +8,7 @@ from core.api_message import (
     SURVEY_QUESTION_UPDATE_SUCCESS,
 )
 from core.http_ import Http404
+from core.pagination import KeysetPagination
 from django.db import transaction
 from rest_framework import status, viewsets
 from rest_framework.permissions import (
@@ -25,6 +26,7 @@ logger = logging.getLogger(__name__)
 
 class QuestionViewSet(viewsets.ModelViewSet):
     serializer_class = QuestionSerializer
+    pagination_class = KeysetPagination
     lookup_field = "pk"
 
     def get_permissions(self):
@@ -1,27 +1,63 @@
 import logging
+from datetime import timedelta
 
+from analytics.distinct import DistinctCounter
+from analytics.funnel import FunnelSegment, get_funnel
+from analytics.rollups import MAX_TIMELINE_DAYS, ResponseRollup
 from core.api_message import (
+    BAD_REQUEST_ERROR,
+    DUPLICATE_RESPONSE_ERROR,
+    INVALID_DATE_RANGE,
+    INVALID_FUNNEL_SEGMENT,
+    INVALID_SURVEY_QUESTION_ID,
+    NOT_FOUND_RESPONSE_DRAFT_ERROR,
+    NOT_FOUND_RESPONSE_ERROR,
     NOT_FOUND_SURVEY_ERROR,
     REQUEST_PAYLOAD_ERROR,
+    REQUEST_QUERY_PARAM,
+    SURVEY_RESPONSE_ACCEPTED,
     SURVEY_RESPONSE_CREATE_SUCCESS,
     SURVEY_RESPONSE_DELETE_SUCCESS,
+    SURVEY_RESPONSE_DRAFT_DELETE_SUCCESS,
+    SURVEY_RESPONSE_DRAFT_SAVED,
     SURVEY_RESPONSE_UPDATE_SUCCESS,
 )
-from core.http_ import Http404
+from core.http_ import Http404, HttpError
+from core.pagination import KeysetPagination
+from django.conf import settings
 from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
-from rest_framework.permissions import AllowAny, IsAuthenticatedOrReadOnly
+from rest_framework.permissions import (
+    AllowAny,
+    IsAuthenticated,
+    IsAuthenticatedOrReadOnly,
+)
 from rest_framework.response import Response
 from surveys.api.v1.serializers.survey import SurveyResponseSerializer
+from surveys.drafts import discard_draft, get_draft, save_draft, submit_draft
+from surveys.intake import (
+    IntakeStatus,
+    ResponseIntake,
+    build_intake_record,
+    get_request_metadata,
+    persist_intake_records,
+)
 from surveys.models.survey import Survey, SurveyResponse, SurveyStatus
+from surveys.permissions import IsSurveyCreator
 from surveys.permissions import IsSurveyOwnerOrReadOnly as IsOwnerOrReadOnly
+from surveys.schema import get_compiled_survey
 
 logger = logging.getLogger(__name__)
 
+UUID_PATTERN = r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}"
+
 
 class SurveyResponseViewSet(viewsets.ModelViewSet):
     serializer_class = SurveyResponseSerializer
+    pagination_class = KeysetPagination
     lookup_field = "pk"
 
     def get_permissions(self):
@@ -30,8 +66,14 @@ class SurveyResponseViewSet(viewsets.ModelViewSet):
         Owners can view, update, and delete their own responses
         Survey creators can view all responses to their surveys
         """
-        if self.action == "create":
-            # Allow anonymous users to create responses
+        if self.action in [
+            "create",
+            "intake_status",
+            "next_questions",
+            "draft",
+            "submit_draft",
+        ]:
+            # Allow anonymous users to respond, navigate and poll their status
             return [AllowAny()]
         elif self.action in ["update", "partial_update", "destroy"]:
             if self.request.user and (
@@ -39,6 +81,13 @@ class SurveyResponseViewSet(viewsets.ModelViewSet):
             ):
                 return [IsAuthenticatedOrReadOnly()]
             return [IsAuthenticatedOrReadOnly(), IsOwnerOrReadOnly()]
+        elif self.action in ["analytics", "timeline", "funnel"]:
+            # Only the survey creator (or admin/staff) can see its analytics
+            if self.request.user and (
+                self.request.user.is_staff or self.request.user.is_superuser
+            ):
+                return [IsAuthenticated()]
+            return [IsAuthenticated(), IsSurveyCreator()]
         else:  # list, retrieve, etc.
             return [IsAuthenticatedOrReadOnly()]
 
@@ -55,6 +104,19 @@ class SurveyResponseViewSet(viewsets.ModelViewSet):
                 error_code=status.HTTP_404_NOT_FOUND,
             ) from err
 
+    def get_compiled_survey(self):
+        """
+        Get the compiled schema of the parent survey for validating submissions
+        """
+        survey_pk = self.kwargs.get("survey_pk")
+        compiled_survey = get_compiled_survey(survey_pk)
+        if compiled_survey is None:
+            raise Http404(
+                message=NOT_FOUND_SURVEY_ERROR.format(survey_pk),
+                error_code=status.HTTP_404_NOT_FOUND,
+            )
+        return compiled_survey
+
     def get_queryset(self):
         """
         Return all survey responses for detail views (to allow proper 403 responses)
@@ -125,22 +187,15 @@ class SurveyResponseViewSet(viewsets.ModelViewSet):
         """
         Create a new survey response with custom response format
         """
-        # Get the parent survey
-        survey = self.get_survey()
+        # Validate against the compiled survey, no survey or question queries
+        compiled_survey = self.get_compiled_survey()
 
         # Check if survey is active
-        if survey.status != SurveyStatus.ACTIVE:
-            return Response(
-                {
-                    "details": {
-                        "survey": f"Survey is not active, current status: {survey.get_status_display()}"
-                    },
-                    "message": "Cannot respond to an inactive survey",
-                    "status": "failed",
-                    "code": status.HTTP_400_BAD_REQUEST,
-                },
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+        if compiled_survey.status != SurveyStatus.ACTIVE:
+            return self.inactive_survey_response(compiled_survey)
+
+        if settings.RESPONSE_INTAKE_ENABLED:
+            return self.create_via_intake(request, compiled_survey)
 
         # Create serializer with survey context
         serializer = self.get_serializer(
@@ -159,24 +214,6 @@ class SurveyResponseViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # Check for missing required answers
-        answers_data = request.data.get("answers", [])
-        required_questions = survey.questions.filter(is_required=True)
-
-        # If there are required questions but no answers provided
-        if required_questions.exists() and not answers_data:
-            return Response(
-                {
-                    "details": {
-                        "answers": "This survey contains required questions that must be answered"
-                    },
-                    "message": "Missing required answers",
-                    "status": "failed",
-                    "code": status.HTTP_400_BAD_REQUEST,
-                },
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
         # Get savepoint for potential rollback
         sid = transaction.savepoint()
 
@@ -206,6 +243,292 @@ class SurveyResponseViewSet(viewsets.ModelViewSet):
             status=status.HTTP_201_CREATED,
         )
 
+    def inactive_survey_response(self, compiled_survey):
+        return Response(
+            {
+                "details": {
+                    "survey": f"Survey is not active, current status: {SurveyStatus(compiled_survey.status).label}"
+                },
+                "message": "Cannot respond to an inactive survey",
+                "status": "failed",
+                "code": status.HTTP_400_BAD_REQUEST,
+            },
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    def create_via_intake(self, request, compiled_survey):
+        """
+        Queue a submission validated against the compiled survey on the
+        response intake stream, answering 202 before it is persisted
+        """
+        record, errors = build_intake_record(
+            compiled_survey,
+            request.data,
+            request.user,
+            metadata=get_request_metadata(request),
+        )
+        if errors:
+            return Response(
+                {
+                    "details": errors,
+                    "message": REQUEST_PAYLOAD_ERROR,
+                    "status": "failed",
+                    "code": status.HTTP_400_BAD_REQUEST,
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            ResponseIntake().enqueue(record)
+        except Exception as err:
+            # Degrade to a synchronous write rather than dropping the submission
+            logger.error(f"Error queueing response, writing it directly: {str(err)}")
+            intake_status = persist_intake_records([record])[record["id"]]
+            return Response(
+                {
+                    "message": SURVEY_RESPONSE_CREATE_SUCCESS,
+                    "status": "success",
+                    "code": status.HTTP_201_CREATED,
+                    "data": {"id": record["id"], "intake_status": intake_status},
+                },
+                status=status.HTTP_201_CREATED,
+            )
+
+        return Response(
+            {
+                "message": SURVEY_RESPONSE_ACCEPTED,
+                "status": "success",
+                "code": status.HTTP_202_ACCEPTED,
+                "data": {"id": record["id"], "intake_status": IntakeStatus.QUEUED},
+            },
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path=rf"intake/(?P<response_id>{UUID_PATTERN})",
+    )
+    def intake_status(self, request, survey_pk=None, response_id=None):
+        """
+        Return whether a submission accepted by the intake has been persisted
+        """
+        intake_status = ResponseIntake.get_status(response_id)
+        if intake_status is None:
+            raise Http404(
+                message=NOT_FOUND_RESPONSE_ERROR.format(response_id),
+                error_code=status.HTTP_404_NOT_FOUND,
+            )
+
+        return Response(
+            {
+                "data": {"id": response_id, "intake_status": intake_status},
+                "status": "success",
+                "code": status.HTTP_200_OK,
+            }
+        )
+
+    @action(detail=False, methods=["post"], url_path="next-questions")
+    def next_questions(self, request, survey_pk=None):
+        """
+        Return the questions to show next in a paged survey UI, evaluating the
+        conditional logic against the answers given so far. The body carries
+        ``answers``, optionally the ``current`` question id and a ``limit``.
+        """
+        compiled_survey = self.get_compiled_survey()
+        if compiled_survey.status != SurveyStatus.ACTIVE:
+            return self.inactive_survey_response(compiled_survey)
+
+        answers_data = request.data.get("answers") or []
+        current = request.data.get("current")
+        limit = request.data.get("limit")
+
+        details = {}
+        if not isinstance(answers_data, list):
+            details["answers"] = "Expected a list of answers."
+        if current is not None and str(current) not in compiled_survey.questions:
+            details["current"] = INVALID_SURVEY_QUESTION_ID.format(current)
+        if limit is not None:
+            try:
+                limit = int(limit)
+            except (TypeError, ValueError):
+                limit = 0
+            if limit < 1:
+                details["limit"] = "Must be a positive integer."
+
+        if not details:
+            # One extra question tells whether this is the last page
+            questions, errors = compiled_survey.next_questions(
+                answers_data,
+                None if current is None else str(current),
+                limit + 1 if limit else None,
+            )
+            is_last_page = not limit or len(questions) <= limit
+            if errors:
+                details["answers"] = errors
+
+        if details:
+            return Response(
+                {
+                    "details": details,
+                    "message": REQUEST_PAYLOAD_ERROR,
+                    "status": "failed",
+                    "code": status.HTTP_400_BAD_REQUEST,
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return Response(
+            {
+                "data": {
+                    "questions": [
+                        {
+                            "id": question.id,
+                            "title": question.title,
+                            "field_type": question.field_type,
+                            "is_required": question.is_required,
+                            "order": question.order,
+                        }
+                        for question in questions[:limit]
+                    ],
+                    "is_last_page": is_last_page,
+                },
+                "status": "success",
+                "code": status.HTTP_200_OK,
+            }
+        )
+
+    @action(
+        detail=False,
+        methods=["get", "put", "delete"],
+        url_path=rf"drafts/(?P<user_token>{UUID_PATTERN})",
+    )
+    def draft(self, request, survey_pk=None, user_token=None):
+        """
+        Save-and-resume for long surveys: PUT merges a page of answers into
+        the respondent's draft (kept in the cache, not the database), GET
+        returns it to resume and DELETE discards it
+        """
+        compiled_survey = self.get_compiled_survey()
+
+        if request.method == "GET":
+            draft = get_draft(compiled_survey.id, user_token)
+            if draft is None:
+                raise Http404(
+                    message=NOT_FOUND_RESPONSE_DRAFT_ERROR.format(user_token),
+                    error_code=status.HTTP_404_NOT_FOUND,
+                )
+            return Response(
+                {
+                    "data": self.get_draft_data(user_token, draft),
+                    "status": "success",
+                    "code": status.HTTP_200_OK,
+                }
+            )
+
+        if request.method == "DELETE":
+            discard_draft(compiled_survey.id, user_token)
+            return Response(
+                {
+                    "message": SURVEY_RESPONSE_DRAFT_DELETE_SUCCESS,
+                    "status": "success",
+                    "code": status.HTTP_204_NO_CONTENT,
+                },
+                status=status.HTTP_204_NO_CONTENT,
+            )
+
+        if compiled_survey.status != SurveyStatus.ACTIVE:
+            return self.inactive_survey_response(compiled_survey)
+
+        draft, errors = save_draft(
+            compiled_survey,
+            user_token,
+            request.data.get("answers") or [],
+            user=request.user,
+            current=request.data.get("current"),
+            metadata=get_request_metadata(request),
+        )
+        if errors:
+            return Response(
+                {
+                    "details": errors,
+                    "message": REQUEST_PAYLOAD_ERROR,
+                    "status": "failed",
+                    "code": status.HTTP_400_BAD_REQUEST,
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return Response(
+            {
+                "message": SURVEY_RESPONSE_DRAFT_SAVED,
+                "status": "success",
+                "code": status.HTTP_200_OK,
+                "data": self.get_draft_data(user_token, draft),
+            }
+        )
+
+    def get_draft_data(self, user_token, draft):
+        return {
+            "user_token": user_token,
+            "answers": list(draft["answers"].values()),
+            "current": draft.get("current"),
+            "updated_at": draft.get("updated_at"),
+        }
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path=rf"drafts/(?P<user_token>{UUID_PATTERN})/submit",
+    )
+    def submit_draft(self, request, survey_pk=None, user_token=None):
+        """
+        Submit a draft with the final page of answers, writing the complete
+        response and its answers in one transaction
+        """
+        compiled_survey = self.get_compiled_survey()
+        if compiled_survey.status != SurveyStatus.ACTIVE:
+            return self.inactive_survey_response(compiled_survey)
+
+        record, intake_status, errors = submit_draft(
+            compiled_survey,
+            user_token,
+            request.data.get("answers") or [],
+            user=request.user,
+            metadata=get_request_metadata(request),
+        )
+        if intake_status == IntakeStatus.FAILED:
+            # Not written, e.g. the survey was deleted meanwhile; the draft is kept
+            return Response(
+                {
+                    "message": BAD_REQUEST_ERROR,
+                    "status": "failed",
+                    "code": status.HTTP_400_BAD_REQUEST,
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if errors or intake_status == IntakeStatus.DUPLICATE:
+            return Response(
+                {
+                    "details": errors
+                    or {"user_token": DUPLICATE_RESPONSE_ERROR.format(user_token)},
+                    "message": REQUEST_PAYLOAD_ERROR,
+                    "status": "failed",
+                    "code": status.HTTP_400_BAD_REQUEST,
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return Response(
+            {
+                "message": SURVEY_RESPONSE_CREATE_SUCCESS,
+                "status": "success",
+                "code": status.HTTP_201_CREATED,
+                "data": {"id": record["id"], "intake_status": intake_status},
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
     @transaction.atomic
     def update(self, request, *args, **kwargs):
         """
@@ -350,24 +673,91 @@ class SurveyResponseViewSet(viewsets.ModelViewSet):
         except Http404 as err:
             return Response({"error": err.message}, status=err.error_code)
 
-        # Calculate analytics
-        total_responses = SurveyResponse.objects.filter(survey=survey).count()
-        completed_responses = SurveyResponse.objects.filter(
-            survey=survey, is_complete=True
-        ).count()
-        completion_rate = (
-            round((completed_responses / total_responses) * 100, 2)
-            if total_responses > 0
-            else 0.0
-        )
-
-        analytics_data = {
-            "total_responses": total_responses,
-            "completed_responses": completed_responses,
-            "completion_rate": completion_rate,
-        }
+        self.check_object_permissions(request, survey)
+        start, end = self.get_date_range(request, max_days=MAX_TIMELINE_DAYS)
+        analytics_data = ResponseRollup.summary(survey.id, start, end)
+        analytics_data["unique"] = DistinctCounter.counts(survey.id, start, end)
 
         # Return formatted response
         return Response(
             {"data": analytics_data, "status": "success", "code": status.HTTP_200_OK}
         )
+
+    @action(detail=False, methods=["get"], url_path="analytics/timeline")
+    def timeline(self, request, survey_pk=None):
+        """
+        Return the responses started and completed per day, for the last
+        ``?days=`` (30 by default) or between ``?start=`` and ``?end=``
+        """
+        survey = self.get_survey()
+        self.check_object_permissions(request, survey)
+        start, end = self.get_date_range(
+            request, default_days=30, max_days=MAX_TIMELINE_DAYS
+        )
+        timeline = ResponseRollup.timeline(survey.id, start, end)
+
+        return Response(
+            {"data": timeline, "status": "success", "code": status.HTTP_200_OK}
+        )
+
+    @action(detail=False, methods=["get"], url_path="analytics/funnel")
+    def funnel(self, request, survey_pk=None):
+        """
+        Return the drop-off funnel of the survey: how many responses reached,
+        answered and dropped out at each question, optionally one funnel per
+        ``?segment=device`` or ``?segment=country``
+        """
+        survey = self.get_survey()
+        self.check_object_permissions(request, survey)
+        segment = request.query_params.get("segment") or None
+        if segment is not None and segment not in FunnelSegment.CHOICES:
+            raise HttpError(
+                message=INVALID_FUNNEL_SEGMENT.format(
+                    segment, ", ".join(FunnelSegment.CHOICES)
+                )
+            )
+
+        return Response(
+            {
+                "data": get_funnel(survey, segment),
+                "status": "success",
+                "code": status.HTTP_200_OK,
+            }
+        )
+
+    def get_date_range(self, request, default_days=None, max_days=None):
+        """
+        Read the ``?start=``/``?end=`` dates or ``?days=`` of an analytics
+        request. Without any, the last ``default_days`` days or all time.
+        With ``max_days`` a bounded range may span at most that many days.
+        """
+        params = request.query_params
+        try:
+            start = parse_date(params["start"]) if params.get("start") else None
+            end = parse_date(params["end"]) if params.get("end") else None
+            days = int(params["days"]) if params.get("days") else default_days
+        except ValueError as err:
+            raise HttpError(message=REQUEST_QUERY_PARAM) from err
+        if (params.get("start") and start is None) or (
+            params.get("end") and end is None
+        ):
+            raise HttpError(message=REQUEST_QUERY_PARAM)
+
+        if start is None and days is not None:
+            if days < 1:
+                raise HttpError(message=REQUEST_QUERY_PARAM)
+            end = end or timezone.localdate()
+            try:
+                start = end - timedelta(days=days - 1)
+            except OverflowError as err:
+                # Before the first representable date
+                raise HttpError(message=REQUEST_QUERY_PARAM) from err
+        elif start is not None and end is None and default_days is not None:
+            end = timezone.localdate()
+
+        if start is not None and end is not None:
+            if start > end:
+                raise HttpError(message=REQUEST_QUERY_PARAM)
+            if max_days is not None and (end - start).days >= max_days:
+                raise HttpError(message=INVALID_DATE_RANGE.format(max_days))
+        return start, end
@@ -1,28 +1,37 @@
+import hashlib
 import logging
+import uuid
 
 from core.api_message import (
+    INVALID_EXPORT_FORMAT,
     NOT_FOUND_SURVEY_ERROR,
     NOT_STARTED_SURVEY_YET,
     REQUEST_PAYLOAD_ERROR,
+    REQUEST_QUERY_PARAM,
     SURVEY_CREATE_SUCCESS,
     SURVEY_DELETE_SUCCESS,
     SURVEY_UPDATE_SUCCESS,
 )
-from core.http_ import Http404, HttpError
-from core.pagination import CustomPagination
+from core.cache import CacheService
+from core.http_ import Http404, HttpError, cached_json_response
+from core.pagination import KeysetPagination
 from django.db import transaction
 from rest_framework import status, viewsets
+from rest_framework.decorators import action
 from rest_framework.generics import (
     RetrieveAPIView,
 )
-from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from surveys.api.v1.serializers.survey import (
     SurveyCreateSerializer,
     SurveyReportSerializer,
     SurveyViewSerializer,
 )
+from surveys.exports import EXPORTERS, stream_survey_responses
 from surveys.models.survey import Survey
+from surveys.permissions import IsSurveyCreator
 from surveys.permissions import IsSurveyOwnerOrReadOnly as IsOwnerOrReadOnly
 
 logger = logging.getLogger(__name__)
@@ -30,7 +39,7 @@ logger = logging.getLogger(__name__)
 
 class SurveyViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticatedOrReadOnly]
-    pagination_class = CustomPagination
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         """
@@ -41,7 +50,7 @@ class SurveyViewSet(viewsets.ModelViewSet):
 
         # For detail views (retrieve/update/destroy), return all surveys
         # This allows proper permission checking to return 403 instead of 404
-        if self.action in ["retrieve", "update", "partial_update", "destroy"]:
+        if self.action in ["retrieve", "update", "partial_update", "destroy", "export"]:
             return Survey.objects.all().order_by("-created_at", "id")
 
         # For list view, apply filtering based on permissions
@@ -74,6 +83,13 @@ class SurveyViewSet(viewsets.ModelViewSet):
             ):
                 return [IsAuthenticatedOrReadOnly()]
             return [IsAuthenticatedOrReadOnly(), IsOwnerOrReadOnly()]
+        # Only the survey creator (or admin/staff) can export its responses
+        if self.action == "export":
+            if self.request.user and (
+                self.request.user.is_staff or self.request.user.is_superuser
+            ):
+                return [IsAuthenticated()]
+            return [IsAuthenticated(), IsSurveyCreator()]
         return [IsAuthenticatedOrReadOnly()]
 
     def get_serializer_class(self):
@@ -106,13 +122,47 @@ class SurveyViewSet(viewsets.ModelViewSet):
         """
         Retrieve a specific survey with custom response format
         """
-        instance = self.get_object()
-        serializer = self.get_serializer(instance)
+        if not isinstance(request.accepted_renderer, JSONRenderer):
+            # e.g. the browsable API, rendered per request
+            instance = self.get_object()
+            serializer = self.get_serializer(instance)
+            return Response(
+                {
+                    "data": serializer.data,
+                    "status": "success",
+                    "code": status.HTTP_200_OK,
+                }
+            )
 
-        # Return formatted response
-        return Response(
-            {"data": serializer.data, "status": "success", "code": status.HTTP_200_OK}
-        )
+        # Read the version before the survey: writes bump it once committed,
+        # so a concurrent write can only make this entry unreachable
+        try:
+            # Keyed by the canonical id, which the invalidation signals bump
+            survey_pk = str(uuid.UUID(self.kwargs["pk"]))
+        except ValueError as err:
+            raise Http404(
+                message=NOT_FOUND_SURVEY_ERROR.format(self.kwargs["pk"]),
+                error_code=status.HTTP_404_NOT_FOUND,
+            ) from err
+        version = CacheService.get_survey_version(survey_pk)
+        cached = CacheService.get_cached_survey(survey_pk, version)
+
+        if cached is None:
+            instance = self.get_object()
+            serializer = self.get_serializer(instance)
+            body = JSONRenderer().render(
+                {
+                    "data": serializer.data,
+                    "status": "success",
+                    "code": status.HTTP_200_OK,
+                }
+            )
+            etag = f'"{hashlib.md5(body).hexdigest()}"'
+            CacheService.cache_survey_data(survey_pk, version, etag, body)
+        else:
+            etag, body = cached
+
+        return cached_json_response(request, body, etag)
 
     @transaction.atomic
     def create(self, request, *args, **kwargs):
@@ -323,6 +373,32 @@ class SurveyViewSet(viewsets.ModelViewSet):
             status=status.HTTP_204_NO_CONTENT,
         )
 
+    @action(detail=True, methods=["get"], url_path="export")
+    def export(self, request, *args, **kwargs):
+        """
+        Stream the survey responses as CSV, NDJSON or XLSX
+        (selected with the ``file_format`` query param, CSV by default)
+        """
+        instance = self.get_object()
+        export_format = request.query_params.get("file_format", "csv")
+
+        if export_format not in EXPORTERS:
+            return Response(
+                {
+                    "details": {
+                        "file_format": INVALID_EXPORT_FORMAT.format(
+                            export_format, ", ".join(EXPORTERS)
+                        )
+                    },
+                    "message": REQUEST_QUERY_PARAM,
+                    "status": "failed",
+                    "code": status.HTTP_400_BAD_REQUEST,
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return stream_survey_responses(instance, export_format)
+
 
 class SurveyReportView(RetrieveAPIView):
     """
@@ -334,6 +410,14 @@ class SurveyReportView(RetrieveAPIView):
     serializer_class = SurveyReportSerializer
     lookup_field = "pk"
 
+    def get_permissions(self):
+        # Only the survey creator (or admin/staff) can read its report
+        if self.request.user and (
+            self.request.user.is_staff or self.request.user.is_superuser
+        ):
+            return [IsAuthenticated()]
+        return [IsAuthenticated(), IsSurveyCreator()]
+
     def get_object(self):
         queryset = self.filter_queryset(self.get_queryset())
 
@@ -353,6 +437,8 @@ class SurveyReportView(RetrieveAPIView):
                 message=str(err), error_code=status.HTTP_500_INTERNAL_SERVER_ERROR
             ) from err
 
+        self.check_object_permissions(self.request, obj)
+
         if obj.status == "D":
             raise HttpError(
                 message=NOT_STARTED_SURVEY_YET, error_code=status.HTTP_409_CONFLICT
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class SurveyConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "surveys"
+
+    def ready(self):
+        from surveys import signals  # noqa: F401
@@ -0,0 +1,222 @@
+import logging
+import time
+
+from core.cache import CacheService, get_redis_client
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from surveys.intake import IntakeStatus, build_intake_record, persist_intake_records
+
+logger = logging.getLogger(__name__)
+
+
+class DraftIndex:
+    """
+    Drafts by last save time, so abandoned ones are found without scanning
+    the keyspace: a Redis sorted set of ``<survey id>:<user token>`` scored
+    by timestamp, or a plain (non-atomic) cache value on other backends.
+    """
+
+    key = "response_drafts"
+
+    @staticmethod
+    def member(survey_id, user_token):
+        return f"{survey_id}:{user_token}"
+
+    @classmethod
+    def touch(cls, survey_id, user_token, timestamp):
+        member = cls.member(survey_id, user_token)
+        client = get_redis_client()
+        if client is None:
+            index = cache.get(cls.key) or {}
+            index[member] = timestamp
+            cache.set(cls.key, index, None)
+        else:
+            client.zadd(cache.make_key(cls.key), {member: timestamp})
+
+    @classmethod
+    def remove(cls, *members):
+        if not members:
+            return
+        client = get_redis_client()
+        if client is None:
+            index = cache.get(cls.key) or {}
+            for member in members:
+                index.pop(member, None)
+            cache.set(cls.key, index, None)
+        else:
+            client.zrem(cache.make_key(cls.key), *members)
+
+    @classmethod
+    def idle_since(cls, timestamp, limit):
+        """Return up to ``limit`` ``(survey_id, user_token)`` saved before it"""
+        client = get_redis_client()
+        if client is None:
+            index = cache.get(cls.key) or {}
+            members = sorted(
+                (score, member) for member, score in index.items() if score < timestamp
+            )
+            members = [member for _score, member in members[:limit]]
+        else:
+            members = [
+                member.decode() if isinstance(member, bytes) else member
+                for member in client.zrangebyscore(
+                    cache.make_key(cls.key), "-inf", f"({timestamp}", 0, limit
+                )
+            ]
+        return [tuple(member.split(":", 1)) for member in members]
+
+
+def get_draft(survey_id, user_token):
+    return CacheService.get_user_progress(user_token, survey_id)
+
+
+def save_draft(
+    compiled_survey, user_token, answers_data, user=None, current=None, metadata=None
+):
+    """
+    Merge a page of answers into the draft of a respondent, returning
+    ``(draft, errors)``. Answers are validated but only written to the cache;
+    an empty value removes a saved answer. The first save starts the response.
+    """
+    if not isinstance(answers_data, list):
+        return None, {"answers": "Expected a list of answers."}
+
+    cleaned, errors, _values = compiled_survey.convert(answers_data)
+    if errors:
+        return None, {
+            "answers": {index: message for index, (_q, message) in errors.items()}
+        }
+
+    draft = get_draft(compiled_survey.id, user_token) or {"answers": {}}
+    for index, question, fields in cleaned:
+        if fields:
+            draft["answers"][question.id] = answers_data[index]
+        else:
+            draft["answers"].pop(question.id, None)
+
+    if user is not None and user.is_authenticated:
+        draft["user"] = user.pk
+    if current is not None:
+        draft["current"] = str(current)
+    if metadata is not None:
+        draft["metadata"] = metadata
+    draft.setdefault("started_at", timezone.now().isoformat())
+    draft["updated_at"] = time.time()
+
+    CacheService.cache_user_progress(user_token, compiled_survey.id, draft)
+    DraftIndex.touch(compiled_survey.id, user_token, draft["updated_at"])
+    return draft, None
+
+
+def discard_draft(survey_id, user_token):
+    CacheService.delete_user_progress(user_token, survey_id)
+    DraftIndex.remove(DraftIndex.member(survey_id, user_token))
+
+
+def build_draft_record(
+    compiled_survey, user_token, draft, answers_data=(), metadata=None, **data
+):
+    """
+    Merge the saved answers of a draft with the last submitted page (which
+    wins) into an intake record, returns ``(record, errors)``
+    """
+    answers = dict(draft.get("answers") or {})
+    for answer_data in answers_data:
+        if isinstance(answer_data, dict):
+            answers[str(answer_data.get("question"))] = answer_data
+
+    record, errors = build_intake_record(
+        compiled_survey,
+        {
+            **data,
+            "answers": list(answers.values()),
+            "user_token": user_token,
+            "started_at": draft.get("started_at"),
+        },
+        partial=not data.get("is_complete", False),
+        metadata=metadata or draft.get("metadata"),
+    )
+    if record is not None:
+        record["user"] = draft.get("user")
+    return record, errors
+
+
+def submit_draft(
+    compiled_survey, user_token, answers_data=None, user=None, metadata=None
+):
+    """
+    Write a draft and the final page of answers as a complete response, in a
+    single transaction with bulk inserts. Returns ``(record, status, errors)``.
+    """
+    if answers_data is None:
+        answers_data = []
+    elif not isinstance(answers_data, list):
+        return None, None, {"answers": "Expected a list of answers."}
+
+    draft = get_draft(compiled_survey.id, user_token) or {"answers": {}}
+    if user is not None and user.is_authenticated:
+        draft["user"] = user.pk
+
+    record, errors = build_draft_record(
+        compiled_survey,
+        user_token,
+        draft,
+        answers_data,
+        metadata=metadata,
+        is_complete=True,
+    )
+    if errors:
+        return None, None, errors
+
+    status = persist_intake_records([record])[record["id"]]
+    if status == IntakeStatus.PERSISTED:
+        discard_draft(compiled_survey.id, user_token)
+    return record, status, None
+
+
+def sweep_drafts(idle_timeout=None, batch_size=500):
+    """
+    Handle drafts not saved for ``idle_timeout`` seconds. With
+    RESPONSE_DRAFT_PERSIST_ABANDONED their answers are written as incomplete
+    responses in one batch, otherwise they are dropped. Returns ``(persisted,
+    expired)`` counts.
+    """
+    from surveys.schema import get_compiled_survey
+
+    if idle_timeout is None:
+        idle_timeout = settings.RESPONSE_DRAFT_IDLE_TIMEOUT
+
+    entries = DraftIndex.idle_since(time.time() - idle_timeout, batch_size)
+
+    records, swept = [], []
+    for survey_id, user_token in entries:
+        swept.append(DraftIndex.member(survey_id, user_token))
+        draft = get_draft(survey_id, user_token)
+        if not draft or not settings.RESPONSE_DRAFT_PERSIST_ABANDONED:
+            continue
+
+        compiled_survey = get_compiled_survey(survey_id)
+        if compiled_survey is None or not draft.get("answers"):
+            continue
+
+        record, errors = build_draft_record(compiled_survey, user_token, draft)
+        if errors:
+            # The survey changed under the draft
+            logger.warning(f"Dropping invalid draft {user_token}: {errors}")
+            continue
+        records.append(record)
+
+    persisted = 0
+    if records:
+        statuses = persist_intake_records(records)
+        persisted = sum(
+            status == IntakeStatus.PERSISTED for status in statuses.values()
+        )
+
+    for member in swept:
+        survey_id, user_token = member.split(":", 1)
+        CacheService.delete_user_progress(user_token, survey_id)
+    DraftIndex.remove(*swept)
+
+    return persisted, len(swept) - persisted
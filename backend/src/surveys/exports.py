@@ -0,0 +1,437 @@
+import csv
+import json
+import os
+import shutil
+import tempfile
+import uuid
+from abc import ABC, abstractmethod
+from datetime import timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.text import slugify
+from surveys.models.export import ExportJob, ExportStatus
+from surveys.models.question import FieldType
+from surveys.models.survey import SurveyResponse
+
+# Rows fetched per server-side cursor round trip
+EXPORT_CHUNK_SIZE = 2000
+
+# Bytes read per chunk when streaming a finished XLSX workbook
+FILE_CHUNK_SIZE = 64 * 1024
+
+RESPONSE_FIELDS = (
+    "id",
+    "started_at",
+    "completed_at",
+    "user__username",
+    "is_complete",
+)
+
+ANSWER_FIELDS = (
+    "answers__question_id",
+    "answers__text_answer",
+    "answers__number_answer",
+    "answers__date_answer",
+    "answers__datetime_answer",
+    "answers__json_answer",
+    "answers__file_answer",
+)
+
+RESPONSE_HEADERS = ["Response ID", "Started At", "Completed At", "User", "Is Complete"]
+
+CHOICE_FIELD_TYPES = (FieldType.SINGLE_CHOICE, FieldType.MULTIPLE_CHOICE)
+
+# Default and maximum number of chunks a background export job is split into
+EXPORT_JOB_CHUNKS = 4
+MAX_EXPORT_JOB_CHUNKS = 32
+
+# Directory under MEDIA_ROOT holding export job files
+EXPORT_JOB_DIR = "exports"
+
+# Export jobs and their files are deleted this long after they were requested
+EXPORT_JOB_RETENTION = timedelta(days=7)
+
+# started_at values splitting the responses of a survey into equally sized
+# partitions, so every chunk of an export job scans a similar number of rows
+PARTITION_BOUNDARIES_SQL = """
+SELECT percentile_disc(%s::double precision[]) WITHIN GROUP (ORDER BY started_at)
+FROM {table}
+WHERE survey_id = %s
+"""
+
+
+def answer_cell(field_type, text, number, date, datetime, json_value, file):
+    """Return the exported value of an answer based on its question type"""
+    if field_type in CHOICE_FIELD_TYPES:
+        if isinstance(json_value, list):
+            return ", ".join(str(value) for value in json_value)
+        return text
+    elif field_type == FieldType.FILE_UPLOAD:
+        return file or ""
+    elif text:
+        return text
+    elif number is not None:
+        return number
+    elif date is not None:
+        return date.isoformat()
+    elif datetime is not None:
+        return datetime.isoformat()
+    elif json_value:
+        return json.dumps(json_value)
+    return ""
+
+
+class SurveyResponseExporter(ABC):
+    """
+    Streams the responses of a survey together with their answers.
+
+    Responses and answers are read in one LEFT JOIN pass over a server-side
+    cursor and pivoted into one row per response in Python, so memory stays
+    flat regardless of how many responses are exported.
+    """
+
+    content_type = None
+    extension = None
+
+    def __init__(self, survey, queryset=None, chunk_size=EXPORT_CHUNK_SIZE):
+        self.survey = survey
+        self.queryset = queryset
+        self.chunk_size = chunk_size
+        self.questions = list(
+            survey.questions.order_by("order", "id").values_list(
+                "id", "title", "field_type"
+            )
+        )
+
+    @property
+    def filename(self):
+        return f"{self.survey.title}_responses.{self.extension}"
+
+    @property
+    def headers(self):
+        return RESPONSE_HEADERS + [title for _id, title, _type in self.questions]
+
+    def get_queryset(self):
+        if self.queryset is not None:
+            return self.queryset
+        return SurveyResponse.objects.filter(survey=self.survey)
+
+    def iter_responses(self):
+        """Yield ``(response_values, {question_id: cell})`` for every response"""
+        field_types = {
+            question_id: field_type
+            for question_id, _title, field_type in self.questions
+        }
+        response_width = len(RESPONSE_FIELDS)
+
+        rows = (
+            self.get_queryset()
+            .order_by("-started_at", "id")
+            .values_list(*RESPONSE_FIELDS, *ANSWER_FIELDS)
+            .iterator(chunk_size=self.chunk_size)
+        )
+
+        for _response_id, response_rows in groupby(rows, key=lambda row: row[0]):
+            cells = {}
+            for row in response_rows:
+                question_id = row[response_width]
+                if question_id is not None:
+                    cells[question_id] = answer_cell(
+                        field_types.get(question_id), *row[response_width + 1 :]
+                    )
+            yield row[:response_width], cells
+
+    def iter_rows(self):
+        """Yield one flat list of cells per response, in header order"""
+        for (
+            response_id,
+            started_at,
+            completed_at,
+            username,
+            is_complete,
+        ), cells in self.iter_responses():
+            yield [
+                response_id,
+                started_at,
+                completed_at,
+                username or "Anonymous",
+                is_complete,
+                *(cells.get(question_id, "") for question_id, _t, _f in self.questions),
+            ]
+
+    @abstractmethod
+    def stream(self):
+        """Yield the export file in chunks"""
+
+    def get_response(self):
+        response = StreamingHttpResponse(self.stream(), content_type=self.content_type)
+        response["Content-Disposition"] = f'attachment; filename="{self.filename}"'
+        return response
+
+
+class StreamingExporter(SurveyResponseExporter):
+    """
+    Exporter of a text format whose rows can be written independently, so
+    the rows of separate chunks concatenate into one file after its header.
+    """
+
+    def stream_header(self):
+        return iter(())
+
+    @abstractmethod
+    def stream_rows(self):
+        """Yield the rows of the exported responses as text chunks"""
+
+    def stream(self):
+        yield from self.stream_header()
+        yield from self.stream_rows()
+
+
+class Echo:
+    """File-like object whose write() returns the value instead of storing it"""
+
+    def write(self, value):
+        return value
+
+
+class CSVExporter(StreamingExporter):
+    content_type = "text/csv"
+    extension = "csv"
+
+    def stream_header(self):
+        yield csv.writer(Echo()).writerow(self.headers)
+
+    def stream_rows(self):
+        writer = csv.writer(Echo())
+
+        lines = []
+        for row in self.iter_rows():
+            lines.append(writer.writerow(row))
+            if len(lines) >= self.chunk_size:
+                yield "".join(lines)
+                lines = []
+
+        if lines:
+            yield "".join(lines)
+
+
+class NDJSONExporter(StreamingExporter):
+    content_type = "application/x-ndjson"
+    extension = "ndjson"
+
+    def stream_rows(self):
+        encoder = DjangoJSONEncoder()
+
+        lines = []
+        for (
+            response_id,
+            started_at,
+            completed_at,
+            username,
+            is_complete,
+        ), cells in self.iter_responses():
+            record = {
+                "id": response_id,
+                "started_at": started_at,
+                "completed_at": completed_at,
+                "user": username,
+                "is_complete": is_complete,
+                "answers": {
+                    str(question_id): value for question_id, value in cells.items()
+                },
+            }
+            lines.append(encoder.encode(record) + "\n")
+            if len(lines) >= self.chunk_size:
+                yield "".join(lines)
+                lines = []
+
+        if lines:
+            yield "".join(lines)
+
+
+class XLSXExporter(SurveyResponseExporter):
+    content_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    extension = "xlsx"
+
+    def stream(self):
+        from openpyxl import Workbook
+
+        # The zip container can only be written once all rows are known, so
+        # the write-only workbook is spooled to disk and streamed afterwards.
+        workbook = Workbook(write_only=True)
+        worksheet = workbook.create_sheet("Responses")
+        worksheet.append(self.headers)
+
+        for row in self.iter_rows():
+            worksheet.append([self.to_cell(value) for value in row])
+
+        with tempfile.TemporaryFile() as output:
+            workbook.save(output)
+            output.seek(0)
+            while chunk := output.read(FILE_CHUNK_SIZE):
+                yield chunk
+
+    @staticmethod
+    def to_cell(value):
+        if value is None or isinstance(value, str | int | float | bool):
+            return value
+        if hasattr(value, "tzinfo") and value.tzinfo is not None:
+            # Excel has no notion of time zones
+            return value.replace(tzinfo=None)
+        return str(value)
+
+
+EXPORTERS = {
+    "csv": CSVExporter,
+    "ndjson": NDJSONExporter,
+    "xlsx": XLSXExporter,
+}
+
+
+def stream_survey_responses(survey, export_format="csv", queryset=None):
+    """Return a StreamingHttpResponse exporting the responses of a survey"""
+    exporter_class = EXPORTERS[export_format]
+    return exporter_class(survey, queryset=queryset).get_response()
+
+
+def plan_export_partitions(survey, chunks=EXPORT_JOB_CHUNKS):
+    """
+    Split the responses of a survey into at most ``chunks`` half-open
+    ``[lower, upper)`` started_at ranges, newest first to match the export row
+    order. Bounds are ISO strings (``None`` when open) so they can be passed to
+    Celery tasks as they are.
+    """
+    fractions = [index / chunks for index in range(1, chunks)]
+    boundaries = []
+
+    if fractions:
+        sql = PARTITION_BOUNDARIES_SQL.format(table=SurveyResponse._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [fractions, str(survey.id)])
+            boundaries = sorted(set(cursor.fetchone()[0] or []))
+
+    edges = [None, *(boundary.isoformat() for boundary in boundaries), None]
+    partitions = list(zip(edges[:-1], edges[1:], strict=True))
+    partitions.reverse()
+    return partitions
+
+
+class ExportJobWriter:
+    """
+    Writes an ExportJob as independent part files under
+    ``MEDIA_ROOT/exports/<job id>/`` and concatenates them into the final file.
+
+    Parts hold rows only; the header is written once during assembly, which is
+    why only formats whose rows can be concatenated (CSV, NDJSON) are supported.
+    """
+
+    def __init__(self, job):
+        self.job = job
+        self.exporter_class = EXPORTERS[job.file_format]
+
+    @property
+    def relative_dir(self):
+        return os.path.join(EXPORT_JOB_DIR, str(self.job.id))
+
+    @property
+    def directory(self):
+        return os.path.join(settings.MEDIA_ROOT, self.relative_dir)
+
+    @property
+    def filename(self):
+        title = slugify(self.job.survey.title) or "survey"
+        return f"{title}_responses.{self.exporter_class.extension}"
+
+    def part_path(self, index):
+        return os.path.join(self.directory, f"part-{index:05d}")
+
+    def get_exporter(self, queryset=None):
+        return self.exporter_class(self.job.survey, queryset=queryset)
+
+    def write_chunk(self, index, lower=None, upper=None):
+        """Write the responses started within ``[lower, upper)``, return the bytes written"""
+        queryset = SurveyResponse.objects.filter(survey_id=self.job.survey_id)
+        if lower is not None:
+            queryset = queryset.filter(started_at__gte=parse_datetime(lower))
+        if upper is not None:
+            queryset = queryset.filter(started_at__lt=parse_datetime(upper))
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.part_path(index)
+
+        # Written under a temporary name so a retried chunk never leaves a
+        # truncated part behind
+        with open(f"{path}.tmp", "wb") as output:
+            for chunk in self.get_exporter(queryset).stream_rows():
+                output.write(chunk.encode())
+        os.replace(f"{path}.tmp", path)
+
+        return os.path.getsize(path)
+
+    def assemble(self, total_chunks):
+        """Concatenate the header and every part into the final export file"""
+        relative_path = os.path.join(self.relative_dir, self.filename)
+        path = os.path.join(settings.MEDIA_ROOT, relative_path)
+
+        with open(path, "wb") as output:
+            for chunk in self.get_exporter().stream_header():
+                output.write(chunk.encode())
+            for index in range(total_chunks):
+                with open(self.part_path(index), "rb") as part:
+                    shutil.copyfileobj(part, output, FILE_CHUNK_SIZE)
+
+        for index in range(total_chunks):
+            os.remove(self.part_path(index))
+
+        return relative_path, os.path.getsize(path)
+
+    def cleanup(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def is_uuid(value):
+    try:
+        uuid.UUID(value)
+    except ValueError:
+        return False
+    return True
+
+
+def expire_export_jobs(retention=EXPORT_JOB_RETENTION):
+    """
+    Delete the export jobs requested more than ``retention`` ago, whose
+    directories are removed with them, and the directories left behind by
+    failed or deleted jobs. Returns ``(jobs deleted, directories removed)``.
+    """
+    deleted, _counts = ExportJob.objects.filter(
+        created_at__lt=timezone.now() - retention
+    ).delete()
+
+    root = os.path.join(settings.MEDIA_ROOT, EXPORT_JOB_DIR)
+    try:
+        names = os.listdir(root)
+    except FileNotFoundError:
+        return deleted, 0
+
+    # Listed before the jobs are read, as a job is created before its directory
+    live = {
+        str(job_id)
+        for job_id in ExportJob.objects.filter(
+            id__in=[name for name in names if is_uuid(name)]
+        )
+        .exclude(status=ExportStatus.FAILED)
+        .values_list("id", flat=True)
+    }
+    removed = 0
+    for name in names:
+        path = os.path.join(root, name)
+        if name not in live and os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+    return deleted, removed
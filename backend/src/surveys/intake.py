@@ -0,0 +1,361 @@
+import ipaddress
+import json
+import logging
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+
+from core.cache import CacheService
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import (
+    IntegrityError,
+    InterfaceError,
+    OperationalError,
+    transaction,
+)
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from surveys.models.answer import Answer
+from surveys.models.question import Question
+from surveys.models.survey import SurveyResponse
+from surveys.signals import answers_bulk_created, responses_bulk_created
+
+logger = logging.getLogger(__name__)
+
+# SQLSTATE of a unique constraint violation in PostgreSQL
+UNIQUE_VIOLATION = "23505"
+
+
+class IntakeStatus:
+    QUEUED = "queued"
+    PERSISTED = "persisted"
+    DUPLICATE = "duplicate"
+    FAILED = "failed"
+
+
+def get_request_metadata(request):
+    """
+    Respondent metadata stored with a response: client IP, user agent,
+    referrer and country, read from RESPONSE_CLIENT_IP_HEADER and
+    RESPONSE_COUNTRY_HEADER behind a proxy or CDN
+    """
+    meta = request.META
+    ip_address = meta.get(settings.RESPONSE_CLIENT_IP_HEADER, "").split(",")[0]
+    try:
+        ip_address = str(ipaddress.ip_address(ip_address.strip()))
+    except ValueError:
+        ip_address = None
+
+    # Clipped to the column sizes, bulk inserts are not validated
+    return {
+        "ip_address": ip_address,
+        "user_agent": meta.get("HTTP_USER_AGENT", ""),
+        "referrer": meta.get("HTTP_REFERER", "")[:200],
+        "country": meta.get(settings.RESPONSE_COUNTRY_HEADER, "")[:100],
+    }
+
+
+def parse_started_at(value, now):
+    """Parse the ISO 8601 start time of a submission, it can't be in the future"""
+    started_at = parse_datetime(str(value))
+    if started_at is None:
+        raise ValueError(value)
+    if timezone.is_naive(started_at):
+        started_at = timezone.make_aware(started_at)
+    if started_at > now:
+        raise ValueError(value)
+    return started_at
+
+
+def build_intake_record(compiled_survey, data, user=None, partial=False, metadata=None):
+    """
+    Validate a submission against a compiled survey and return ``(record,
+    errors)``.
+
+    The record is the JSON-serialisable form of the response that is queued
+    and later written by the batch writer. Answers to unknown questions are
+    skipped, as in the synchronous write path. With ``partial`` required
+    questions may be left unanswered (abandoned drafts).
+
+    Timing is fixed when the submission is accepted, not when it is written:
+    a complete response is completed now, and its ``time_taken`` is known when
+    ``started_at`` (the draft's first save, or sent by the client) is.
+    """
+    answers_data = data.get("answers") or []
+    if not isinstance(answers_data, list):
+        return None, {"answers": "Expected a list of answers."}
+
+    cleaned, errors = compiled_survey.clean(answers_data, partial=partial)
+    if errors:
+        return None, {"answers": errors}
+
+    try:
+        user_token = str(uuid.UUID(str(data.get("user_token") or uuid.uuid4())))
+    except ValueError:
+        return None, {"user_token": "Must be a valid UUID."}
+
+    now = timezone.now()
+    started_at = data.get("started_at")
+    if started_at is not None:
+        try:
+            started_at = parse_started_at(started_at, now)
+        except ValueError:
+            return None, {"started_at": "Must be an ISO 8601 datetime in the past."}
+
+    is_complete = bool(data.get("is_complete", False))
+    completed_at = now if is_complete else None
+    time_taken = None
+    if is_complete and started_at is not None:
+        time_taken = (completed_at - started_at).total_seconds()
+
+    record = {
+        "id": str(uuid.uuid4()),
+        "survey": compiled_survey.id,
+        "user": user.pk if user is not None and user.is_authenticated else None,
+        "user_token": user_token,
+        "is_complete": is_complete,
+        "started_at": (started_at or now).isoformat(),
+        "completed_at": completed_at.isoformat() if completed_at else None,
+        "time_taken": time_taken,
+        **(metadata or {}),
+        "answers": [
+            {"question": question.id, **fields} for question, fields in cleaned
+        ],
+    }
+    return record, None
+
+
+def persist_intake_records(records):
+    """
+    Write a batch of intake records with one bulk_create for responses and one
+    for answers. Records whose ``(survey, user_token)`` is already stored are
+    skipped, which makes redelivered or retried submissions idempotent.
+
+    When the batch fails its records are written one by one; a record that
+    still fails is a duplicate if it broke the unique user token, otherwise
+    it is failed. Database connection errors are raised.
+
+    Returns ``{response_id: IntakeStatus}``.
+    """
+    statuses = {}
+
+    # Submissions already persisted (redelivery) or sharing a user token
+    existing = SurveyResponse.objects.filter(
+        Q(id__in=[record["id"] for record in records])
+        | Q(user_token__in=[record["user_token"] for record in records])
+    ).values_list("id", "survey_id", "user_token")
+    persisted_ids = {str(response_id) for response_id, _s, _t in existing}
+    taken = {(str(survey_id), str(token)) for _id, survey_id, token in existing}
+
+    pending = []
+    for record in records:
+        key = (record["survey"], record["user_token"])
+        if record["id"] in persisted_ids:
+            statuses[record["id"]] = IntakeStatus.PERSISTED
+        elif key in taken:
+            statuses[record["id"]] = IntakeStatus.DUPLICATE
+        else:
+            taken.add(key)
+            pending.append(record)
+
+    if not pending:
+        return statuses
+
+    question_ids = {
+        answer["question"] for record in pending for answer in record["answers"]
+    }
+    questions = Question.objects.only("id", "survey_id", "field_type").in_bulk(
+        question_ids
+    )
+
+    try:
+        with transaction.atomic():
+            write_intake_records(pending, questions)
+    except (OperationalError, InterfaceError):
+        # The database is unavailable, not the records at fault
+        raise
+    except Exception as err:
+        if len(pending) > 1:
+            # Isolate the failing records by writing the batch one by one
+            for record in pending:
+                statuses.update(persist_intake_records([record]))
+            return statuses
+
+        record_id = pending[0]["id"]
+        if is_unique_violation(err):
+            # Lost a race with a concurrent writer for the same user token
+            statuses[record_id] = IntakeStatus.DUPLICATE
+        else:
+            logger.error(f"Error persisting intake record {record_id}: {str(err)}")
+            statuses[record_id] = IntakeStatus.FAILED
+        return statuses
+
+    for record in pending:
+        statuses[record["id"]] = IntakeStatus.PERSISTED
+    return statuses
+
+
+def is_unique_violation(err):
+    return (
+        isinstance(err, IntegrityError)
+        and getattr(err.__cause__, "pgcode", None) == UNIQUE_VIOLATION
+    )
+
+
+def get_record_timing(record):
+    """
+    ``(started_at, completed_at, time_taken)`` of an intake record; records
+    queued without timing are timed by their write
+    """
+    now = timezone.now()
+    started_at = parse_datetime(record.get("started_at") or "") or now
+    completed_at = None
+    if record["is_complete"]:
+        completed_at = parse_datetime(record.get("completed_at") or "") or now
+
+    time_taken = record.get("time_taken")
+    if time_taken is not None:
+        time_taken = timedelta(seconds=time_taken)
+    return started_at, completed_at, time_taken
+
+
+def write_intake_records(records, questions):
+    responses, answers = [], []
+    answers_by_survey = defaultdict(list)
+
+    for record in records:
+        started_at, completed_at, time_taken = get_record_timing(record)
+        survey_response = SurveyResponse(
+            id=record["id"],
+            survey_id=record["survey"],
+            user_id=record["user"],
+            user_token=record["user_token"],
+            is_complete=record["is_complete"],
+            started_at=started_at,
+            completed_at=completed_at,
+            time_taken=time_taken,
+            ip_address=record.get("ip_address"),
+            user_agent=record.get("user_agent", ""),
+            referrer=record.get("referrer", ""),
+            country=record.get("country", ""),
+        )
+        responses.append(survey_response)
+
+        for answer_data in record["answers"]:
+            fields = dict(answer_data)
+            question = questions.get(uuid.UUID(fields.pop("question")))
+            if question is None:
+                # Deleted after the submission was accepted
+                continue
+            answer = Answer(response=survey_response, question=question, **fields)
+            answers.append(answer)
+            answers_by_survey[question.survey_id].append(answer)
+
+    SurveyResponse.objects.bulk_create(responses)
+    Answer.objects.bulk_create(answers)
+
+    responses_bulk_created.send(sender=SurveyResponse, responses=responses)
+    for survey_answers in answers_by_survey.values():
+        answers_bulk_created.send(sender=Answer, answers=survey_answers)
+
+
+class ResponseIntake:
+    """
+    Accept-then-persist write path for survey submissions.
+
+    Validated submissions are appended to a Redis stream and acknowledged with
+    202; ``process()`` is run by the batch writer (``manage.py
+    process_response_intake``) to read the stream through a consumer group and
+    write the submissions in large batches.
+    """
+
+    def __init__(self, client=None):
+        self.client = client
+        self.stream = settings.RESPONSE_INTAKE_STREAM
+        self.group = settings.RESPONSE_INTAKE_GROUP
+
+    def get_client(self):
+        if self.client is None:
+            from django_redis import get_redis_connection
+
+            self.client = get_redis_connection("default")
+        return self.client
+
+    def enqueue(self, record):
+        payload = json.dumps(record, cls=DjangoJSONEncoder)
+        self.get_client().xadd(self.stream, {"record": payload})
+        CacheService.set_response_intake_status(record["id"], IntakeStatus.QUEUED)
+        return record["id"]
+
+    @staticmethod
+    def get_status(response_id):
+        if SurveyResponse.objects.filter(id=response_id).exists():
+            return IntakeStatus.PERSISTED
+        return CacheService.get_response_intake_status(response_id)
+
+    def ensure_group(self):
+        from redis.exceptions import ResponseError
+
+        try:
+            self.get_client().xgroup_create(
+                self.stream, self.group, id="0", mkstream=True
+            )
+        except ResponseError as err:
+            if "BUSYGROUP" not in str(err):
+                raise
+
+    def read(self, consumer, count, block=None):
+        """Read new messages for a consumer, returns ``[(message_id, record)]``"""
+        entries = self.get_client().xreadgroup(
+            self.group, consumer, {self.stream: ">"}, count=count, block=block
+        )
+        return [
+            (message_id, json.loads(fields[b"record"]))
+            for _stream, messages in entries or []
+            for message_id, fields in messages
+        ]
+
+    def claim_stale(self, consumer, min_idle_time, count):
+        """Take over messages left unacknowledged by a crashed writer"""
+        _next, messages, *_deleted = self.get_client().xautoclaim(
+            self.stream, self.group, consumer, min_idle_time, count=count
+        )
+        return [
+            (message_id, json.loads(fields[b"record"]))
+            for message_id, fields in messages
+            if fields
+        ]
+
+    def acknowledge(self, message_ids):
+        pipeline = self.get_client().pipeline()
+        pipeline.xack(self.stream, self.group, *message_ids)
+        pipeline.xdel(self.stream, *message_ids)
+        pipeline.execute()
+
+    def process(self, consumer, count=500, block=None, min_idle_time=None):
+        """Persist one batch of queued submissions, returns how many were read"""
+        messages = []
+        if min_idle_time is not None:
+            messages = self.claim_stale(consumer, min_idle_time, count)
+        if not messages:
+            messages = self.read(consumer, count, block)
+        if not messages:
+            return 0
+
+        records = [record for _message_id, record in messages]
+        try:
+            statuses = persist_intake_records(records)
+        except Exception as err:
+            # Failing records are resolved one by one, so this is the
+            # database being unavailable: left pending so the batch is
+            # retried after min_idle_time
+            logger.error(f"Error persisting response intake batch: {str(err)}")
+            raise
+
+        for response_id, status in statuses.items():
+            CacheService.set_response_intake_status(response_id, status)
+
+        self.acknowledge([message_id for message_id, _record in messages])
+        return len(messages)
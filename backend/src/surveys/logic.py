@@ -0,0 +1,331 @@
+import logging
+from datetime import date, datetime
+
+logger = logging.getLogger(__name__)
+
+
+class SurveyLogicError(ValueError):
+    """Raised when the conditional logic of a survey cannot be ordered"""
+
+
+def normalize(value):
+    """Bring an answer value to the form condition values are compared with"""
+    if value is None or value == "" or value == []:
+        return None
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, list | tuple):
+        return [str(item) for item in value]
+    if isinstance(value, int | float):
+        return float(value)
+    if isinstance(value, date | datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def to_number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def split_values(condition_value):
+    return frozenset(item.strip() for item in condition_value.split(","))
+
+
+def make_equals(condition_value):
+    number = to_number(condition_value)
+    text = condition_value.strip()
+    lowered = text.lower()
+
+    def equals(value):
+        if isinstance(value, list):
+            return text in value
+        if isinstance(value, float):
+            return number is not None and value == number
+        return value is not None and value.lower() == lowered
+
+    return equals
+
+
+def make_not_equals(condition_value):
+    equals = make_equals(condition_value)
+    return lambda value: value is not None and not equals(value)
+
+
+def make_contains(condition_value):
+    text = condition_value.strip()
+
+    def contains(value):
+        if isinstance(value, list):
+            return text in value
+        return isinstance(value, str) and text.lower() in value.lower()
+
+    return contains
+
+
+def make_not_contains(condition_value):
+    contains = make_contains(condition_value)
+    return lambda value: value is not None and not contains(value)
+
+
+def make_in(condition_value):
+    values = split_values(condition_value)
+
+    def is_in(value):
+        if isinstance(value, list):
+            return any(item in values for item in value)
+        if isinstance(value, float):
+            return any(to_number(item) == value for item in values)
+        return value in values
+
+    return is_in
+
+
+def make_not_in(condition_value):
+    is_in = make_in(condition_value)
+    return lambda value: value is not None and not is_in(value)
+
+
+def make_comparison(compare):
+    def factory(condition_value):
+        number = to_number(condition_value)
+        if number is None:
+            # Dates and datetimes compare as ISO 8601 strings
+            text = condition_value.strip()
+            return lambda value: isinstance(value, str) and compare(value, text)
+
+        def comparison(value):
+            if isinstance(value, str):
+                value = to_number(value)
+            return isinstance(value, float) and compare(value, number)
+
+        return comparison
+
+    return factory
+
+
+def make_is_answered(condition_value):
+    return lambda value: value is not None
+
+
+def make_is_not_answered(condition_value):
+    return lambda value: value is None
+
+
+# Operator name -> factory building the predicate from the condition value
+OPERATORS = {
+    "equals": make_equals,
+    "not_equals": make_not_equals,
+    "contains": make_contains,
+    "not_contains": make_not_contains,
+    "in": make_in,
+    "not_in": make_not_in,
+    "greater_than": make_comparison(lambda value, other: value > other),
+    "greater_than_or_equal": make_comparison(lambda value, other: value >= other),
+    "less_than": make_comparison(lambda value, other: value < other),
+    "less_than_or_equal": make_comparison(lambda value, other: value <= other),
+    "is_answered": make_is_answered,
+    "is_not_answered": make_is_not_answered,
+}
+
+OPERATOR_ALIASES = {
+    "eq": "equals",
+    "=": "equals",
+    "==": "equals",
+    "ne": "not_equals",
+    "!=": "not_equals",
+    "gt": "greater_than",
+    ">": "greater_than",
+    "gte": "greater_than_or_equal",
+    ">=": "greater_than_or_equal",
+    "lt": "less_than",
+    "<": "less_than",
+    "lte": "less_than_or_equal",
+    "<=": "less_than_or_equal",
+}
+
+
+def get_operator(condition_operator, condition_value):
+    """
+    Return the operator name of a condition. An empty operator means "equals"
+    when a condition value is set and "is_answered" otherwise.
+    """
+    operator = (condition_operator or "").strip().lower()
+    operator = OPERATOR_ALIASES.get(operator, operator)
+    if not operator:
+        return "equals" if condition_value else "is_answered"
+    return operator
+
+
+def topological_order(parents):
+    """
+    Order question ids so every question comes after the question it depends
+    on (Kahn's algorithm). ``parents`` maps question id -> parent id or None.
+
+    Returns ``(order, cyclic)`` where cyclic is the set of question ids that
+    are part of, or depend on, a dependency cycle.
+    """
+    children = {}
+    pending = {}
+    for question_id, parent_id in parents.items():
+        if parent_id is None:
+            pending[question_id] = 0
+        else:
+            pending[question_id] = 1
+            children.setdefault(parent_id, []).append(question_id)
+
+    order = [question_id for question_id, count in pending.items() if not count]
+    for question_id in order:
+        for child_id in children.get(question_id, ()):
+            pending[child_id] -= 1
+            if not pending[child_id]:
+                order.append(child_id)
+
+    cyclic = {question_id for question_id, count in pending.items() if count}
+    return order, cyclic
+
+
+class SurveyLogic:
+    """
+    The conditional logic of a survey compiled into a DAG.
+
+    Questions are topologically sorted on ``depends_on`` once, with each
+    condition turned into a predicate, so the visibility of every question is
+    resolved in a single pass over an answer set. A question is visible when
+    it has no parent, or its parent is visible and the condition on the
+    parent's answer holds. Questions on a dependency cycle are never shown.
+    """
+
+    def __init__(self, questions):
+        # questions: CompiledQuestion instances in display order
+        self.questions = list(questions)
+        self.positions = {
+            question.id: position for position, question in enumerate(self.questions)
+        }
+
+        parents = {}
+        self.conditions = {}
+        self.unknown_operators = {}
+        for question in self.questions:
+            parent_id = question.depends_on
+            if parent_id not in self.positions:
+                parents[question.id] = None
+                continue
+
+            parents[question.id] = parent_id
+            condition_value = question.condition_value or ""
+            operator = get_operator(question.condition_operator, condition_value)
+            factory = OPERATORS.get(operator)
+            if factory is None:
+                self.unknown_operators[question.id] = operator
+                self.conditions[question.id] = lambda value: False
+            else:
+                self.conditions[question.id] = factory(condition_value)
+
+        self.order, self.cyclic = topological_order(parents)
+        self.parents = {
+            question_id: parent_id
+            for question_id, parent_id in parents.items()
+            if parent_id is not None
+        }
+
+        if self.cyclic:
+            logger.warning(
+                f"Questions {sorted(self.cyclic)} are on a dependency cycle "
+                "and will never be shown"
+            )
+
+    @property
+    def is_conditional(self):
+        return bool(self.parents)
+
+    def check(self):
+        """Raise SurveyLogicError if the dependencies contain a cycle"""
+        if self.cyclic:
+            raise SurveyLogicError(
+                f"Questions {', '.join(sorted(self.cyclic))} form a dependency cycle."
+            )
+
+    def visible(self, values):
+        """
+        Return the set of visible question ids for ``values``, a mapping of
+        question id -> answer value (as produced by ``normalize``).
+        """
+        if not self.parents:
+            return set(self.order)
+
+        visible = set()
+        parents, conditions = self.parents, self.conditions
+        for question_id in self.order:
+            parent_id = parents.get(question_id)
+            if parent_id is None or (
+                parent_id in visible and conditions[question_id](values.get(parent_id))
+            ):
+                visible.add(question_id)
+        return visible
+
+    def next_questions(self, visible, current=None, limit=None):
+        """
+        Return the questions of the ``visible`` set that follow ``current`` in
+        display order (from the start of the survey when it is None), at most
+        ``limit``.
+        """
+        start = self.positions[current] + 1 if current in self.positions else 0
+
+        questions = []
+        for question in self.questions[start:]:
+            if question.id not in visible:
+                continue
+            questions.append(question)
+            if limit is not None and len(questions) >= limit:
+                break
+        return questions
+
+    def errors(self):
+        """Describe the problems in the survey logic, for survey authors"""
+        errors = []
+        questions = {question.id: question for question in self.questions}
+
+        if self.cyclic:
+            errors.append(
+                "Questions "
+                + ", ".join(
+                    f"'{questions[question_id].title}'"
+                    for question_id in sorted(
+                        self.cyclic, key=self.positions.__getitem__
+                    )
+                )
+                + " depend on each other in a cycle"
+            )
+
+        for question_id, parent_id in self.parents.items():
+            question, parent = questions[question_id], questions[parent_id]
+            if self.positions[parent_id] >= self.positions[question_id]:
+                errors.append(
+                    f"Question '{question.title}' depends on a question that "
+                    + "comes after it"
+                )
+
+            if question_id in self.unknown_operators:
+                errors.append(
+                    f"Unknown condition operator "
+                    f"'{self.unknown_operators[question_id]}' for question "
+                    f"'{question.title}'"
+                )
+            elif parent.options and question.condition_value:
+                operator = get_operator(
+                    question.condition_operator, question.condition_value
+                )
+                condition_values = (
+                    split_values(question.condition_value)
+                    if operator in ("in", "not_in")
+                    else {question.condition_value.strip()}
+                )
+                if not parent.allow_other and not condition_values <= parent.options:
+                    errors.append(
+                        f"Invalid condition value for question '{question.title}'"
+                    )
+
+        return errors
@@ -0,0 +1,57 @@
+import os
+import socket
+
+from django.core.management.base import BaseCommand
+from surveys.intake import ResponseIntake
+
+
+class Command(BaseCommand):
+    help = "Persist survey submissions queued on the response intake stream"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Maximum number of submissions written per batch.",
+        )
+        parser.add_argument(
+            "--block",
+            type=int,
+            default=5000,
+            help="Milliseconds to wait for new submissions before polling again.",
+        )
+        parser.add_argument(
+            "--min-idle",
+            type=int,
+            default=60000,
+            help="Milliseconds after which another writer's pending batch is taken over.",
+        )
+        parser.add_argument(
+            "--consumer",
+            default=f"{socket.gethostname()}-{os.getpid()}",
+            help="Consumer name of this writer within the consumer group.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Drain the queued submissions and exit instead of running forever.",
+        )
+
+    def handle(self, *args, **options):
+        intake = ResponseIntake()
+        intake.ensure_group()
+
+        total = 0
+        while True:
+            count = intake.process(
+                options["consumer"],
+                count=options["batch_size"],
+                block=None if options["once"] else options["block"],
+                min_idle_time=options["min_idle"],
+            )
+            total += count
+            if options["once"] and not count:
+                break
+
+        self.stdout.write(self.style.SUCCESS(f"Persisted {total} submissions"))
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.3 on 2026-10-18 16:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("surveys", "0002_exportjob"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="survey",
+            index=models.Index(
+                fields=["-created_at", "id"], name="surveys_sur_created_dd2c86_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="survey",
+            index=models.Index(
+                fields=["created_by", "-created_at", "id"],
+                name="surveys_sur_created_2e0cbf_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="surveyresponse",
+            index=models.Index(
+                fields=["survey", "-started_at", "id"],
+                name="surveys_sur_survey__25a935_idx",
+            ),
+        ),
+    ]
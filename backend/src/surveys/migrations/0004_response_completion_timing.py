@@ -0,0 +1,34 @@
+# Generated by Django 5.2.3 on 2026-10-18 18:57
+
+import datetime
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import DurationField, F, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_completed_at(apps, schema_editor):
+    # Complete responses written before completion was stamped: completed the
+    # recorded time taken after their start
+    SurveyResponse = apps.get_model("surveys", "SurveyResponse")
+    SurveyResponse.objects.filter(is_complete=True, completed_at=None).update(
+        completed_at=F("started_at")
+        + Coalesce("time_taken", Value(datetime.timedelta(), DurationField()))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("surveys", "0003_keyset_pagination_indexes"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="surveyresponse",
+            name="started_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(backfill_completed_at, migrations.RunPython.noop),
+    ]
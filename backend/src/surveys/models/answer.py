@@ -44,3 +44,12 @@ class Answer(models.Model):
         elif self.json_answer:
             return json.dumps(self.json_answer)
         return ""
+
+    @property
+    def choice_values(self):
+        """Return the selected option values of a single/multiple choice answer"""
+        if isinstance(self.json_answer, list):
+            return [str(value) for value in self.json_answer]
+        elif self.text_answer:
+            return [self.text_answer]
+        return []
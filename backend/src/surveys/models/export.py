@@ -0,0 +1,75 @@
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.db import models
+
+User = get_user_model()
+
+
+class ExportStatus(models.TextChoices):
+    """Lifecycle of a background export job."""
+
+    PENDING = "P", "Pending"
+    RUNNING = "R", "Running"
+    COMPLETED = "C", "Completed"
+    FAILED = "F", "Failed"
+
+
+class ExportFormat(models.TextChoices):
+    """File formats that can be assembled from independently written chunks."""
+
+    CSV = "csv", "CSV"
+    NDJSON = "ndjson", "NDJSON"
+
+
+class ExportJob(models.Model):
+    """A survey response export generated in the background by Celery."""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    survey = models.ForeignKey(
+        "surveys.Survey", on_delete=models.CASCADE, related_name="export_jobs"
+    )
+    requested_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True
+    )
+
+    file_format = models.CharField(
+        max_length=10, choices=ExportFormat.choices, default=ExportFormat.CSV
+    )
+    status = models.CharField(
+        max_length=1, choices=ExportStatus.choices, default=ExportStatus.PENDING
+    )
+
+    # Progress
+    total_chunks = models.PositiveIntegerField(default=0)
+    completed_chunks = models.PositiveIntegerField(default=0)
+
+    # Result
+    file = models.FileField(upload_to="exports/", max_length=255, blank=True)
+    byte_size = models.BigIntegerField(default=0)
+    error_message = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["survey", "created_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.get_file_format_display()} export of {self.survey.title}"
+
+    @property
+    def progress(self):
+        """Percentage of chunks written so far."""
+        if self.status == ExportStatus.COMPLETED:
+            return 100.0
+        if not self.total_chunks:
+            return 0.0
+        return round(self.completed_chunks / self.total_chunks * 100, 2)
+
+    @property
+    def is_ready(self):
+        return self.status == ExportStatus.COMPLETED and bool(self.file)
@@ -80,6 +80,9 @@ class Survey(models.Model):
         indexes = [
             models.Index(fields=["status", "created_at"]),
             models.Index(fields=["created_by", "status"]),
+            # Keyset pagination of the survey list
+            models.Index(fields=["-created_at", "id"]),
+            models.Index(fields=["created_by", "-created_at", "id"]),
         ]
 
     def __str__(self):
@@ -121,7 +124,7 @@ class SurveyResponse(models.Model):
     referrer = models.URLField(blank=True)
 
     # Timing
-    started_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(default=timezone.now)
     completed_at = models.DateTimeField(null=True, blank=True)
     time_taken = models.DurationField(null=True, blank=True)
 
@@ -139,7 +142,25 @@ class SurveyResponse(models.Model):
         indexes = [
             models.Index(fields=["survey", "is_complete"]),
             models.Index(fields=["completed_at"]),
+            # Keyset pagination of a survey's responses
+            models.Index(fields=["survey", "-started_at", "id"]),
         ]
 
     def __str__(self):
         return f"Response to {self.survey.title} by {self.user or 'Anonymous'}"
+
+    def save(self, *args, **kwargs):
+        # Completed by this save: a response created complete took no time we
+        # know of, one completed after it was started took the time in between
+        if self.is_complete and self.completed_at is None:
+            self.completed_at = timezone.now()
+            if not self._state.adding and self.time_taken is None:
+                self.time_taken = self.completed_at - self.started_at
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None:
+                kwargs["update_fields"] = {
+                    *update_fields,
+                    "completed_at",
+                    "time_taken",
+                }
+        super().save(*args, **kwargs)
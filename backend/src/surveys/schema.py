@@ -0,0 +1,333 @@
+import re
+import uuid
+from functools import lru_cache
+
+from core.cache import CacheService
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.validators import URLValidator, validate_email
+from surveys.answers import (
+    CHOICE_FIELD_TYPES,
+    AnswerValueError,
+    get_answer_value,
+    get_question_id,
+    typed_answer_fields,
+)
+from surveys.logic import SurveyLogic, normalize
+from surveys.models.answer import Answer
+from surveys.models.question import FieldType
+from surveys.models.survey import Survey
+
+# Compiled surveys kept per process; entries are keyed by survey version so
+# stale ones are never served, they just age out
+COMPILED_SURVEY_CACHE_SIZE = 256
+
+RATING_FIELD_TYPES = (FieldType.RATING, FieldType.SCALE)
+
+validate_url = URLValidator()
+
+
+def option_value(option):
+    if isinstance(option, dict):
+        return str(option.get("value", option.get("text", "")))
+    return str(option)
+
+
+def to_float(value):
+    return float(value) if value is not None else None
+
+
+def compile_survey_data(survey_id):
+    """
+    Read a survey and its questions and return the JSON-serialisable data a
+    CompiledSurvey is built from (three queries).
+    """
+    survey = Survey.objects.filter(pk=survey_id).only("id", "status").first()
+    if survey is None:
+        return None
+
+    questions = []
+    for question in survey.questions.prefetch_related("question_options").order_by(
+        "order", "id"
+    ):
+        options = [option_value(option) for option in question.options or []]
+        options += [option.value for option in question.question_options.all()]
+        allow_other = question.allow_other or any(
+            option.is_other for option in question.question_options.all()
+        )
+
+        questions.append(
+            {
+                "id": str(question.id),
+                "title": question.title,
+                "field_type": question.field_type,
+                "is_required": question.is_required,
+                "order": question.order,
+                "options": options,
+                "allow_other": allow_other,
+                "min_length": question.min_length,
+                "max_length": question.max_length,
+                "min_value": to_float(question.min_value),
+                "max_value": to_float(question.max_value),
+                "scale_min": question.scale_min,
+                "scale_max": question.scale_max,
+                "patterns": [
+                    pattern
+                    for pattern in (question.regex_pattern, question.validation_regex)
+                    if pattern
+                ],
+                "error_message": question.error_message,
+                "depends_on": (
+                    str(question.depends_on_id) if question.depends_on_id else None
+                ),
+                "condition_operator": question.condition_operator,
+                "condition_value": question.condition_value,
+            }
+        )
+
+    return {"id": str(survey.id), "status": survey.status, "questions": questions}
+
+
+class CompiledQuestion:
+    """A question with its validation rules prepared for repeated use."""
+
+    def __init__(self, data):
+        self.id = data["id"]
+        self.title = data["title"]
+        self.field_type = data["field_type"]
+        self.is_required = data["is_required"]
+        self.order = data["order"]
+        self.options = frozenset(data["options"])
+        self.allow_other = data["allow_other"]
+        self.min_length = data["min_length"]
+        self.max_length = data["max_length"]
+        self.min_value = data["min_value"]
+        self.max_value = data["max_value"]
+        self.scale_min = data["scale_min"]
+        self.scale_max = data["scale_max"]
+        self.error_message = data["error_message"]
+        self.depends_on = data["depends_on"]
+        self.condition_operator = data["condition_operator"]
+        self.condition_value = data["condition_value"]
+
+        self.patterns = []
+        for pattern in data["patterns"]:
+            try:
+                self.patterns.append(re.compile(pattern))
+            except re.error:
+                # An invalid pattern saved by the author must not block
+                # every submission
+                continue
+
+    def __repr__(self):
+        return f"<CompiledQuestion {self.id} {self.field_type}>"
+
+    def fail(self, message):
+        raise AnswerValueError(self.error_message or message)
+
+    def clean(self, value):
+        """Convert and validate a submitted value, returning the Answer fields"""
+        fields = typed_answer_fields(self.field_type, value)
+
+        if "text_answer" in fields:
+            self.clean_text(fields["text_answer"])
+        elif "number_answer" in fields:
+            self.clean_number(fields["number_answer"])
+        elif self.field_type in CHOICE_FIELD_TYPES and "json_answer" in fields:
+            self.clean_choices(fields["json_answer"])
+
+        return fields
+
+    def clean_text(self, text):
+        if self.min_length is not None and len(text) < self.min_length:
+            self.fail(f"Ensure this value has at least {self.min_length} characters.")
+        if self.max_length is not None and len(text) > self.max_length:
+            self.fail(f"Ensure this value has at most {self.max_length} characters.")
+
+        for pattern in self.patterns:
+            if not pattern.fullmatch(text):
+                self.fail("This value does not match the required pattern.")
+
+        try:
+            if self.field_type == FieldType.EMAIL:
+                validate_email(text)
+            elif self.field_type == FieldType.URL:
+                validate_url(text)
+        except DjangoValidationError as err:
+            self.fail(err.messages[0])
+
+    def clean_number(self, number):
+        minimum, maximum = self.min_value, self.max_value
+        if self.field_type in RATING_FIELD_TYPES:
+            minimum, maximum = self.scale_min, self.scale_max
+
+        if minimum is not None and number < minimum:
+            self.fail(f"Ensure this value is greater than or equal to {minimum}.")
+        if maximum is not None and number > maximum:
+            self.fail(f"Ensure this value is less than or equal to {maximum}.")
+
+    def clean_choices(self, choices):
+        if self.field_type == FieldType.SINGLE_CHOICE and len(choices) > 1:
+            self.fail("Only one option can be selected.")
+
+        if self.options and not self.allow_other:
+            invalid = [choice for choice in choices if choice not in self.options]
+            if invalid:
+                self.fail(f"'{invalid[0]}' is not a valid option.")
+
+
+class CompiledSurvey:
+    """
+    Everything needed to validate a submission for one version of a survey:
+    its questions with pre-compiled validators, the required set and the
+    conditional-logic graph built from ``depends_on``.
+    """
+
+    def __init__(self, data, version=None):
+        self.id = data["id"]
+        self.status = data["status"]
+        self.version = version
+
+        self.questions = {
+            question["id"]: CompiledQuestion(question) for question in data["questions"]
+        }
+        self.required = frozenset(
+            question_id
+            for question_id, question in self.questions.items()
+            if question.is_required
+        )
+
+        # Conditional logic compiled into a topologically sorted DAG
+        self.logic = SurveyLogic(self.questions.values())
+
+    def __repr__(self):
+        return f"<CompiledSurvey {self.id} version={self.version}>"
+
+    def clean(self, answers_data, partial=False):
+        """
+        Validate the answer payloads of a submission. Returns ``(cleaned,
+        errors)`` where cleaned is a list of ``(question, fields)`` pairs and
+        errors maps payload indexes (or missing required question ids) to a
+        message. Answers to questions outside the survey are skipped.
+
+        Answers to questions hidden by the conditional logic are dropped and
+        only visible questions are required, none with ``partial``.
+        """
+        cleaned, errors, values = self.convert(answers_data)
+        visible = self.logic.visible(values)
+
+        cleaned = [
+            (index, question, fields)
+            for index, question, fields in cleaned
+            if question.id in visible
+        ]
+        errors = {
+            index: message
+            for index, (question_id, message) in errors.items()
+            if question_id is None or question_id in visible
+        }
+
+        if not partial:
+            for question_id in self.required & visible - values.keys():
+                errors[question_id] = "This question is required."
+
+        return [(question, fields) for _index, question, fields in cleaned], errors
+
+    def convert(self, answers_data):
+        """
+        Convert the answer payloads to Answer fields. Returns ``(cleaned,
+        errors, values)``: ``(index, question, fields)`` triples, payload index
+        -> ``(question id, message)`` and question id -> normalised value of
+        the answered questions, as used to evaluate conditions.
+        """
+        cleaned, errors, values = [], {}, {}
+        seen = set()
+
+        for index, answer_data in enumerate(answers_data):
+            if not isinstance(answer_data, dict):
+                errors[index] = (None, "Expected an object.")
+                continue
+
+            question = self.questions.get(str(get_question_id(answer_data)))
+            if question is None:
+                continue
+
+            if question.id in seen:
+                errors[index] = (
+                    None,
+                    f"Question '{question.id}' is answered more than once.",
+                )
+                continue
+            seen.add(question.id)
+
+            try:
+                fields = question.clean(get_answer_value(answer_data))
+            except AnswerValueError as err:
+                errors[index] = (question.id, str(err))
+                continue
+
+            for value in fields.values():
+                value = normalize(value)
+                if value is not None:
+                    values[question.id] = value
+            cleaned.append((index, question, fields))
+
+        return cleaned, errors, values
+
+    def next_questions(self, answers_data, current=None, limit=None):
+        """
+        Return ``(questions, errors)``: the questions to show after
+        ``current`` for the answers given so far, and the errors of those
+        answers (required questions are not checked).
+        """
+        _cleaned, errors, values = self.convert(answers_data)
+        visible = self.logic.visible(values)
+        errors = {
+            index: message
+            for index, (question_id, message) in errors.items()
+            if question_id is None or question_id in visible
+        }
+        return self.logic.next_questions(visible, current, limit), errors
+
+    def build_answers(self, answers_data):
+        """Return ``(answers, errors)`` with unsaved Answer instances"""
+        cleaned, errors = self.clean(answers_data)
+        answers = [
+            Answer(question_id=uuid.UUID(question.id), **fields)
+            for question, fields in cleaned
+        ]
+        return answers, errors
+
+
+@lru_cache(maxsize=COMPILED_SURVEY_CACHE_SIZE)
+def load_compiled_survey(survey_id, version):
+    """
+    Raises Survey.DoesNotExist for missing surveys, which lru_cache does not
+    remember, so a survey created later is compiled under the same version
+    """
+    data = CacheService.get_cached_survey_schema(survey_id, version)
+    if data is None:
+        data = compile_survey_data(survey_id)
+        if data is None:
+            raise Survey.DoesNotExist(survey_id)
+        CacheService.cache_survey_schema(survey_id, version, data)
+    return CompiledSurvey(data, version)
+
+
+def get_compiled_survey(survey_id):
+    """
+    Return the CompiledSurvey of the current survey version, from the process
+    LRU, the shared cache or compiled from the database, in that order.
+    Returns None if the survey does not exist.
+    """
+    try:
+        # The canonical id is the one the invalidation signals bump
+        survey_id = str(uuid.UUID(str(survey_id)))
+    except ValueError:
+        return None
+
+    try:
+        return load_compiled_survey(
+            survey_id, CacheService.get_survey_version(survey_id)
+        )
+    except Survey.DoesNotExist:
+        return None
@@ -0,0 +1,105 @@
+from core.cache import CacheService
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+from surveys.exports import ExportJobWriter
+from surveys.models.answer import Answer
+from surveys.models.export import ExportJob
+from surveys.models.question import Question, QuestionOption
+from surveys.models.survey import Survey, SurveyResponse
+
+# Sent with ``responses=[...]`` after a batch of survey responses is written
+# with bulk_create
+responses_bulk_created = Signal()
+
+# Sent with ``answers=[...]`` after a batch of answers is written with
+# bulk_create, which does not send post_save for the individual rows.
+answers_bulk_created = Signal()
+
+
+def invalidate_survey_on_commit(survey_id):
+    """
+    Bump the survey version once the write is committed: bumped earlier, a
+    concurrent read could cache the rows it still sees under the new version
+    """
+    transaction.on_commit(lambda: CacheService.invalidate_survey_cache(survey_id))
+
+
+@receiver([post_save, post_delete], sender=Survey)
+def invalidate_survey(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_survey_on_commit(instance.id)
+
+
+@receiver([post_save, post_delete], sender=Question)
+def invalidate_survey_questions(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_survey_on_commit(instance.survey_id)
+
+
+# Only saves: options are deleted with their question, which bumps the
+# version, and a delete receiver would stop them from being fast-deleted
+@receiver(post_save, sender=QuestionOption)
+def invalidate_survey_question_options(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+
+    if QuestionOption.question.is_cached(instance):
+        survey_id = instance.question.survey_id
+    else:
+        survey_id = (
+            Question.objects.filter(pk=instance.question_id)
+            .values_list("survey_id", flat=True)
+            .first()
+        )
+    if survey_id is not None:
+        invalidate_survey_on_commit(survey_id)
+
+
+@receiver([post_save, post_delete], sender=SurveyResponse)
+def invalidate_survey_responses(sender, instance, raw=False, **kwargs):
+    if not raw:
+        CacheService.bump_responses_version(instance.survey_id)
+
+
+# Only saves: answers are deleted with their response, which bumps the
+# version, and a delete receiver would stop them from being fast-deleted
+@receiver(post_save, sender=Answer)
+def invalidate_survey_answers(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+
+    if Answer.response.is_cached(instance):
+        survey_id = instance.response.survey_id
+    else:
+        survey_id = (
+            SurveyResponse.objects.filter(id=instance.response_id)
+            .values_list("survey_id", flat=True)
+            .first()
+        )
+    if survey_id is not None:
+        CacheService.bump_responses_version(survey_id)
+
+
+@receiver(responses_bulk_created)
+def invalidate_bulk_responses(sender, responses, **kwargs):
+    for survey_id in {survey_response.survey_id for survey_response in responses}:
+        CacheService.bump_responses_version(survey_id)
+
+
+@receiver(answers_bulk_created)
+def invalidate_bulk_answers(sender, answers, **kwargs):
+    # Answers are written with their responses, each batch has one survey
+    response_ids = {answer.response_id for answer in answers}
+    for survey_id in set(
+        SurveyResponse.objects.filter(id__in=response_ids).values_list(
+            "survey_id", flat=True
+        )
+    ):
+        CacheService.bump_responses_version(survey_id)
+
+
+@receiver(post_delete, sender=ExportJob)
+def remove_export_job_files(sender, instance, **kwargs):
+    writer = ExportJobWriter(instance)
+    transaction.on_commit(writer.cleanup)
@@ -1,10 +1,18 @@
-from celery import shared_task
+import logging
+
+from celery import chord, shared_task
 from django.conf import settings
 from django.core.mail import send_mail
-from django.db.models import Avg
+from django.db.models import F
+from django.utils import timezone
 
+from .drafts import sweep_drafts
+from .exports import ExportJobWriter, expire_export_jobs, plan_export_partitions
+from .models.export import ExportJob, ExportStatus
 from .models.survey import Survey
 
+logger = logging.getLogger(__name__)
+
 
 @shared_task
 def send_survey_invitation(invitation_id):
@@ -79,28 +87,117 @@ def send_survey_reminders():
 
 
 @shared_task
-def update_survey_analytics():
-    """Update survey analytics data"""
-    from analytics.models import SurveyAnalytics
+def update_survey_analytics(survey_id=None):
+    """
+    Reconcile survey analytics with the stored responses.
+
+    Counters are maintained incrementally as responses are written, so this
+    is only needed to repair drift (e.g. after deletes or raw imports).
+    """
+    from analytics.counters import AnalyticsCounter
+
+    surveys = Survey.objects.filter(status="A")
+    if survey_id is not None:
+        surveys = surveys.filter(id=survey_id)
+
+    for survey in surveys.iterator():
+        AnalyticsCounter.rebuild(survey)
+
+
+def fail_export_job(job_id, err):
+    logger.error(f"Export job {job_id} failed: {str(err)}")
+    ExportJob.objects.filter(id=job_id).update(
+        status=ExportStatus.FAILED, error_message=str(err)
+    )
+    # Chunks still running may write parts afterwards, expire_export_jobs
+    # removes those
+    job = ExportJob.objects.select_related("survey").filter(id=job_id).first()
+    if job is not None:
+        ExportJobWriter(job).cleanup()
+
+
+@shared_task
+def run_export_job(job_id):
+    """
+    Split an export job into started_at partitions and write them in parallel,
+    assembling the final file once every chunk has been written.
+    """
+    job = ExportJob.objects.select_related("survey").get(id=job_id)
+
+    try:
+        partitions = plan_export_partitions(job.survey, job.total_chunks or 1)
+    except Exception as err:
+        fail_export_job(job_id, err)
+        raise
+
+    ExportJob.objects.filter(id=job_id).update(
+        status=ExportStatus.RUNNING,
+        total_chunks=len(partitions),
+        completed_chunks=0,
+    )
+
+    chord(
+        write_export_chunk.s(job_id, index, lower, upper)
+        for index, (lower, upper) in enumerate(partitions)
+    )(assemble_export_job.s(job_id).on_error(export_job_failed.s(job_id)))
+
+
+@shared_task
+def export_job_failed(request, exc, traceback, job_id):
+    """Error callback of the export chord: fail the job and drop its parts"""
+    fail_export_job(job_id, exc)
+
+
+@shared_task
+def write_export_chunk(job_id, index, lower=None, upper=None):
+    """Write one partition of an export job to its part file"""
+    job = ExportJob.objects.select_related("survey").get(id=job_id)
+
+    try:
+        byte_size = ExportJobWriter(job).write_chunk(index, lower, upper)
+    except Exception as err:
+        fail_export_job(job_id, err)
+        raise
+
+    ExportJob.objects.filter(id=job_id).update(
+        completed_chunks=F("completed_chunks") + 1
+    )
+    return byte_size
+
+
+@shared_task
+def assemble_export_job(chunk_sizes, job_id):
+    """Concatenate the part files of an export job into the downloadable file"""
+    job = ExportJob.objects.select_related("survey").get(id=job_id)
 
-    for survey in Survey.objects.filter(status="A"):
-        analytics, created = SurveyAnalytics.objects.get_or_create(survey=survey)
+    try:
+        path, byte_size = ExportJobWriter(job).assemble(len(chunk_sizes))
+    except Exception as err:
+        fail_export_job(job_id, err)
+        raise
 
-        total_responses = survey.responses.count()
-        completed_responses = survey.responses.filter(is_complete=True).count()
+    job.file.name = path
+    job.byte_size = byte_size
+    job.status = ExportStatus.COMPLETED
+    job.completed_at = timezone.now()
+    job.save(update_fields=["file", "byte_size", "status", "completed_at"])
 
-        analytics.total_responses = total_responses
-        analytics.completed_responses = completed_responses
 
-        if total_responses > 0:
-            analytics.abandonment_rate = (
-                (total_responses - completed_responses) / total_responses
-            ) * 100
+@shared_task
+def sweep_response_drafts():
+    """Persist or expire save-and-resume drafts abandoned by respondents"""
+    persisted, expired = sweep_drafts()
+    if persisted or expired:
+        logger.info(f"Swept response drafts: {persisted} persisted, {expired} expired")
+    return {"persisted": persisted, "expired": expired}
 
-        # Calculate average completion time
-        completed_times = survey.responses.filter(
-            is_complete=True, completion_time__isnull=False
-        ).aggregate(avg_time=Avg("completion_time"))
 
-        analytics.avg_completion_time = completed_times["avg_time"]
-        analytics.save()
+@shared_task
+def expire_export_job_files():
+    """Delete expired export jobs and the files of failed or deleted ones"""
+    deleted, removed = expire_export_jobs()
+    if deleted or removed:
+        logger.info(
+            f"Expired {deleted} export jobs, removed {removed} export directories"
+        )
+    return {"deleted": deleted, "removed": removed}
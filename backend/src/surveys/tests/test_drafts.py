@@ -0,0 +1,103 @@
+import time
+import uuid
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from surveys.drafts import DraftIndex, get_draft, save_draft, submit_draft, sweep_drafts
+from surveys.intake import IntakeStatus
+from surveys.models.answer import Answer
+from surveys.models.question import FieldType
+from surveys.models.survey import SurveyResponse, SurveyStatus
+from surveys.schema import get_compiled_survey
+from surveys.tests.factories.question_factory import QuestionFactory
+from surveys.tests.factories.survey_factory import SurveyFactory
+
+
+class ResponseDraftTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.survey = SurveyFactory(status=SurveyStatus.ACTIVE)
+        self.first = QuestionFactory(
+            survey=self.survey, field_type=FieldType.TEXT, is_required=True, order=1
+        )
+        self.second = QuestionFactory(
+            survey=self.survey, field_type=FieldType.NUMBER, is_required=True, order=2
+        )
+        self.compiled_survey = get_compiled_survey(self.survey.id)
+        self.token = str(uuid.uuid4())
+
+    def answer(self, question, value):
+        return {"question": str(question.id), "value": value}
+
+    def test_save_merges_pages_without_database_writes(self):
+        with self.assertNumQueries(0):
+            save_draft(self.compiled_survey, self.token, [self.answer(self.first, "a")])
+            draft, errors = save_draft(
+                self.compiled_survey,
+                self.token,
+                [self.answer(self.second, 3)],
+                current=self.second.id,
+            )
+
+        self.assertIsNone(errors)
+        self.assertEqual(
+            set(draft["answers"]), {str(self.first.id), str(self.second.id)}
+        )
+        self.assertEqual(get_draft(self.compiled_survey.id, self.token), draft)
+
+        draft, _errors = save_draft(
+            self.compiled_survey, self.token, [self.answer(self.first, "")]
+        )
+        self.assertEqual(list(draft["answers"]), [str(self.second.id)])
+
+    def test_save_validates_answers(self):
+        draft, errors = save_draft(
+            self.compiled_survey, self.token, [self.answer(self.second, "many")]
+        )
+
+        self.assertIsNone(draft)
+        self.assertIn(0, errors["answers"])
+
+    def test_submit_writes_merged_response(self):
+        save_draft(self.compiled_survey, self.token, [self.answer(self.first, "a")])
+
+        record, status, errors = submit_draft(
+            self.compiled_survey, self.token, [self.answer(self.second, 3)]
+        )
+
+        self.assertIsNone(errors)
+        self.assertEqual(status, IntakeStatus.PERSISTED)
+        response = SurveyResponse.objects.get(id=record["id"])
+        self.assertTrue(response.is_complete)
+        self.assertEqual(Answer.objects.filter(response=response).count(), 2)
+        self.assertIsNone(get_draft(self.compiled_survey.id, self.token))
+
+    def test_submit_requires_every_required_answer(self):
+        save_draft(self.compiled_survey, self.token, [self.answer(self.first, "a")])
+
+        _record, _status, errors = submit_draft(self.compiled_survey, self.token)
+
+        self.assertIn(str(self.second.id), errors["answers"])
+
+    def test_sweep_persists_abandoned_drafts(self):
+        save_draft(self.compiled_survey, self.token, [self.answer(self.first, "a")])
+        DraftIndex.touch(self.compiled_survey.id, self.token, time.time() - 100)
+        fresh_token = str(uuid.uuid4())
+        save_draft(self.compiled_survey, fresh_token, [self.answer(self.first, "b")])
+
+        persisted, expired = sweep_drafts(idle_timeout=50)
+
+        self.assertEqual((persisted, expired), (1, 0))
+        response = SurveyResponse.objects.get(user_token=self.token)
+        self.assertFalse(response.is_complete)
+        self.assertIsNone(get_draft(self.compiled_survey.id, self.token))
+        self.assertIsNotNone(get_draft(self.compiled_survey.id, fresh_token))
+
+    @override_settings(RESPONSE_DRAFT_PERSIST_ABANDONED=False)
+    def test_sweep_expires_abandoned_drafts(self):
+        save_draft(self.compiled_survey, self.token, [self.answer(self.first, "a")])
+        DraftIndex.touch(self.compiled_survey.id, self.token, time.time() - 100)
+
+        self.assertEqual(sweep_drafts(idle_timeout=50), (0, 1))
+        self.assertFalse(SurveyResponse.objects.filter(user_token=self.token).exists())
+        self.assertIsNone(get_draft(self.compiled_survey.id, self.token))
@@ -0,0 +1,148 @@
+import csv
+import io
+import os
+import tempfile
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from surveys.exports import ExportJobWriter, expire_export_jobs, plan_export_partitions
+from surveys.models.export import ExportJob, ExportStatus
+from surveys.models.question import FieldType
+from surveys.models.survey import SurveyResponse
+from surveys.tasks import run_export_job
+from surveys.tests.factories.answer_factory import AnswerFactory
+from surveys.tests.factories.question_factory import QuestionFactory
+from surveys.tests.factories.survey_factory import (
+    SurveyFactory,
+    SurveyResponseFactory,
+)
+
+
+class ExportJobTest(TestCase):
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        # Run the chord in-process
+        conf = run_export_job.app.conf
+        always_eager = conf.task_always_eager
+        conf.task_always_eager = True
+        self.addCleanup(setattr, conf, "task_always_eager", always_eager)
+
+        self.survey = SurveyFactory(title="Customer Feedback")
+        self.question = QuestionFactory(
+            survey=self.survey, title="Score", field_type=FieldType.NUMBER, order=1
+        )
+
+        now = timezone.now()
+        for index in range(10):
+            response = SurveyResponseFactory(survey=self.survey, is_complete=True)
+            AnswerFactory(
+                response=response, question=self.question, number_answer=index
+            )
+            SurveyResponse.objects.filter(id=response.id).update(
+                started_at=now - timedelta(hours=index)
+            )
+
+    def run_job(self, **kwargs):
+        job = ExportJob.objects.create(survey=self.survey, **kwargs)
+        run_export_job.delay(str(job.id))
+        job.refresh_from_db()
+        return job
+
+    def test_partitions_cover_every_response_once(self):
+        partitions = plan_export_partitions(self.survey, 4)
+
+        self.assertEqual(len(partitions), 4)
+        self.assertIsNone(partitions[0][1])
+        self.assertIsNone(partitions[-1][0])
+
+        total = 0
+        for lower, upper in partitions:
+            queryset = SurveyResponse.objects.filter(survey=self.survey)
+            if lower is not None:
+                queryset = queryset.filter(started_at__gte=lower)
+            if upper is not None:
+                queryset = queryset.filter(started_at__lt=upper)
+            total += queryset.count()
+        self.assertEqual(total, 10)
+
+    def test_csv_job_is_assembled_with_a_single_header(self):
+        job = self.run_job(total_chunks=4)
+
+        self.assertEqual(job.status, ExportStatus.COMPLETED)
+        self.assertEqual(job.completed_chunks, 4)
+        self.assertEqual(job.progress, 100.0)
+        self.assertEqual(job.byte_size, os.path.getsize(job.file.path))
+        self.assertTrue(job.file.name.endswith("customer-feedback_responses.csv"))
+
+        with open(job.file.path, newline="") as export:
+            rows = list(csv.reader(io.StringIO(export.read())))
+
+        self.assertEqual(rows[0][-1], "Score")
+        self.assertEqual(len(rows), 11)
+        # Newest responses first, as in the synchronous export
+        self.assertEqual([row[-1] for row in rows[1:]], [f"{i}.0" for i in range(10)])
+
+        # Part files are removed once assembled
+        self.assertEqual(
+            os.listdir(os.path.dirname(job.file.path)),
+            [job.file.name.rsplit("/", 1)[-1]],
+        )
+
+    def test_ndjson_job(self):
+        job = self.run_job(file_format="ndjson", total_chunks=3)
+
+        with open(job.file.path) as export:
+            self.assertEqual(len(export.read().splitlines()), 10)
+
+    def test_survey_without_responses(self):
+        SurveyResponse.objects.all().delete()
+
+        job = self.run_job(total_chunks=4)
+
+        self.assertEqual(job.status, ExportStatus.COMPLETED)
+        self.assertEqual(job.total_chunks, 1)
+        with open(job.file.path) as export:
+            self.assertEqual(len(export.read().splitlines()), 1)
+
+    def test_failed_job_removes_its_parts(self):
+        write_chunk = ExportJobWriter.write_chunk
+
+        def fail_last_chunk(writer, index, lower=None, upper=None):
+            if index == 3:
+                raise OSError("disk full")
+            return write_chunk(writer, index, lower, upper)
+
+        with patch.object(ExportJobWriter, "write_chunk", fail_last_chunk):
+            job = self.run_job(total_chunks=4)
+
+        self.assertEqual(job.status, ExportStatus.FAILED)
+        self.assertEqual(job.error_message, "disk full")
+        self.assertFalse(os.path.exists(ExportJobWriter(job).directory))
+
+    def test_expired_and_deleted_jobs_lose_their_files(self):
+        expired = self.run_job(total_chunks=2)
+        kept = self.run_job(total_chunks=2)
+        ExportJob.objects.filter(id=expired.id).update(
+            created_at=timezone.now() - timedelta(days=30)
+        )
+        # Left behind by a job deleted while its chunks were running
+        orphan = os.path.join(os.path.dirname(ExportJobWriter(kept).directory), "x")
+        os.makedirs(orphan)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(expire_export_jobs(), (1, 2))
+
+        self.assertFalse(os.path.exists(expired.file.path))
+        self.assertFalse(os.path.exists(orphan))
+        self.assertTrue(os.path.exists(kept.file.path))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            kept.delete()
+        self.assertFalse(os.path.exists(ExportJobWriter(kept).directory))
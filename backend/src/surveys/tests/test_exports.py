@@ -0,0 +1,96 @@
+import csv
+import io
+import json
+
+from django.test import TestCase
+from openpyxl import load_workbook
+from surveys.exports import CSVExporter, NDJSONExporter, XLSXExporter
+from surveys.models.question import FieldType
+from surveys.tests.factories.answer_factory import AnswerFactory
+from surveys.tests.factories.question_factory import QuestionFactory
+from surveys.tests.factories.survey_factory import (
+    SurveyFactory,
+    SurveyResponseFactory,
+)
+
+
+def read_stream(response):
+    return b"".join(
+        chunk if isinstance(chunk, bytes) else chunk.encode()
+        for chunk in response.streaming_content
+    )
+
+
+class SurveyResponseExportTest(TestCase):
+    def setUp(self):
+        self.survey = SurveyFactory(title="Export")
+        self.text_question = QuestionFactory(
+            survey=self.survey, title="Name", field_type=FieldType.TEXT, order=1
+        )
+        self.choice_question = QuestionFactory(
+            survey=self.survey,
+            title="Colors",
+            field_type=FieldType.MULTIPLE_CHOICE,
+            order=2,
+        )
+        self.number_question = QuestionFactory(
+            survey=self.survey, title="Age", field_type=FieldType.NUMBER, order=3
+        )
+
+        self.response = SurveyResponseFactory(survey=self.survey, is_complete=True)
+        AnswerFactory(
+            response=self.response, question=self.text_question, text_answer="Ada"
+        )
+        AnswerFactory(
+            response=self.response,
+            question=self.choice_question,
+            json_answer=["red", "blue"],
+        )
+        AnswerFactory(
+            response=self.response, question=self.number_question, number_answer=36
+        )
+        self.empty_response = SurveyResponseFactory(survey=self.survey, user=None)
+
+    def test_csv_pivots_answers_into_columns(self):
+        response = CSVExporter(self.survey).get_response()
+        rows = list(csv.reader(io.StringIO(read_stream(response).decode())))
+
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertIn("Export_responses.csv", response["Content-Disposition"])
+        self.assertEqual(rows[0][-3:], ["Name", "Colors", "Age"])
+        self.assertEqual(len(rows), 3)
+
+        by_id = {row[0]: row for row in rows[1:]}
+        self.assertEqual(
+            by_id[str(self.response.id)][-3:], ["Ada", "red, blue", "36.0"]
+        )
+        self.assertEqual(by_id[str(self.empty_response.id)][3], "Anonymous")
+        self.assertEqual(by_id[str(self.empty_response.id)][-3:], ["", "", ""])
+
+    def test_ndjson_emits_one_record_per_response(self):
+        response = NDJSONExporter(self.survey).get_response()
+        records = [
+            json.loads(line) for line in read_stream(response).decode().splitlines()
+        ]
+
+        self.assertEqual(len(records), 2)
+        record = next(item for item in records if item["id"] == str(self.response.id))
+        self.assertEqual(record["answers"][str(self.text_question.id)], "Ada")
+        self.assertEqual(record["answers"][str(self.number_question.id)], 36)
+
+    def test_xlsx_workbook(self):
+        response = XLSXExporter(self.survey).get_response()
+        workbook = load_workbook(io.BytesIO(read_stream(response)), read_only=True)
+        rows = list(workbook["Responses"].values)
+
+        self.assertEqual(rows[0][-3:], ("Name", "Colors", "Age"))
+        self.assertEqual(len(rows), 3)
+        # Workbooks cannot be assembled from separately written rows
+        self.assertFalse(hasattr(XLSXExporter, "stream_rows"))
+
+    def test_query_count_is_independent_of_response_count(self):
+        SurveyResponseFactory.create_batch(5, survey=self.survey)
+
+        # questions + one joined pass over responses and answers
+        with self.assertNumQueries(2):
+            read_stream(CSVExporter(self.survey).get_response())
@@ -0,0 +1,216 @@
+import json
+import uuid
+from datetime import timedelta
+from unittest.mock import MagicMock
+
+from analytics.models import QuestionAnalytics, SurveyAnalytics
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from surveys.intake import (
+    IntakeStatus,
+    ResponseIntake,
+    build_intake_record,
+    get_request_metadata,
+    persist_intake_records,
+)
+from surveys.models.answer import Answer
+from surveys.models.question import FieldType
+from surveys.models.survey import SurveyResponse, SurveyStatus
+from surveys.schema import get_compiled_survey
+from surveys.tests.factories.question_factory import QuestionFactory
+from surveys.tests.factories.survey_factory import SurveyFactory
+
+
+class ResponseIntakeTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.survey = SurveyFactory(status=SurveyStatus.ACTIVE)
+        self.number_question = QuestionFactory(
+            survey=self.survey, field_type=FieldType.NUMBER, is_required=True
+        )
+        self.text_question = QuestionFactory(
+            survey=self.survey, field_type=FieldType.TEXT, is_required=False
+        )
+
+    def build_record(self, **data):
+        data.setdefault(
+            "answers",
+            [
+                {"question": str(self.number_question.id), "value": "7"},
+                {"question": str(self.text_question.id), "value": "Great"},
+            ],
+        )
+        record, errors = build_intake_record(get_compiled_survey(self.survey.id), data)
+        self.assertIsNone(errors)
+        return record
+
+    def test_build_record_validates_against_schema(self):
+        compiled_survey = get_compiled_survey(self.survey.id)
+
+        _record, errors = build_intake_record(
+            compiled_survey,
+            {"answers": [{"question": str(self.text_question.id), "value": "x"}]},
+        )
+        self.assertIn(str(self.number_question.id), errors["answers"])
+
+        _record, errors = build_intake_record(
+            compiled_survey,
+            {"answers": [{"question": str(self.number_question.id), "value": "NaN?"}]},
+        )
+        self.assertIn(0, errors["answers"])
+
+        record = self.build_record(is_complete=True)
+        self.assertEqual(record["answers"][0]["number_answer"], 7.0)
+        self.assertTrue(record["is_complete"])
+
+    def test_persist_records_in_batch(self):
+        records = [self.build_record(is_complete=True) for _ in range(3)]
+
+        statuses = persist_intake_records(records)
+
+        self.assertEqual(set(statuses.values()), {IntakeStatus.PERSISTED})
+        self.assertEqual(SurveyResponse.objects.filter(survey=self.survey).count(), 3)
+        self.assertEqual(
+            Answer.objects.filter(question=self.number_question).count(), 3
+        )
+
+        analytics = SurveyAnalytics.objects.get(survey=self.survey)
+        self.assertEqual(analytics.total_starts, 3)
+        self.assertEqual(analytics.total_completions, 3)
+        number_analytics = QuestionAnalytics.objects.get(question=self.number_question)
+        self.assertEqual(number_analytics.total_answers, 3)
+        self.assertEqual(number_analytics.average_value, 7)
+
+    def test_query_count_is_independent_of_batch_size(self):
+        persist_intake_records([self.build_record()])
+
+        def count_queries(size):
+            records = [self.build_record() for _ in range(size)]
+            with CaptureQueriesContext(connection) as context:
+                persist_intake_records(records)
+            return len(context.captured_queries)
+
+        self.assertEqual(count_queries(1), count_queries(50))
+
+    def test_persist_is_idempotent(self):
+        token = str(uuid.uuid4())
+        first = self.build_record(user_token=token)
+        retry = self.build_record(user_token=token)
+
+        persist_intake_records([first])
+        statuses = persist_intake_records([first, retry])
+
+        self.assertEqual(statuses[first["id"]], IntakeStatus.PERSISTED)
+        self.assertEqual(statuses[retry["id"]], IntakeStatus.DUPLICATE)
+        self.assertEqual(SurveyResponse.objects.filter(user_token=token).count(), 1)
+
+    def test_process_reads_persists_and_acknowledges(self):
+        record = self.build_record()
+        client = MagicMock()
+        client.xreadgroup.return_value = [
+            [b"stream", [(b"1-0", {b"record": json.dumps(record).encode()})]]
+        ]
+
+        intake = ResponseIntake(client=client)
+        count = intake.process("writer-1", count=100)
+
+        self.assertEqual(count, 1)
+        self.assertEqual(ResponseIntake.get_status(record["id"]), "persisted")
+        client.pipeline.return_value.xack.assert_called_once_with(
+            intake.stream, intake.group, b"1-0"
+        )
+
+    def test_failing_records_do_not_block_the_batch(self):
+        good = [self.build_record() for _ in range(2)]
+        too_long = self.build_record()
+        too_long["country"] = "x" * 101
+        orphan = self.build_record()
+        orphan["survey"] = str(uuid.uuid4())  # Survey deleted after the 202
+        records = [good[0], too_long, orphan, good[1]]
+
+        client = MagicMock()
+        client.xreadgroup.return_value = [
+            [
+                b"stream",
+                [
+                    (f"{index}-0".encode(), {b"record": json.dumps(record).encode()})
+                    for index, record in enumerate(records)
+                ],
+            ]
+        ]
+        with connection.cursor() as cursor:
+            # Foreign keys are checked at commit otherwise
+            cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+
+        intake = ResponseIntake(client=client)
+        self.assertEqual(intake.process("writer-1", count=100), 4)
+
+        for record in good:
+            self.assertEqual(
+                ResponseIntake.get_status(record["id"]), IntakeStatus.PERSISTED
+            )
+        for record in (too_long, orphan):
+            self.assertEqual(
+                ResponseIntake.get_status(record["id"]), IntakeStatus.FAILED
+            )
+        client.pipeline.return_value.xack.assert_called_once_with(
+            intake.stream, intake.group, b"0-0", b"1-0", b"2-0", b"3-0"
+        )
+
+    def test_metadata_and_timing_survive_the_flush(self):
+        request = RequestFactory().post(
+            "/",
+            REMOTE_ADDR="203.0.113.7",
+            HTTP_USER_AGENT="Mozilla/5.0 (iPhone)",
+            HTTP_REFERER="https://example.com/invite",
+            HTTP_CF_IPCOUNTRY="NL",
+        )
+        started_at = timezone.now() - timedelta(minutes=5)
+        record, errors = build_intake_record(
+            get_compiled_survey(self.survey.id),
+            {
+                "answers": [{"question": str(self.number_question.id), "value": "3"}],
+                "is_complete": True,
+                "started_at": started_at.isoformat(),
+            },
+            metadata=get_request_metadata(request),
+        )
+        self.assertIsNone(errors)
+
+        client = MagicMock()
+        payload = json.dumps(record, cls=DjangoJSONEncoder).encode()
+        client.xreadgroup.return_value = [[b"stream", [(b"1-0", {b"record": payload})]]]
+        ResponseIntake(client=client).process("writer-1", count=100)
+
+        survey_response = SurveyResponse.objects.get(id=record["id"])
+        self.assertEqual(survey_response.ip_address, "203.0.113.7")
+        self.assertEqual(survey_response.user_agent, "Mozilla/5.0 (iPhone)")
+        self.assertEqual(survey_response.referrer, "https://example.com/invite")
+        self.assertEqual(survey_response.country, "NL")
+        self.assertEqual(survey_response.started_at, started_at)
+        self.assertIsNotNone(survey_response.completed_at)
+        self.assertEqual(
+            survey_response.time_taken,
+            survey_response.completed_at - survey_response.started_at,
+        )
+
+    def test_incomplete_record_has_no_completion(self):
+        record = self.build_record()
+        persist_intake_records([record])
+
+        survey_response = SurveyResponse.objects.get(id=record["id"])
+        self.assertIsNone(survey_response.completed_at)
+        self.assertIsNone(survey_response.time_taken)
+
+    def test_rejects_future_or_invalid_start(self):
+        compiled_survey = get_compiled_survey(self.survey.id)
+        answers = [{"question": str(self.number_question.id), "value": "3"}]
+        for started_at in ("yesterday", timezone.now() + timedelta(hours=1)):
+            _record, errors = build_intake_record(
+                compiled_survey, {"answers": answers, "started_at": str(started_at)}
+            )
+            self.assertIn("started_at", errors)
@@ -0,0 +1,193 @@
+import time
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from surveys.logic import OPERATORS, SurveyLogic, SurveyLogicError, normalize
+from surveys.models.question import FieldType
+from surveys.models.survey import SurveyStatus
+from surveys.schema import CompiledQuestion, get_compiled_survey, load_compiled_survey
+from surveys.tests.factories.question_factory import QuestionFactory
+from surveys.tests.factories.survey_factory import SurveyFactory
+
+
+def compiled_question(question_id, depends_on=None, operator="", value="", **data):
+    data.update(
+        {
+            "id": question_id,
+            "title": f"Question {question_id}",
+            "field_type": data.get("field_type", FieldType.TEXT),
+            "is_required": data.get("is_required", False),
+            "order": 0,
+            "options": data.get("options", []),
+            "allow_other": False,
+            "min_length": None,
+            "max_length": None,
+            "min_value": None,
+            "max_value": None,
+            "scale_min": None,
+            "scale_max": None,
+            "patterns": [],
+            "error_message": "",
+            "depends_on": depends_on,
+            "condition_operator": operator,
+            "condition_value": value,
+        }
+    )
+    return CompiledQuestion(data)
+
+
+class OperatorTest(SimpleTestCase):
+    def check(self, operator, condition_value, value):
+        return OPERATORS[operator](condition_value)(normalize(value))
+
+    def test_operators(self):
+        self.assertTrue(self.check("equals", "Yes", "yes"))
+        self.assertTrue(self.check("equals", "5", 5.0))
+        self.assertTrue(self.check("equals", "red", ["red", "blue"]))
+        self.assertTrue(self.check("equals", "true", True))
+        self.assertFalse(self.check("equals", "Yes", None))
+        self.assertTrue(self.check("not_equals", "Yes", "No"))
+        self.assertFalse(self.check("not_equals", "Yes", None))
+        self.assertTrue(self.check("contains", "bad", "Really bad service"))
+        self.assertTrue(self.check("in", "red, green", ["green"]))
+        self.assertTrue(self.check("not_in", "red, green", "blue"))
+        self.assertTrue(self.check("greater_than", "3", 4))
+        self.assertFalse(self.check("greater_than", "3", "abc"))
+        self.assertTrue(self.check("less_than_or_equal", "2024-01-01", "2023-12-31"))
+        self.assertTrue(self.check("is_answered", "", "x"))
+        self.assertTrue(self.check("is_not_answered", "", []))
+
+
+class SurveyLogicTest(SimpleTestCase):
+    def test_visibility_follows_the_dag(self):
+        # c depends on b which depends on a; declared out of dependency order
+        logic = SurveyLogic(
+            [
+                compiled_question("c", depends_on="b", operator="gt", value="5"),
+                compiled_question("a"),
+                compiled_question("b", depends_on="a", value="yes"),
+                compiled_question("d"),
+            ]
+        )
+
+        self.assertEqual(logic.order.index("a") < logic.order.index("b"), True)
+        self.assertEqual(logic.visible({}), {"a", "d"})
+        self.assertEqual(logic.visible({"a": "yes"}), {"a", "b", "d"})
+        self.assertEqual(logic.visible({"a": "yes", "b": 6.0}), {"a", "b", "c", "d"})
+        # A question is hidden when its parent is, whatever the parent's value
+        self.assertEqual(logic.visible({"a": "no", "b": 6.0}), {"a", "d"})
+
+    def test_cycles_are_detected(self):
+        logic = SurveyLogic(
+            [
+                compiled_question("a", depends_on="b"),
+                compiled_question("b", depends_on="a"),
+                compiled_question("c", depends_on="a"),
+                compiled_question("d"),
+            ]
+        )
+
+        self.assertEqual(logic.cyclic, {"a", "b", "c"})
+        self.assertEqual(logic.visible({"a": "x", "b": "x"}), {"d"})
+        with self.assertRaises(SurveyLogicError):
+            logic.check()
+        self.assertIn("cycle", logic.errors()[0])
+
+    def test_next_questions(self):
+        logic = SurveyLogic(
+            [
+                compiled_question("a"),
+                compiled_question("b", depends_on="a", value="yes"),
+                compiled_question("c"),
+                compiled_question("d"),
+            ]
+        )
+
+        def next_ids(values, current=None, limit=None):
+            visible = logic.visible(values)
+            return [q.id for q in logic.next_questions(visible, current, limit)]
+
+        self.assertEqual(next_ids({}, limit=2), ["a", "c"])
+        self.assertEqual(next_ids({"a": "yes"}, current="a", limit=2), ["b", "c"])
+        self.assertEqual(next_ids({"a": "no"}, current="a"), ["c", "d"])
+
+    def test_errors(self):
+        logic = SurveyLogic(
+            [
+                compiled_question("a", options=["red", "blue"]),
+                compiled_question("b", depends_on="a", value="green"),
+                compiled_question("c", depends_on="a", operator="matches"),
+                compiled_question("e", depends_on="f"),
+                compiled_question("f"),
+            ]
+        )
+
+        self.assertEqual(
+            logic.errors(),
+            [
+                "Invalid condition value for question 'Question b'",
+                "Unknown condition operator 'matches' for question 'Question c'",
+                "Question 'Question e' depends on a question that comes after it",
+            ],
+        )
+
+    def test_visibility_of_large_survey_is_fast(self):
+        # 500 questions in chains of 5 conditional questions
+        questions = []
+        for index in range(500):
+            depends_on = str(index - 1) if index % 5 else None
+            questions.append(
+                compiled_question(str(index), depends_on=depends_on, value="yes")
+            )
+        logic = SurveyLogic(questions)
+        values = {str(index): "yes" for index in range(0, 500, 2)}
+
+        started = time.perf_counter()
+        for _ in range(100):
+            logic.visible(values)
+        elapsed = (time.perf_counter() - started) / 100
+
+        self.assertLess(elapsed, 0.001)
+
+
+class CompiledSurveyLogicTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        load_compiled_survey.cache_clear()
+        self.survey = SurveyFactory(status=SurveyStatus.ACTIVE)
+        self.parent = QuestionFactory(
+            survey=self.survey,
+            field_type=FieldType.SINGLE_CHOICE,
+            options=["yes", "no"],
+            is_required=True,
+            order=1,
+        )
+        self.child = QuestionFactory(
+            survey=self.survey,
+            field_type=FieldType.NUMBER,
+            is_required=True,
+            order=2,
+            depends_on=self.parent,
+            condition_operator="equals",
+            condition_value="yes",
+        )
+
+    def answer(self, question, value):
+        return {"question": str(question.id), "value": value}
+
+    def test_required_only_enforced_on_visible_questions(self):
+        compiled_survey = get_compiled_survey(self.survey.id)
+
+        _cleaned, errors = compiled_survey.clean([self.answer(self.parent, "no")])
+        self.assertEqual(errors, {})
+
+        _cleaned, errors = compiled_survey.clean([self.answer(self.parent, "yes")])
+        self.assertEqual(list(errors), [str(self.child.id)])
+
+    def test_answers_to_hidden_questions_are_dropped(self):
+        cleaned, errors = get_compiled_survey(self.survey.id).clean(
+            [self.answer(self.parent, "no"), self.answer(self.child, "not a number")]
+        )
+
+        self.assertEqual(errors, {})
+        self.assertEqual([question.id for question, _f in cleaned], [self.parent.id])
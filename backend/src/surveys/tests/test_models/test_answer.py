@@ -1,4 +1,7 @@
+from core.cache import CacheService
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from surveys.tests.factories.answer_factory import AnswerFactory
 from surveys.tests.factories.question_factory import (
@@ -94,6 +97,25 @@ class AnswerModelTest(TestCase):
         expected = f"Answer to {self.question.title[:30]}"
         self.assertEqual(str(answer), expected)
 
+    def test_deleting_a_response_does_not_load_each_answer(self):
+        def count_delete_queries(answers):
+            survey_response = SurveyResponseFactory(survey=self.survey)
+            for _ in range(answers):
+                AnswerFactory(
+                    response=survey_response, question=self.question, text_answer="x"
+                )
+            version = CacheService.get_responses_version(self.survey.id)
+
+            with CaptureQueriesContext(connection) as context:
+                survey_response.delete()
+
+            self.assertNotEqual(
+                CacheService.get_responses_version(self.survey.id), version
+            )
+            return len(context.captured_queries)
+
+        self.assertEqual(count_delete_queries(1), count_delete_queries(10))
+
     # def test_answer_unique_constraint(self):
     #     AnswerFactory(
     #         response=self.response, question=self.question, text_answer="First answer"
@@ -0,0 +1,191 @@
+import uuid
+
+from core.cache import CacheService
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from surveys.models.question import FieldType, QuestionOption
+from surveys.models.survey import SurveyStatus
+from surveys.schema import get_compiled_survey, load_compiled_survey
+from surveys.tests.factories.question_factory import (
+    QuestionFactory,
+    QuestionOptionFactory,
+)
+from surveys.tests.factories.survey_factory import SurveyFactory
+
+
+class CompiledSurveyTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        load_compiled_survey.cache_clear()
+        self.survey = SurveyFactory(status=SurveyStatus.ACTIVE)
+        self.text_question = QuestionFactory(
+            survey=self.survey,
+            field_type=FieldType.TEXT,
+            is_required=True,
+            min_length=2,
+            max_length=5,
+            regex_pattern=r"[a-z]+",
+        )
+        self.email_question = QuestionFactory(
+            survey=self.survey, field_type=FieldType.EMAIL
+        )
+        self.rating_question = QuestionFactory(
+            survey=self.survey, field_type=FieldType.RATING, scale_min=1, scale_max=5
+        )
+        self.choice_question = QuestionFactory(
+            survey=self.survey,
+            field_type=FieldType.SINGLE_CHOICE,
+            options=["red", "blue"],
+        )
+
+    def clean(self, question, value):
+        answers = [{"question": str(question.id), "value": value}]
+        if question != self.text_question:
+            answers.append({"question": str(self.text_question.id), "value": "ok"})
+        return get_compiled_survey(self.survey.id).clean(answers)
+
+    def test_valid_submission(self):
+        cleaned, errors = get_compiled_survey(self.survey.id).clean(
+            [
+                {"question": str(self.text_question.id), "value": "abc"},
+                {"question": str(self.email_question.id), "value": "a@b.io"},
+                {"question": str(self.rating_question.id), "value": 4},
+                {"question": str(self.choice_question.id), "value": "red"},
+            ]
+        )
+
+        self.assertEqual(errors, {})
+        self.assertEqual(
+            [fields for _question, fields in cleaned],
+            [
+                {"text_answer": "abc"},
+                {"text_answer": "a@b.io"},
+                {"number_answer": 4.0},
+                {"json_answer": ["red"]},
+            ],
+        )
+
+    def test_question_rules(self):
+        self.assertIn(0, self.clean(self.text_question, "a")[1])
+        self.assertIn(0, self.clean(self.text_question, "abcdef")[1])
+        self.assertIn(0, self.clean(self.text_question, "AB1")[1])
+        self.assertIn(0, self.clean(self.email_question, "not-an-email")[1])
+        self.assertIn(0, self.clean(self.rating_question, 6)[1])
+        for value in ("nan", "inf", "-inf", float("nan")):
+            self.assertIn(0, self.clean(self.rating_question, value)[1])
+        self.assertIn(0, self.clean(self.choice_question, "green")[1])
+        self.assertIn(0, self.clean(self.choice_question, ["red", "blue"])[1])
+
+    def test_error_message_overrides_default(self):
+        self.text_question.error_message = "Too short"
+        self.text_question.save()
+
+        _cleaned, errors = self.clean(self.text_question, "a")
+
+        self.assertEqual(errors[0], "Too short")
+
+    def test_missing_required_answer(self):
+        _cleaned, errors = get_compiled_survey(self.survey.id).clean([])
+
+        self.assertIn(str(self.text_question.id), errors)
+
+    def test_repeat_validation_does_not_query(self):
+        get_compiled_survey(self.survey.id)
+
+        with self.assertNumQueries(0):
+            _answers, errors = get_compiled_survey(self.survey.id).build_answers(
+                [{"question": str(self.text_question.id), "value": "abc"}]
+            )
+        self.assertEqual(errors, {})
+
+    def test_shared_cache_is_used_by_new_processes(self):
+        get_compiled_survey(self.survey.id)
+        load_compiled_survey.cache_clear()
+
+        with self.assertNumQueries(0):
+            compiled_survey = get_compiled_survey(self.survey.id)
+        self.assertEqual(len(compiled_survey.questions), 4)
+
+    def test_invalidated_on_question_writes(self):
+        compiled_survey = get_compiled_survey(self.survey.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            QuestionFactory(survey=self.survey, field_type=FieldType.TEXT)
+        self.assertEqual(len(get_compiled_survey(self.survey.id).questions), 5)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            QuestionOptionFactory(question=self.choice_question, value="green")
+        recompiled = get_compiled_survey(self.survey.id)
+        self.assertNotEqual(recompiled.version, compiled_survey.version)
+        self.assertEqual(self.clean(self.choice_question, "green")[1], {})
+
+    def test_invalidated_on_option_saved_by_question_id(self):
+        version = get_compiled_survey(self.survey.id).version
+
+        with self.captureOnCommitCallbacks(execute=True):
+            QuestionOption.objects.create(
+                question_id=self.choice_question.id, text="Green", value="green"
+            )
+
+        self.assertNotEqual(get_compiled_survey(self.survey.id).version, version)
+
+    def test_deleting_a_question_does_not_load_each_option(self):
+        def count_delete_queries(options):
+            question = QuestionFactory(
+                survey=self.survey, field_type=FieldType.SINGLE_CHOICE
+            )
+            for index in range(options):
+                QuestionOptionFactory(question=question, value=f"option-{index}")
+            version = CacheService.get_survey_version(self.survey.id)
+
+            with CaptureQueriesContext(connection) as context:
+                with self.captureOnCommitCallbacks(execute=True):
+                    question.delete()
+
+            self.assertNotEqual(
+                CacheService.get_survey_version(self.survey.id), version
+            )
+            return len(context.captured_queries)
+
+        self.assertEqual(count_delete_queries(1), count_delete_queries(10))
+
+    def test_missing_survey(self):
+        self.assertIsNone(get_compiled_survey(uuid.uuid4()))
+        self.assertIsNone(get_compiled_survey("not-a-uuid"))
+
+    def test_non_canonical_ids_follow_invalidation(self):
+        spellings = (str(self.survey.id).upper(), self.survey.id.hex)
+        for survey_id in spellings:
+            self.assertEqual(len(get_compiled_survey(survey_id).questions), 4)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            QuestionFactory(survey=self.survey, field_type=FieldType.TEXT)
+
+        for survey_id in spellings:
+            compiled_survey = get_compiled_survey(survey_id)
+            self.assertEqual(compiled_survey.id, str(self.survey.id))
+            self.assertEqual(len(compiled_survey.questions), 5)
+
+    def test_version_is_bumped_once_committed(self):
+        version = get_compiled_survey(self.survey.id).version
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            QuestionFactory(survey=self.survey, field_type=FieldType.TEXT)
+            # Until the commit, readers keep the version of the rows they see
+            self.assertEqual(CacheService.get_survey_version(self.survey.id), version)
+
+        self.assertEqual(len(callbacks), 1)
+        callbacks[0]()
+        self.assertNotEqual(CacheService.get_survey_version(self.survey.id), version)
+        self.assertEqual(len(get_compiled_survey(self.survey.id).questions), 5)
+
+    def test_missing_survey_is_not_cached(self):
+        survey_id = uuid.uuid4()
+        self.assertIsNone(get_compiled_survey(survey_id))
+
+        # Created without a version bump, e.g. the signal's commit pending
+        SurveyFactory(id=survey_id, status=SurveyStatus.ACTIVE)
+
+        self.assertIsNotNone(get_compiled_survey(survey_id))